@@ -8,10 +8,27 @@ app = Celery('fatcode')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 app.autodiscover_tasks()
+app.autodiscover_tasks(['src.base'])
 
 app.conf.beat_schedule = {
     'everyday-task': {
       'task': 'src.team.tasks.check_invitations',
       'schedule': crontab(hour='*/23')
+    },
+    'refresh-projects-stats': {
+      'task': 'src.repository.tasks.refresh_projects_stats',
+      'schedule': crontab(minute=0)
+    },
+    'reconcile-questions-rating': {
+      'task': 'src.questions.tasks.reconcile_questions_rating',
+      'schedule': crontab(hour=4, minute=0)
+    },
+    'dispatch-student-works': {
+      'task': 'src.courses.tasks.dispatch_student_works',
+      'schedule': crontab()
+    },
+    'flush-views': {
+      'task': 'src.base.tasks.flush_views',
+      'schedule': crontab()
     }
 }
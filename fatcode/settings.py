@@ -1,5 +1,6 @@
 import os
 import os.path
+import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -38,6 +39,7 @@ INSTALLED_APPS = [
     'src.repository',
     'src.dashboard',
     'src.support',
+    'src.search',
 ]
 
 MIDDLEWARE = [
@@ -48,10 +50,14 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'silk.middleware.SilkyMiddleware',
+    'src.base.query_budget.QueryBudgetMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# превышение бюджета запросов - ошибка в тестах (manage.py test), иначе только предупреждение в логе
+QUERY_BUDGET_RAISE = os.environ.get('QUERY_BUDGET_RAISE', '1' if sys.argv[1:2] == ['test'] else '0') == '1'
+
 ROOT_URLCONF = 'fatcode.urls'
 
 TEMPLATES = [
@@ -83,6 +89,18 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+if os.environ.get('REDIS_CACHE_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_CACHE_URL'),
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -158,6 +176,11 @@ TELEGRAM = {
 
 FATCODEADMIN_GIT_TOKEN = os.environ.get('FATCODEADMIN_GIT_TOKEN', '123456789')
 
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+
+CODE_RUNNER_URL = os.environ.get('CODE_RUNNER_URL', 'http://fast-test_api_1:8008')
+CODE_RUNNER_BACKEND = os.environ.get('CODE_RUNNER_BACKEND', 'remote')
+
 CORS_ALLOWED_ORIGINS = os.environ.get("CORS_ALLOWED_HOSTS", "http://127.0.0.1:8000").split(" ")
 
 CELERY_BROKER_URL = 'redis://redis:6379/0'
@@ -0,0 +1,87 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+watched_models = set()
+
+
+def version_key(model) -> str:
+    return f'cache_version:{model._meta.label_lower}'
+
+
+def get_versions(models) -> str:
+    """Текущие версии моделей одним запросом к кэшу"""
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def bump_version(model):
+    """Сделать устаревшими все закэшированные ответы, зависящие от модели"""
+    key = version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def response_key(name: str, models, url: str) -> str:
+    return f'response:{name}:{get_versions(models)}:{hashlib.md5(url.encode()).hexdigest()}'
+
+
+def count(name: str, result: str):
+    """Счетчик попаданий и промахов кэша"""
+    key = f'cache_stats:{name}:{result}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_stats(name: str) -> dict:
+    stats = cache.get_many([f'cache_stats:{name}:hit', f'cache_stats:{name}:miss'])
+    return {
+        'hit': stats.get(f'cache_stats:{name}:hit', 0),
+        'miss': stats.get(f'cache_stats:{name}:miss', 0),
+    }
+
+
+def m2m_through_models(model) -> list:
+    """Промежуточные таблицы всех связей многие-ко-многим модели, прямых и обратных"""
+    through = [field.remote_field.through for field in model._meta.many_to_many]
+    return through + [rel.through for rel in model._meta.related_objects if rel.many_to_many]
+
+
+def watch_model(model):
+    """Сбрасывать кэш ответов при изменении модели.
+    Обработчики подключаются только к модели и ее промежуточным таблицам: обработчик post_delete
+    без sender отключает быстрое удаление у всех моделей проекта.
+    """
+    if model in watched_models:
+        return
+    watched_models.add(model)
+    label = model._meta.label_lower
+    post_save.connect(invalidate_model, sender=model, dispatch_uid=f'base_cache_post_save:{label}')
+    post_delete.connect(invalidate_model, sender=model, dispatch_uid=f'base_cache_post_delete:{label}')
+    for through in m2m_through_models(model):
+        m2m_changed.connect(
+            invalidate_m2m, sender=through, dispatch_uid=f'base_cache_m2m_changed:{through._meta.label_lower}'
+        )
+
+
+def invalidate_model(sender, **kwargs):
+    bump_version(sender)
+
+
+def invalidate_m2m(sender, instance, model, **kwargs):
+    if kwargs['action'].startswith('post_'):
+        for changed in (sender, type(instance), model):
+            if changed in watched_models:
+                bump_version(changed)
+
@@ -1,3 +1,12 @@
+from collections import OrderedDict
+
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+from . import cache
+from .service import ViewCounter
+
+
 class MixedPermission:
     """ Permissions action`s mixin
     """
@@ -26,3 +35,80 @@ class MixedPermissionSerializer(MixedPermission, MixedSerializer):
     """ Permissions and serializer action`s mixin
     """
     pass
+
+
+class CachedResponse:
+    """ Cache GET list/retrieve responses until one of cache_models changes
+    """
+    cache_models = ()
+    cache_timeout = 60 * 60
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for model in cls.cache_models:
+            cache.watch_model(model)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        name = f'{self.__class__.__module__}.{self.__class__.__qualname__}'
+        key = cache.response_key(name, self.cache_models, request.build_absolute_uri())
+        data = cache.cache.get(key)
+        if data is not None:
+            cache.count(name, 'hit')
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.cache.set(key, response.data, self.cache_timeout)
+        cache.count(name, 'miss')
+        return response
+
+
+class CountedView:
+    """ Count retrieve views with ViewCounter instead of saving the object
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if ViewCounter.add(instance, ViewCounter.viewer(request)):
+            field = ViewCounter.fields[instance._meta.label_lower]
+            setattr(instance, field, getattr(instance, field) + 1)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+
+class KeysetPagination(CursorPagination):
+    """ Cursor pagination on a unique indexed column without OFFSET,
+    view can set keyset_ordering, total count only with ?count=true
+    """
+    ordering = '-id'
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    count_query_param = 'count'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'keyset_ordering', self.ordering)
+        return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer', 'nullable': True, 'example': 123}
+        return response_schema
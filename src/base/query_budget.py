@@ -0,0 +1,86 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger('query_budget')
+
+SERVICE_STATEMENTS = ('EXPLAIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем заявлено"""
+
+
+class QueryCounter:
+    """execute_wrapper, считает запросы и их время без служебных запросов silk и точек сохранения"""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if 'silk_' not in sql and not sql.startswith(SERVICE_STATEMENTS):
+                self.count += 1
+                self.time += time.perf_counter() - start
+
+
+def query_budget(budget: int):
+    """Бюджет запросов для функции-представления или действия viewset"""
+    def decorator(view):
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+def get_view_budget(view_func, method: str):
+    """Имя действия и его бюджет: у метода действия, затем query_budget класса (число или словарь)"""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return view_func.__qualname__, getattr(view_func, 'query_budget', None)
+    action = getattr(view_func, 'actions', {}).get(method.lower(), method.lower())
+    name = f'{view_class.__qualname__}.{action}'
+    budget = getattr(getattr(view_class, action, None), 'query_budget', None)
+    if budget is None:
+        budget = getattr(view_class, 'query_budget', None)
+        if isinstance(budget, dict):
+            budget = budget.get(action)
+    if budget is None:
+        budget = getattr(view_func, 'query_budget', None)
+    return name, budget
+
+
+def check_budget(name: str, budget, counter: QueryCounter):
+    logger.debug('%s: %s queries in %.1fms', name, counter.count, counter.time * 1000)
+    if budget is None or counter.count <= budget:
+        return
+    message = f'{name}: {counter.count} queries, budget {budget}'
+    if settings.QUERY_BUDGET_RAISE:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class QueryBudgetMiddleware:
+    """Счет запросов на каждое действие, сверка с заявленным query_budget"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        view = getattr(request, 'query_budget_view', None)
+        if view is not None:
+            if settings.DEBUG:
+                response['X-Query-Count'] = counter.count
+            check_budget(*view, counter)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget_view = get_view_budget(view_func, request.method)
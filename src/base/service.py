@@ -1,4 +1,14 @@
 import os
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed
 
 
 def delete_old_file(path_file):
@@ -7,7 +17,186 @@ def delete_old_file(path_file):
         os.remove(path_file)
 
 
-def post_view_count(instance):
-    instance.view_count += 1
-    instance.save()
-    return instance
+def full_text_supported() -> bool:
+    """Полнотекстовый поиск PostgreSQL доступен"""
+    return connection.vendor == 'postgresql'
+
+
+def found_ids(queryset, ids, field: str = 'pk') -> set:
+    """Значения ids (объекты или pk), для которых в queryset есть строка, одним IN запросом"""
+    wanted = {getattr(item, 'pk', item) for item in ids or ()}
+    if not wanted:
+        return set()
+    return set(queryset.filter(**{f'{field}__in': wanted}).values_list(field, flat=True)) & wanted
+
+
+def missing_ids(queryset, ids, field: str = 'pk') -> set:
+    """Значения ids, для которых в queryset нет строки"""
+    wanted = {getattr(item, 'pk', item) for item in ids or ()}
+    return wanted - found_ids(queryset, wanted, field)
+
+
+def ids_error(exception_class, ids):
+    """Исключение со всеми неподходящими id сразу, ответ остается вида {"detail": ...}"""
+    return exception_class(f"{exception_class.default_detail}: {', '.join(map(str, sorted(ids)))}")
+
+
+def check_ids(queryset, ids, exception_class, field: str = 'pk'):
+    """Все ids должны быть в queryset, иначе исключение с перечнем отсутствующих"""
+    missing = missing_ids(queryset, ids, field)
+    if missing:
+        raise ids_error(exception_class, missing)
+    return ids
+
+
+def sync_m2m(instance, field_name: str, targets, created: bool = False) -> tuple:
+    """Привести связь многие-ко-многим к набору targets (объекты или pk).
+
+    Текущие строки промежуточной таблицы читаются одним запросом (для только что
+    созданного объекта не читаются), недостающие добавляются одним bulk_create,
+    строки, которые успел добавить параллельный запрос, пропускаются, лишние удаляются одним DELETE
+    (у промежуточных моделей нет обработчиков удаления). m2m_changed отправляется как при add/remove.
+    Промежуточная модель не должна иметь обязательных полей кроме двух ключей.
+    Возвращает множества добавленных и удаленных pk.
+    """
+    field = instance._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = through._meta.get_field(field.m2m_field_name()).attname
+    target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+    wanted = {getattr(item, 'pk', item) for item in targets}
+    rows = through.objects.filter(**{source: instance.pk})
+    current = set() if created else set(rows.values_list(target, flat=True))
+    added, removed = wanted - current, current - wanted
+    signal = {
+        'sender': through, 'instance': instance, 'reverse': False,
+        'model': field.related_model, 'using': rows.db
+    }
+    with transaction.atomic(using=rows.db):
+        if removed:
+            m2m_changed.send(action='pre_remove', pk_set=removed, **signal)
+            rows.filter(**{f'{target}__in': removed}).delete()
+            m2m_changed.send(action='post_remove', pk_set=removed, **signal)
+        if added:
+            m2m_changed.send(action='pre_add', pk_set=added, **signal)
+            through.objects.bulk_create(
+                [through(**{source: instance.pk, target: pk}) for pk in added], ignore_conflicts=True
+            )
+            m2m_changed.send(action='post_add', pk_set=added, **signal)
+    return added, removed
+
+
+class ViewCounter:
+    """Счетчики просмотров: приросты копятся в кэше по интервалам,
+    задача flush_views переносит закрытые интервалы в базу через F().
+    Повторный просмотр того же пользователя в течение unique_window не считается.
+    Буфер работает только с общим для процессов кэшем (Redis, REDIS_CACHE_URL): задача flush_views
+    выполняется в воркере Celery и не видит кэш веб-процесса. С кэшем в памяти процесса
+    просмотры сразу пишутся в базу.
+    Анонимный зритель определяется по адресу из X-Forwarded-For, который добавил ближайший
+    из trusted_proxies доверенных прокси (nginx), адреса левее подделываются клиентом.
+    """
+    fields = {
+        'team.post': 'view_count',
+        'courses.course': 'view_count',
+        'courses.lesson': 'viewed',
+        'questions.question': 'viewed',
+        'knowledge.article': 'view_count',
+    }
+    flush_interval = 60
+    unique_window = 60 * 60
+    keep_buckets = 60
+    batch_size = 1000
+    lock_timeout = 60 * 5
+    trusted_proxies = 1
+
+    @staticmethod
+    def buffered() -> bool:
+        """Кэш общий для веб-процессов и воркера"""
+        return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+    @classmethod
+    def bucket(cls) -> int:
+        return int(time.time() // cls.flush_interval)
+
+    @classmethod
+    def key_timeout(cls) -> int:
+        return cls.flush_interval * cls.keep_buckets
+
+    @classmethod
+    def client_ip(cls, request) -> str:
+        """Адрес клиента за прокси, без прокси - REMOTE_ADDR"""
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if cls.trusted_proxies and len(forwarded) >= cls.trusted_proxies:
+            return forwarded[-cls.trusted_proxies]
+        return request.META.get('REMOTE_ADDR')
+
+    @classmethod
+    def viewer(cls, request) -> str:
+        if request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{cls.client_ip(request)}'
+
+    @classmethod
+    def add(cls, instance, viewer: str = None) -> bool:
+        """Учесть просмотр, False если просмотр повторный"""
+        label = instance._meta.label_lower
+        if viewer is not None and not cache.add(
+                f'views:seen:{label}:{instance.pk}:{viewer}', 1, cls.unique_window
+        ):
+            return False
+        if not cls.buffered():
+            field = cls.fields[label]
+            type(instance).objects.filter(pk=instance.pk).update(**{field: F(field) + 1})
+            return True
+        bucket = cls.bucket()
+        timeout = cls.key_timeout()
+        key = f'views:{label}:{bucket}:{instance.pk}'
+        if cache.add(key, 0, timeout):
+            sequence = f'views:seq:{label}:{bucket}'
+            cache.add(sequence, 0, timeout)
+            cache.set(f'views:slot:{label}:{bucket}:{cache.incr(sequence)}', instance.pk, timeout)
+        cache.incr(key)
+        return True
+
+    @classmethod
+    def flush(cls) -> int:
+        """Записать накопленные просмотры, возвращает число записанных просмотров.
+        Текущий и предыдущий интервалы не трогаются, в них еще могут идти записи.
+        """
+        if not cache.add('views:flush_lock', 1, cls.lock_timeout):
+            return 0
+        try:
+            total = 0
+            until = cls.bucket() - 1
+            for label, field in cls.fields.items():
+                marker = f'views:flushed:{label}'
+                last = cache.get(marker)
+                start = until - cls.keep_buckets if last is None else max(last + 1, until - cls.keep_buckets)
+                for bucket in range(start, until):
+                    total += cls._flush_bucket(apps.get_model(label), field, bucket)
+                cache.set(marker, until - 1, None)
+            return total
+        finally:
+            cache.delete('views:flush_lock')
+
+    @classmethod
+    def _flush_bucket(cls, model, field: str, bucket: int) -> int:
+        label = model._meta.label_lower
+        sequence = f'views:seq:{label}:{bucket}'
+        size = cache.get(sequence)
+        if not size:
+            return 0
+        slots = [f'views:slot:{label}:{bucket}:{number}' for number in range(1, size + 1)]
+        keys = {f'views:{label}:{bucket}:{pk}': pk for pk in cache.get_many(slots).values()}
+        by_count = defaultdict(list)
+        for key, count in cache.get_many(list(keys)).items():
+            if count:
+                by_count[count].append(keys[key])
+        with transaction.atomic():
+            for count, pks in by_count.items():
+                for start in range(0, len(pks), cls.batch_size):
+                    model.objects.filter(pk__in=pks[start:start + cls.batch_size]).update(
+                        **{field: F(field) + count}
+                    )
+        cache.delete_many([sequence, *slots, *keys])
+        return sum(count * len(pks) for count, pks in by_count.items())
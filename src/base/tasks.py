@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .service import ViewCounter
+
+
+@shared_task
+def flush_views():
+    """Перенос накопленных просмотров в базу"""
+    return ViewCounter.flush()
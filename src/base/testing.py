@@ -0,0 +1,102 @@
+import re
+import sys
+
+from django.conf import settings
+from django.core import serializers
+from django.core.cache import cache
+from django.db import connection
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.urls.resolvers import RoutePattern
+from rest_framework.authtoken.models import Token
+from rest_framework.views import APIView
+
+from .query_budget import QueryCounter, get_view_budget
+
+FIXTURE = settings.BASE_DIR / 'loaddata.json'
+PROJECT_DIR = str(settings.BASE_DIR / 'src')
+SKIPPED_APPS = ('auth', 'contenttypes', 'admin', 'sessions')
+
+
+def load_fixture(path=FIXTURE):
+    """Данные проекта из фикстуры, служебные таблицы Django пропускаются"""
+    with open(path) as fixture:
+        objects = list(serializers.deserialize('json', fixture.read(), ignorenonexistent=True))
+    for obj in objects:
+        if obj.object._meta.app_label not in SKIPPED_APPS:
+            obj.save()
+
+
+def _route(pattern, pk: int):
+    """Путь шаблона с подставленным pk, None если подставить нельзя"""
+    if isinstance(pattern, RoutePattern):
+        route = str(pattern)
+        if re.search(r'<(?!int:)[^>]+>', route):
+            return None
+        return re.sub(r'<int:\w+>', str(pk), route)
+    regex = pattern.regex.pattern
+    if 'format' in regex:
+        return None
+    return re.sub(r'\(\?P<\w+>[^)]*\)', str(pk), regex).strip('^$').replace('\\', '')
+
+
+def _project_view(view_func) -> bool:
+    """Представление DRF из приложений проекта без явного отказа от бюджета (query_budget = None)"""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None or not issubclass(view_class, APIView):
+        return False
+    if not getattr(sys.modules.get(view_class.__module__), '__file__', '').startswith(PROJECT_DIR):
+        return False
+    declared = any('query_budget' in vars(klass) for klass in view_class.__mro__)
+    return not declared or view_class.query_budget is not None
+
+
+def budget_urls(patterns=None, prefix='/', pk: int = 1):
+    """GET адреса всех представлений проекта: (путь, имя действия, бюджет или None, если не заявлен)"""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        route = _route(pattern.pattern, pk)
+        if route is None:
+            continue
+        if isinstance(pattern, URLResolver):
+            yield from budget_urls(pattern.url_patterns, prefix + route, pk)
+        elif isinstance(pattern, URLPattern):
+            actions = getattr(pattern.callback, 'actions', None)
+            if actions is not None and 'get' not in actions:
+                continue
+            if actions is None and not hasattr(getattr(pattern.callback, 'cls', None), 'get'):
+                continue
+            if _project_view(pattern.callback):
+                yield prefix + route, *get_view_budget(pattern.callback, 'GET')
+
+
+class QueryBudgetTestMixin:
+    """Обход всех адресов проекта на данных loaddata.json, адрес без бюджета - ошибка"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        load_fixture()
+
+    def assert_query_budgets(self, user=None, pk: int = 1):
+        """Запросы идут с настоящим токеном, поэтому поиск токена входит в счет, как у клиентов.
+        Проверяется только число запросов: ошибка представления дает ответ 500, но не прерывает обход.
+        Кэш очищается перед каждым адресом, бюджет считается для холодного кэша.
+        """
+        self.client.raise_request_exception = False
+        if user is not None:
+            token, _ = Token.objects.get_or_create(user=user)
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        failures = []
+        checked = 0
+        for url, name, budget in budget_urls(pk=pk):
+            checked += 1
+            if budget is None:
+                failures.append(f'{url} {name}: no query_budget')
+                continue
+            cache.clear()
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                self.client.get(url)
+            if counter.count > budget:
+                failures.append(f'{url} {name}: {counter.count} queries, budget {budget}')
+        self.assertTrue(checked)
+        self.assertFalse(failures, '\n'.join(failures))
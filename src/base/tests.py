@@ -0,0 +1,206 @@
+from unittest import mock
+
+from django.db import connection
+from django.db.models.signals import m2m_changed
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework.viewsets import ModelViewSet
+
+from src.cat.models import Cat, Category as ProductCategory, Phrase, Product
+from src.courses.models import HelpUser, Lesson, StudentWork, UserCourseThrough
+from src.dashboard.models import Board, Card, Column, Label
+from src.knowledge.models import Article, Category as ArticleCategory, Glossary, Tag as ArticleTag
+from src.profiles.models import FatUser, FatUserSocial, Questionnaire
+from src.questions.models import QuestionFollowers
+from src.questions.views import QuestionView
+from src.repository.models import Category, Project, ProjectMember, Toolkit
+from src.support.models import Category as ReportCategory, Report
+from src.team.models import Comment, Invitation, Post, SocialLink, Team, TeamMember
+from src.base import cache
+from src.base.query_budget import QueryBudgetExceeded, QueryCounter, query_budget
+from src.base.exceptions import TeamAuthor
+from src.base.service import ViewCounter, check_ids, sync_m2m
+from src.base.testing import QueryBudgetTestMixin, budget_urls
+
+
+class QueryBudgetTest(QueryBudgetTestMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        """Команды, проекты, доски и обращения с pk=1, в loaddata.json их нет"""
+        super().setUpTestData()
+        author, member, guest = FatUser.objects.order_by('pk')[:3]
+        team = Team.objects.create(pk=1, name='team', user=author)
+        TeamMember.objects.create(team=team, user=member)
+        other = Team.objects.create(name='other', user=member)
+        TeamMember.objects.create(team=other, user=author)
+        Invitation.objects.create(pk=1, team=other, user=author)
+        Invitation.objects.create(team=team, user=guest)
+        SocialLink.objects.create(pk=1, name='site', link='https://fatcode.ru', team=team)
+        post = Post.objects.create(pk=1, text='post', user=author, team=team)
+        comment = Comment.objects.create(pk=1, text='comment', user=member, post=post)
+        Comment.objects.create(text='reply', user=author, post=post, parent=comment)
+        project = Project.objects.create(
+            pk=1, name='project', description='description', user=author,
+            category=Category.objects.create(pk=1, name='category'), repository='repository'
+        )
+        project.toolkit.add(Toolkit.objects.create(pk=1, name='django'))
+        project.teams.add(team)
+        ProjectMember.objects.create(project=project, user=member)
+        board = Board.objects.create(pk=1, project=project, user=author, title='board')
+        label = Label.objects.create(pk=1, board=board, title='bug', color='red')
+        card = Card.objects.create(pk=1, column=Column.objects.create(pk=1, board=board, title='todo'), title='card')
+        card.labels.add(label)
+        card.members.add(member)
+        Report.objects.create(pk=1, category=ReportCategory.objects.create(pk=1, name='bug'), user=author, text='report')
+        questionnaire = Questionnaire.objects.create(pk=1, description='description', user=author)
+        questionnaire.projects.add(project)
+        questionnaire.toolkits.add(1)
+        FatUserSocial.objects.create(social_id=1, user=author, user_url='admin-social-python')
+        QuestionFollowers.objects.create(question_id=1, follower=author)
+        lesson = Lesson.objects.order_by('pk').first()
+        UserCourseThrough.objects.create(student=author, course=lesson.course)
+        StudentWork.objects.create(pk=1, lesson=lesson, student=author, code_answer='pass')
+        article = Article.objects.create(pk=1, title='article', text='text', author=author, published=True)
+        article.category.add(ArticleCategory.objects.create(pk=1, name='category'))
+        article.tag.add(ArticleTag.objects.create(name='django'))
+        article.glossary.add(Glossary.objects.create(letter='a'))
+        HelpUser.objects.create(lesson=lesson, mentor=author, student=member)
+        cat = Cat.objects.filter(user=author).first() or Cat.objects.create(user=author)
+        Phrase.objects.create(name='hello', text='hello', cat=cat)
+        Product.objects.create(
+            name='toy', price=1, category=ProductCategory.objects.create(name='toys'), genus='toy',
+            image='default/default.jpg', json={}
+        )
+
+    def test_query_budgets(self):
+        self.assert_query_budgets(FatUser.objects.get(pk=1))
+
+    def test_budget_urls(self):
+        urls = {url: budget for url, name, budget in budget_urls()}
+        self.assertEqual(urls['/api/v1/questions/'], 4)
+        self.assertEqual(urls['/api/v1/questions/1/'], 5)
+        self.assertEqual(urls['/api/v1/search/'], 3)
+        self.assertEqual(urls['/api/v1/team/1/post/1/comment/1'], 3)
+        self.assertNotIn('/api/v1/data/users/export/', urls)
+        self.assertNotIn('/api/v1/courses/check_work/', urls)
+        self.assertNotIn('/api/v1/swagger/', urls)
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_budget_exceeded(self):
+        with mock.patch.object(QuestionView, 'query_budget', {'list': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('questions'))
+
+    @override_settings(QUERY_BUDGET_RAISE=False)
+    def test_budget_exceeded_logged(self):
+        budgeted = query_budget(1)(lambda view, request, *args, **kwargs: ModelViewSet.list(view, request))
+        with mock.patch.object(QuestionView, 'list', budgeted):
+            with self.assertLogs('query_budget', 'WARNING') as logs:
+                response = self.client.get(reverse('questions'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('QuestionView.list', logs.output[0])
+
+
+class ViewerTest(APITestCase):
+    def viewer(self, **meta):
+        request = RequestFactory().get('/', **meta)
+        request.user = AnonymousUser()
+        return ViewCounter.viewer(request)
+
+    def test_anonymous_viewer_behind_proxy(self):
+        self.assertEqual(self.viewer(REMOTE_ADDR='10.0.0.2'), 'ip:10.0.0.2')
+        self.assertEqual(self.viewer(REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR='1.1.1.1'), 'ip:1.1.1.1')
+        self.assertEqual(
+            self.viewer(REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.1.1.1'), 'ip:1.1.1.1'
+        )
+
+
+class CacheInvalidationTest(APITestCase):
+    def test_watched_model_invalidated(self):
+        from src.knowledge.views import TagListView
+        self.assertIn(ArticleTag, TagListView.cache_models)
+        article = Article.objects.create(title='article')
+        tag = ArticleTag.objects.create(name='django')
+        versions = cache.get_versions([ArticleTag])
+        article.tag.add(tag)
+        self.assertNotEqual(cache.get_versions([ArticleTag]), versions)
+        versions = cache.get_versions([ArticleTag])
+        tag.delete()
+        self.assertNotEqual(cache.get_versions([ArticleTag]), versions)
+
+    def test_unwatched_model_not_tracked(self):
+        versions = cache.get_versions([Invitation])
+        Team.objects.create(name='team', user=FatUser.objects.create_user(username='u', password='p', email='u@m.ru'))
+        self.assertEqual(cache.get_versions([Invitation]), versions)
+        self.assertNotIn(Invitation, cache.watched_models)
+
+
+class SyncM2MTest(APITestCase):
+    def setUp(self):
+        self.user = FatUser.objects.create_user(username='author', password='pwpk3oJ*T7', email='a@mail.ru')
+        self.teams = [Team.objects.create(name=f'team{i}', user=self.user) for i in range(5)]
+        self.project = Project.objects.create(
+            name='project', description='description', user=self.user,
+            category=Category.objects.create(name='category'), repository='repository'
+        )
+
+    def test_sync_diff(self):
+        self.project.teams.set(self.teams[:3])
+        with CaptureQueriesContext(connection) as context:
+            added, removed = sync_m2m(self.project, 'teams', [self.teams[1], self.teams[2].pk, self.teams[4]])
+        through_queries = [
+            query['sql'].split()[0] for query in context.captured_queries
+            if query['sql'].startswith(('SELECT "repository_project_teams"', 'DELETE', 'INSERT'))
+        ]
+        self.assertEqual(through_queries, ['SELECT', 'DELETE', 'INSERT'])
+        self.assertEqual((added, removed), ({self.teams[4].pk}, {self.teams[0].pk}))
+        self.assertEqual(
+            set(self.project.teams.values_list('pk', flat=True)),
+            {self.teams[1].pk, self.teams[2].pk, self.teams[4].pk}
+        )
+
+    def test_sync_skips_existing_rows(self):
+        # строка, добавленная параллельным запросом после чтения текущего набора
+        self.project.teams.add(self.teams[0])
+        sync_m2m(self.project, 'teams', self.teams[:2], created=True)
+        self.assertEqual(
+            set(self.project.teams.values_list('pk', flat=True)), {self.teams[0].pk, self.teams[1].pk}
+        )
+
+    def test_sync_unchanged(self):
+        self.project.teams.set(self.teams)
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            self.assertEqual(sync_m2m(self.project, 'teams', self.teams), (set(), set()))
+        self.assertEqual(counter.count, 1)
+
+    def test_sync_sends_m2m_changed(self):
+        received = []
+
+        def receiver(sender, action, pk_set, **kwargs):
+            received.append((action, pk_set))
+
+        m2m_changed.connect(receiver, sender=Project.teams.through)
+        self.addCleanup(m2m_changed.disconnect, receiver, sender=Project.teams.through)
+        sync_m2m(self.project, 'teams', self.teams[:1], created=True)
+        self.assertEqual(received, [('pre_add', {self.teams[0].pk}), ('post_add', {self.teams[0].pk})])
+
+
+class CheckIdsTest(APITestCase):
+    def test_all_missing_reported_in_one_query(self):
+        author = FatUser.objects.create_user(username='author', password='pwpk3oJ*T7', email='a@mail.ru')
+        other = FatUser.objects.create_user(username='other', password='pwpk3oJ*T7', email='o@mail.ru')
+        own = [Team.objects.create(name=f'own{i}', user=author) for i in range(20)]
+        foreign = [Team.objects.create(name=f'foreign{i}', user=other) for i in range(2)]
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            self.assertEqual(check_ids(Team.objects.filter(user=author), own, TeamAuthor), own)
+            with self.assertRaises(TeamAuthor) as error:
+                check_ids(Team.objects.filter(user=author), own + foreign, TeamAuthor)
+        self.assertEqual(counter.count, 2)
+        self.assertEqual(
+            str(error.exception.detail), f'{TeamAuthor.default_detail}: {foreign[0].pk}, {foreign[1].pk}'
+        )
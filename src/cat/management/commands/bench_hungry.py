@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from src.cat.models import Cat
+from src.cat.services import CatService, bulk_hungry, cat_pk_ranges
+from src.profiles.models import FatUser
+
+
+class Command(BaseCommand):
+    help = 'Сравнение построчного и пакетного голода котов на синтетических данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100000)
+        parser.add_argument('--chunk-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        with transaction.atomic():
+            self._create_cats(count)
+            cats = Cat.objects.filter(user__username__startswith='bench_hungry_')
+
+            savepoint = transaction.savepoint()
+            start = time.perf_counter()
+            for cat in cats.filter(die=False):
+                CatService(cat).hungry()
+            loop_time = time.perf_counter() - start
+            loop_state = list(cats.order_by('pk').values_list('pk', 'hungry', 'hp', 'die'))
+            transaction.savepoint_rollback(savepoint)
+
+            start = time.perf_counter()
+            total = {'hungry': 0, 'damaged': 0, 'killed': 0}
+            for start_pk, end_pk in cat_pk_ranges(cats.filter(die=False), options['chunk_size']):
+                for key, value in bulk_hungry(start_pk, end_pk).items():
+                    total[key] += value
+            bulk_time = time.perf_counter() - start
+            bulk_state = list(cats.order_by('pk').values_list('pk', 'hungry', 'hp', 'die'))
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'cats: {count}')
+        self.stdout.write(f'per-row loop: {loop_time:.2f}s')
+        self.stdout.write(f'bulk update: {bulk_time:.2f}s ({loop_time / bulk_time:.1f}x)')
+        self.stdout.write(f'counts: {total}')
+        self.stdout.write(f'same result: {loop_state == bulk_state}')
+
+    def _create_cats(self, count):
+        users = FatUser.objects.bulk_create(
+            [FatUser(username=f'bench_hungry_{i}', email=None) for i in range(count)],
+            batch_size=5000
+        )
+        Cat.objects.bulk_create(
+            [
+                Cat(user=user, hungry=(i % 3) * 10, hp=(i % 2) * 10)
+                for i, user in enumerate(users)
+            ],
+            batch_size=5000
+        )
@@ -19,6 +19,11 @@ class Cat(models.Model):
     color = models.CharField(max_length=500, default='#000000')
     help_count = models.IntegerField(default=3)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-xp', '-level', 'id'], name='cat_top_idx'),
+        ]
+
     def __str__(self):
         return f"User id: {self.user_id}, Cat id: {self.id}"
 
@@ -77,6 +82,11 @@ class Item(models.Model):
     quantity = models.IntegerField()
     inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='item')
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['inventory', 'product'], name='unique_inventory_product'),
+        ]
+
     def __str__(self):
         return f"Product: {self.product.name}, inventory: {self.inventory.cat.id}"
 
@@ -57,7 +57,7 @@ class CreateItemSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         url_params = self.context.get('request').parser_context.get('kwargs')
-        inventory = models.Inventory.objects.get(id=url_params['pk'])
+        inventory = models.Inventory.objects.get(id=url_params['id'])
         service = CatService(inventory.cat)
         try:
             item = service.buy_item(validated_data['product'], abs(validated_data['quantity']))
@@ -66,6 +66,29 @@ class CreateItemSerializer(serializers.ModelSerializer):
         return item
 
 
+class BasketItemSerializer(serializers.Serializer):
+    """Продукт в корзине"""
+    product = serializers.PrimaryKeyRelatedField(queryset=models.Product.objects.all())
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class CreateBasketSerializer(serializers.Serializer):
+    """Покупка корзины продуктов"""
+    items = BasketItemSerializer(many=True, allow_empty=False, write_only=True)
+    item = InventoryItemSerializer(many=True, read_only=True)
+
+    def create(self, validated_data):
+        url_params = self.context.get('request').parser_context.get('kwargs')
+        inventory = models.Inventory.objects.select_related('cat__user').get(id=url_params['id'])
+        service = CatService(inventory.cat)
+        basket = [(item['product'], item['quantity']) for item in validated_data['items']]
+        try:
+            items = service.buy_items(basket)
+        except ValueError:
+            raise serializers.ValidationError('Недостаточно средств')
+        return {'item': items}
+
+
 class HintSerializer(serializers.ModelSerializer):
     """Подсказка"""
     hint = serializers.SerializerMethodField()
@@ -115,4 +138,12 @@ class CatSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = models.Cat
-        fields = ("id", "avatar", "name", "user_id", "username", "xp", "level")
\ No newline at end of file
+        fields = ("id", "avatar", "name", "user_id", "username", "xp", "level")
+
+
+class CatRankSerializer(serializers.Serializer):
+    """Место кота в топе"""
+    rank = serializers.IntegerField()
+    cat = CatSerializer()
+    above = CatSerializer(many=True)
+    below = CatSerializer(many=True)
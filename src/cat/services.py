@@ -1,3 +1,7 @@
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Min, Q
+
 from .models import Cat, Product, Item, Hint
 from .settings import CatSettings
 
@@ -38,16 +42,34 @@ class CatService:
         return self.cat.save()
 
     def buy_item(self, product: Product, quantity: int):
-        coin_manager = CoinService(self.cat.user)
-        if coin_manager.buy(product.price * abs(quantity)):
+        return self.buy_items([(product, quantity)])[0]
+
+    def buy_items(self, basket):
+        """Покупка корзины продуктов одним списанием монет"""
+        quantities = {}
+        products = {}
+        for product, quantity in basket:
+            products[product.id] = product
+            quantities[product.id] = quantities.get(product.id, 0) + abs(quantity)
+        price = sum(products[product_id].price * quantity for product_id, quantity in quantities.items())
+        with transaction.atomic():
+            CoinService(self.cat.user).buy(price)
             inventory = self.cat.inventory.first()
+            return [
+                self._add_item(inventory, products[product_id], quantity)
+                for product_id, quantity in quantities.items()
+            ]
+
+    @staticmethod
+    def _add_item(inventory, product: Product, quantity: int):
+        items = Item.objects.filter(product=product, inventory=inventory)
+        if not items.update(quantity=F('quantity') + quantity):
             try:
-                item = Item.objects.get(product=product, inventory=inventory)
-                item.quantity += abs(quantity)
-                item.save()
-            except Item.DoesNotExist:
-                item = Item.objects.create(product=product, inventory=inventory, quantity=abs(quantity))
-            return item
+                with transaction.atomic():
+                    return Item.objects.create(product=product, inventory=inventory, quantity=quantity)
+            except IntegrityError:
+                items.update(quantity=F('quantity') + quantity)
+        return items.get()
 
     def get_hint(self, lesson):
         hint, created = Hint.objects.get_or_create(lesson=lesson, cat=self.cat)
@@ -63,4 +85,106 @@ class CatService:
             item.delete()
         self.cat.hungry = 100
         self.cat.save()
-        return item.inventory
\ No newline at end of file
+        return item.inventory
+
+
+def cat_pk_ranges(queryset, chunk_size: int = CatSettings.hungry_chunk_size):
+    """Разбить котов на диапазоны первичных ключей [start, end) по chunk_size"""
+    bounds = queryset.aggregate(min_pk=Min('pk'), max_pk=Max('pk'))
+    if bounds['min_pk'] is None:
+        return
+    for start in range(bounds['min_pk'], bounds['max_pk'] + 1, chunk_size):
+        yield start, start + chunk_size
+
+
+def bulk_hungry(start_pk: int = None, end_pk: int = None, settings=CatSettings):
+    """Голод живых котов набором UPDATE без загрузки строк в Python.
+
+    Повторяет правила CatService.hungry: сытый кот худеет на every_day_hungry,
+    голодный теряет hungry_hp здоровья, голодный кот без здоровья умирает.
+    Запросы выполняются от смерти к голоду, чтобы кот за один проход
+    переходил не больше чем на один шаг, как и при построчной обработке.
+    """
+    queryset = Cat.objects.filter(die=False)
+    if start_pk is not None:
+        queryset = queryset.filter(pk__gte=start_pk)
+    if end_pk is not None:
+        queryset = queryset.filter(pk__lt=end_pk)
+
+    killed = queryset.filter(hungry=0, hp=0).update(die=True)
+    damaged = queryset.filter(hungry=0).exclude(hp=0).update(hp=F('hp') - settings.hungry_hp)
+    hungry = queryset.exclude(hungry=0).update(hungry=F('hungry') - settings.every_day_hungry)
+    return {'hungry': hungry, 'damaged': damaged, 'killed': killed}
+
+
+def reset_help_count(chunk_size: int = CatSettings.hint_chunk_size, start_after: int = 0, progress=None):
+    """Восстановление подсказок котов пачками по первичному ключу.
+
+    Обновляются только колонка help_count и только у котов, потративших подсказки.
+    start_after позволяет продолжить прерванный проход, progress вызывается
+    после каждой пачки с последним обработанным pk и числом обновленных котов.
+    """
+    last_pk = start_after
+    updated = 0
+    while True:
+        chunk = list(
+            Cat.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+        )
+        if not chunk:
+            return updated
+        updated += (
+            Cat.objects.filter(pk__gt=last_pk, pk__lte=chunk[-1])
+            .exclude(help_count=CatSettings.help_count)
+            .update(help_count=CatSettings.help_count)
+        )
+        last_pk = chunk[-1]
+        if progress is not None:
+            progress(last_pk, updated)
+
+
+class TopCatService:
+    """Рейтинг котов по опыту и уровню"""
+    settings = CatSettings
+    cache_key = 'cat:top'
+    ordering = ('-xp', '-level', 'id')
+
+    @classmethod
+    def get_top(cls):
+        """Топ котов, кэшируется до изменения рейтинга"""
+        cats = cache.get(cls.cache_key)
+        if cats is None:
+            cats = list(Cat.objects.order_by(*cls.ordering).select_related('user')[:cls.settings.top_size])
+            cache.set(cls.cache_key, cats, cls.settings.top_cache_timeout)
+        return cats
+
+    @classmethod
+    def invalidate(cls, cat: Cat):
+        """Сбросить топ, если изменение кота может его затронуть"""
+        cats = cache.get(cls.cache_key)
+        if cats is None:
+            return
+        in_top = any(top_cat.id == cat.id for top_cat in cats)
+        if in_top or len(cats) < cls.settings.top_size or (cat.xp, cat.level) >= (cats[-1].xp, cats[-1].level):
+            cache.delete(cls.cache_key)
+
+    @staticmethod
+    def _ahead(cat: Cat):
+        return (
+            Q(xp__gt=cat.xp)
+            | Q(xp=cat.xp, level__gt=cat.level)
+            | Q(xp=cat.xp, level=cat.level, id__lt=cat.id)
+        )
+
+    @classmethod
+    def get_rank(cls, cat: Cat):
+        """Место кота в рейтинге и соседи сверху и снизу"""
+        ahead = cls._ahead(cat)
+        queryset = Cat.objects.select_related('user')
+        above = queryset.filter(ahead).order_by('xp', 'level', '-id')[:cls.settings.top_neighbours]
+        below = queryset.exclude(ahead).exclude(id=cat.id).order_by(*cls.ordering)[:cls.settings.top_neighbours]
+        return {
+            'rank': Cat.objects.filter(ahead).count() + 1,
+            'cat': cat,
+            'above': list(reversed(above)),
+            'below': list(below),
+        }
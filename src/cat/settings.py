@@ -2,3 +2,9 @@ class CatSettings:
     every_day_hungry = 10
     hungry_hp = 10
     weight_loss = 10
+    hungry_chunk_size = 10000
+    help_count = 3
+    hint_chunk_size = 1000
+    top_size = 100
+    top_neighbours = 5
+    top_cache_timeout = 60 * 60
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from .models import Cat, Inventory
+from .services import TopCatService
 
 from src.profiles.models import FatUser
 
@@ -16,3 +17,9 @@ def create_cat(sender, instance, created, **kwargs):
 def create_inventory(sender, instance, created, **kwargs):
     if created:
         Inventory.objects.create(cat=instance)
+
+
+@receiver(post_save, sender=Cat)
+@receiver(post_delete, sender=Cat)
+def invalidate_top_cats(sender, instance, **kwargs):
+    TopCatService.invalidate(instance)
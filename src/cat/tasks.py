@@ -1,20 +1,48 @@
-from celery import shared_task
+from collections import Counter
+
+from celery import chord, shared_task
+from celery.utils.log import get_task_logger
 
 from .models import Cat
-from .services import CatService
+from .services import bulk_hungry, cat_pk_ranges, reset_help_count
+from .settings import CatSettings
+
+logger = get_task_logger(__name__)
 
 
 @shared_task
 def hungry_cat():
-    queryset = Cat.objects.filter(die=False)
-    for cat in queryset:
-        cat_service = CatService(cat)
-        cat_service.hungry()
+    """Раздать диапазоны pk живых котов воркерам, итоги суммирует hungry_cat_total.
+    Возвращает число диапазонов.
+    """
+    ranges = [
+        hungry_cat_range.s(start_pk, end_pk)
+        for start_pk, end_pk in cat_pk_ranges(Cat.objects.filter(die=False))
+    ]
+    if ranges:
+        chord(ranges)(hungry_cat_total.s())
+    return len(ranges)
+
+
+@shared_task
+def hungry_cat_range(start_pk: int, end_pk: int):
+    """Голод котов одного диапазона pk"""
+    return bulk_hungry(start_pk, end_pk)
 
 
 @shared_task
-def update_hint():
-    queryset = Cat.objects.all()
-    for cat in queryset:
-        cat.help_count = 3
-        cat.save()
+def hungry_cat_total(results):
+    """Сумма итогов всех диапазонов"""
+    total = Counter()
+    for result in results:
+        total.update(result)
+    logger.info('hungry_cat: %s', dict(total))
+    return dict(total)
+
+
+@shared_task
+def update_hint(chunk_size: int = CatSettings.hint_chunk_size, start_after: int = 0):
+    def progress(last_pk, updated):
+        logger.info('update_hint: last cat id %s, updated %s', last_pk, updated)
+
+    return reset_help_count(chunk_size, start_after, progress)
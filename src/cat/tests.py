@@ -1,8 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipIf
+
+from django.db import connection
+from django.test import TransactionTestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from src.profiles.models import FatUser
 from rest_framework.authtoken.models import Token
 
+from src.cat.models import Cat, Category, Item, Product
+from src.cat.services import CatService
+from src.cat.tasks import hungry_cat, hungry_cat_total, update_hint
+from fatcode.celery import app
+
 
 def create_user(email, name):
     return FatUser.objects.create_user(
@@ -41,3 +51,114 @@ class CatTestCase(APITestCase):
         cat = self.user.cat.first().id
         response = self.client.patch(reverse('cat_update', kwargs={'pk': cat}), data=data, format='json')
         self.assertEqual(response.status_code, 200)
+
+    def test_hungry_cat(self):
+        fed = self.user.cat.first()
+        starving = create_user('starving@mail.ru', 'starving').cat.first()
+        dying = create_user('dying@mail.ru', 'dying').cat.first()
+        Cat.objects.filter(id=starving.id).update(hungry=0, hp=50)
+        Cat.objects.filter(id=dying.id).update(hungry=0, hp=0)
+
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, 'task_always_eager', False)
+        with mock.patch('src.cat.tasks.hungry_cat_total.run', wraps=hungry_cat_total.run) as total:
+            self.assertEqual(hungry_cat(), 1)
+
+        self.assertEqual(total.call_args.args, ([{'hungry': 1, 'damaged': 1, 'killed': 1}],))
+        fed.refresh_from_db()
+        starving.refresh_from_db()
+        dying.refresh_from_db()
+        self.assertEqual((fed.hungry, fed.hp, fed.die), (90, 100, False))
+        self.assertEqual((starving.hungry, starving.hp, starving.die), (0, 40, False))
+        self.assertTrue(dying.die)
+
+    def test_hungry_cat_total(self):
+        results = [{'hungry': 2, 'damaged': 1, 'killed': 0}, {'hungry': 1, 'damaged': 0, 'killed': 3}]
+        self.assertEqual(hungry_cat_total(results), {'hungry': 3, 'damaged': 1, 'killed': 3})
+
+    def test_update_hint(self):
+        cats = [create_user(f'hint{i}@mail.ru', f'hint{i}').cat.first() for i in range(3)]
+        Cat.objects.filter(id__in=[cat.id for cat in cats[1:]]).update(help_count=0)
+
+        self.assertEqual(update_hint(chunk_size=1), 2)
+        self.assertFalse(Cat.objects.exclude(help_count=3).exists())
+
+    def test_cat_top(self):
+        leader = create_user('leader@mail.ru', 'leader').cat.first()
+        self.client.get(reverse('cat_top'))
+        leader.xp = 50
+        leader.save()
+
+        response = self.client.get(reverse('cat_top'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json().get("results")[0]["id"], leader.id)
+
+    def test_cat_top_me(self):
+        cat = self.user.cat.first()
+        leader = create_user('leader@mail.ru', 'leader').cat.first()
+        Cat.objects.filter(id=leader.id).update(xp=50)
+
+        response = self.client.get(reverse('cat_top_me'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["rank"], 2)
+        self.assertEqual(response.json()["cat"]["id"], cat.id)
+        self.assertEqual([above["id"] for above in response.json()["above"]], [leader.id])
+
+    def test_inventory_basket(self):
+        category = Category.objects.create(name='food')
+        fish = Product.objects.create(name='fish', price=10, category=category, genus='food', image='fish.png', json={})
+        milk = Product.objects.create(name='milk', price=5, category=category, genus='food', image='milk.png', json={})
+        FatUser.objects.filter(id=self.user.id).update(coins=100)
+        inventory = self.user.cat.first().inventory.first()
+        data = {"items": [
+            {"product": fish.id, "quantity": 2},
+            {"product": milk.id, "quantity": 1},
+            {"product": fish.id, "quantity": 1},
+        ]}
+
+        response = self.client.post(reverse('inventory_basket', kwargs={'id': inventory.id}), data=data, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Item.objects.get(inventory=inventory, product=fish).quantity, 3)
+        self.assertEqual(Item.objects.get(inventory=inventory, product=milk).quantity, 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.coins, 65)
+
+    def test_inventory_basket_not_enough_coins(self):
+        category = Category.objects.create(name='food')
+        fish = Product.objects.create(name='fish', price=10, category=category, genus='food', image='fish.png', json={})
+        inventory = self.user.cat.first().inventory.first()
+        data = {"items": [{"product": fish.id, "quantity": 2}]}
+
+        response = self.client.post(reverse('inventory_basket', kwargs={'id': inventory.id}), data=data, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Item.objects.filter(inventory=inventory).exists())
+
+
+@skipIf(connection.vendor == 'sqlite', 'SQLite locks the whole table for concurrent writers')
+class CatBuyConcurrencyTestCase(TransactionTestCase):
+
+    def test_parallel_buyers(self):
+        user = create_user('buyer@mail.ru', 'buyer')
+        FatUser.objects.filter(id=user.id).update(coins=51)
+        category = Category.objects.create(name='food')
+        fish = Product.objects.create(name='fish', price=10, category=category, genus='food', image='fish.png', json={})
+        cat_id = user.cat.first().id
+
+        def buy(_):
+            try:
+                CatService(Cat.objects.select_related('user').get(id=cat_id)).buy_item(fish, 1)
+                return True
+            except ValueError:
+                return False
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            bought = sum(executor.map(buy, range(10)))
+
+        user.refresh_from_db()
+        self.assertEqual(bought, 5)
+        self.assertEqual(user.coins, 1)
+        self.assertEqual(Item.objects.get(product=fish).quantity, 5)
@@ -6,11 +6,13 @@ urlpatterns = [
     path('get_hint/', views.HintView.as_view()),
     path('inventory/<int:id>/', views.InventoryView.as_view(
         {"post": "create", "get": "list", 'patch': 'update'}
-    )),
+    ), name='inventory'),
+    path('inventory/<int:id>/basket/', views.InventoryView.as_view({"post": "basket"}), name='inventory_basket'),
     path('phrases/', views.PhraseView.as_view()),
     path('', views.CatView.as_view({"get": "list"}), name="cat_list"),
     path('<int:pk>/', views.CatView.as_view({"get": "retrieve"}), name="cat_detail"),
     path('your/', views.CatUserView.as_view({"get": "list"}), name="user_cat"),
     path('your/<int:pk>/', views.CatUserView.as_view({"patch": "update"}), name="cat_update"),
-    path('top/', views.TopCatView.as_view()),
+    path('top/', views.TopCatView.as_view(), name='cat_top'),
+    path('top/me/', views.TopCatUserView.as_view(), name='cat_top_me'),
 ]
@@ -1,27 +1,33 @@
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Prefetch
-from rest_framework.generics import ListAPIView, CreateAPIView
+from django.http import Http404
+from rest_framework.generics import ListAPIView, CreateAPIView, RetrieveAPIView
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from rest_framework.permissions import IsAuthenticated
 
 from . import models
 from . import serializers
 from .permissions import IsInventoryCatUser
+from .services import TopCatService
 
-from ..base.classes import MixedSerializer
+from ..base.classes import MixedSerializer, CachedResponse
 
 
-class ProductView(ListAPIView):
+class ProductView(CachedResponse, ListAPIView):
+    query_budget = 3
     queryset = models.Product.objects.select_related('category').all()
     permission_classes = (IsAuthenticated, )
     serializer_class = serializers.ShopProductSerializer
+    cache_models = (models.Product, models.Category)
 
 
 class InventoryView(MixedSerializer, ModelViewSet):
     """CRU инвертаря"""
+    query_budget = {'list': 4}
     permission_classes = (IsInventoryCatUser, )
     serializer_classes_by_action = {
         'create': serializers.CreateItemSerializer,
+        'basket': serializers.CreateBasketSerializer,
         'list': serializers.CatInventorySerializer,
         'update': serializers.UpdateInventoryItemSerializer
     }
@@ -30,12 +36,15 @@ class InventoryView(MixedSerializer, ModelViewSet):
         item = models.Item.objects.select_related('product', 'inventory').all()
 
         return (
-            models.Inventory.objects.filter(pk=self.kwargs['pk'])
+            models.Inventory.objects.filter(pk=self.kwargs['id'])
             .select_related('cat')
             .prefetch_related(Prefetch('item', queryset=item))
             .all()
         )
 
+    def basket(self, request, *args, **kwargs):
+        return self.create(request, *args, **kwargs)
+
 
 class HintView(CreateAPIView):
     queryset = models.Hint.objects.select_related('lesson', 'cat').all()
@@ -45,6 +54,7 @@ class HintView(CreateAPIView):
 
 class PhraseView(ListAPIView):
     """Представление фраз кота"""
+    query_budget = 3
     queryset = models.Phrase.objects.select_related('cat').all()
     serializer_class = serializers.PhraseSerializer
     permission_classes = (IsAuthenticated, )
@@ -54,6 +64,7 @@ class PhraseView(ListAPIView):
 
 class CatView(ReadOnlyModelViewSet):
     """Представление кота"""
+    query_budget = {'list': 3, 'retrieve': 2}
     queryset = models.Cat.objects.select_related('user').all()
     serializer_class = serializers.CatSerializer
     permission_classes = (IsAuthenticated, )
@@ -61,6 +72,7 @@ class CatView(ReadOnlyModelViewSet):
 
 class CatUserView(ModelViewSet):
     """Кот пользователя"""
+    query_budget = {'list': 3}
     serializer_class = serializers.CatSerializer
     permission_classes = (IsAuthenticated, )
 
@@ -70,6 +82,22 @@ class CatUserView(ModelViewSet):
 
 class TopCatView(ListAPIView):
     """Представление топ котов"""
-    queryset = models.Cat.objects.order_by('-xp', '-level').select_related('user').all()[:100]
+    query_budget = 2
     serializer_class = serializers.CatSerializer
     permission_classes = (IsAuthenticated, )
+
+    def get_queryset(self):
+        return TopCatService.get_top()
+
+
+class TopCatUserView(RetrieveAPIView):
+    """Место кота пользователя в топе"""
+    query_budget = 5
+    serializer_class = serializers.CatRankSerializer
+    permission_classes = (IsAuthenticated, )
+
+    def get_object(self):
+        cat = models.Cat.objects.filter(user=self.request.user).select_related('user').first()
+        if cat is None:
+            raise Http404
+        return TopCatService.get_rank(cat)
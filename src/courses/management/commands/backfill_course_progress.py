@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from src.courses.services import CourseProgressService
+
+
+class Command(BaseCommand):
+    help = 'Пересчет прогресса студентов по курсам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        def progress(last_pk, updated):
+            self.stdout.write(f'До id {last_pk}: обновлено {updated}')
+
+        total = CourseProgressService.backfill(options['batch_size'], progress)
+        self.stdout.write(f'Обновлено записей прогресса: {total}')
@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from src.base.query_budget import QueryCounter
+from src.courses import serializers
+from src.courses.models import Category, CodeQuestion, Course, Lesson, Quiz, StudentWork
+from src.courses.views import CoursePlayerView
+from src.profiles.models import FatUser
+
+
+class Command(BaseCommand):
+    help = 'Задержка и число запросов плеера курса против уроков без предзагрузки'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lessons', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        with transaction.atomic():
+            user = FatUser.objects.create(username='bench_course_player', email=None)
+            course = Course.objects.create(
+                name='bench course player', description='bench', author=user,
+                category=Category.objects.create(name='bench')
+            )
+            lessons = Lesson.objects.bulk_create([
+                Lesson(
+                    lesson_type='python', name=f'bench {i}', slug=f'bench-course-player-{i}',
+                    description='bench', course=course, sorted=i
+                )
+                for i in range(options['lessons'])
+            ])
+            CodeQuestion.objects.bulk_create(
+                [CodeQuestion(code='code', answer='answer', lesson=lesson) for lesson in lessons]
+            )
+            Quiz.objects.bulk_create([Quiz(text='quiz', hint='hint', lesson=lesson) for lesson in lessons])
+            StudentWork.objects.bulk_create(
+                [StudentWork(lesson=lesson, student=user, code_answer='pass') for lesson in lessons[::2]]
+            )
+
+            def player():
+                request = factory.get(f'/api/v1/courses/{course.id}/player/')
+                force_authenticate(request, user)
+                return CoursePlayerView.as_view()(request, pk=course.id).render()
+
+            def naive():
+                request = factory.get('/')
+                request.user = user
+                lessons = Lesson.objects.filter(course=course)
+                return serializers.LessonDetailSerializer(lessons, many=True, context={'request': request}).data
+
+            results = {
+                'player': self._measure(options['repeat'], player),
+                'lessons without prefetch': self._measure(options['repeat'], naive),
+            }
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"lessons: {options['lessons']}")
+        for name, (elapsed, queries) in results.items():
+            self.stdout.write(f'{name}: {elapsed * 1000:.2f}ms, {queries} queries')
+
+    @staticmethod
+    def _measure(repeat, load):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            load()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            load()
+        return (time.perf_counter() - start) / repeat, counter.count
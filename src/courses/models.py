@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -92,6 +93,12 @@ class Lesson(models.Model):
     def __str__(self):
         return self.name
 
+    def test_content(self) -> str:
+        if not self.test:
+            return ''
+        with self.test.open('r') as lesson_test:
+            return lesson_test.read()
+
 
 class Quiz(models.Model):
     text = models.TextField()
@@ -101,6 +108,18 @@ class Quiz(models.Model):
 
 
 class StudentWork(models.Model):
+    PENDING = 'pending'
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS = (
+        (PENDING, 'Ожидает проверки'),
+        (QUEUED, 'Отправлено на проверку'),
+        (RUNNING, 'Проверяется'),
+        (DONE, 'Проверено'),
+        (FAILED, 'Ошибка проверки'),
+    )
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE)
     student = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -111,18 +130,22 @@ class StudentWork(models.Model):
     code_answer = models.TextField(null=True, blank=True)
     quiz_answer = models.ForeignKey(Quiz, on_delete=models.CASCADE, null=True, blank=True)
     error = models.TextField(null=True, blank=True)
+    # уже сохраненные работы проверены, в очередь попадают только отправленные через submit_work
+    status = models.CharField(max_length=20, choices=STATUS, default=DONE)
+    created = models.DateTimeField(default=timezone.now)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created'], name='student_work_queue_idx'),
+        ]
 
     def check_quiz(self):
         return self.quiz_answer.right
 
-    def create_testfile(self):
-        # TODO Да уж, жестко так путь хардклрить
-        path_file = f'/app/media/files/test/python/{self.lesson.course.name}.py'
-        with open(self.lesson.test.path, 'r') as lesson_test, open(path_file, 'w') as test:
-            test.write(f'{self.code_answer} \n')
-            for line in lesson_test:
-                test.write(line)
-        return path_file
+    def testfile_content(self) -> str:
+        """Ответ студента и тесты урока одним файлом"""
+        return f'{self.code_answer} \n' + self.lesson.test_content()
 
     def check_answer(self):
         student_answer = list(self.code_answer.replace(' ', ''))
@@ -138,14 +161,23 @@ class UserCourseThrough(models.Model):
     )
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='student')
     progress = models.IntegerField(default=0)
+    completed_lessons = models.IntegerField(default=0)
 
     def clean_progress(self):
         self.progress = 0
+        self.completed_lessons = 0
         return self.save()
 
     def update_progress(self):
-        completed_work = StudentWork.objects.filter(student=self.student, completed=True).count()
-        self.progress = int(completed_work / self.course.all_lessons().count() * 100)
+        """Пересчет прогресса по пройденным урокам этого курса"""
+        from .services import CourseProgressService
+
+        self.completed_lessons = StudentWork.objects.filter(
+            student_id=self.student_id, lesson__course_id=self.course_id, completed=True
+        ).values('lesson').distinct().count()
+        self.progress = CourseProgressService.percent(
+            self.completed_lessons, CourseProgressService.lessons_count(self.course_id)
+        )
         return self.save()
 
 
@@ -0,0 +1,129 @@
+import ctypes
+import hashlib
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .settings import CourseSettings
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+try:
+    libc = ctypes.CDLL(None, use_errno=True)
+except OSError:  # pragma: no cover - Windows
+    libc = None
+
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+
+
+def unshare(flags: int):
+    """Отделить процесс в новые пространства имен Linux, os.unshare появился только в Python 3.12"""
+    if libc is None or libc.unshare(flags) != 0:
+        error = ctypes.get_errno() if libc is not None else 0
+        raise OSError(error, f'unshare failed: {os.strerror(error)}')
+
+
+def normalize_code(code: str) -> str:
+    """Код без различий в переводах строк и пробелах в конце строк"""
+    lines = (code or '').replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).strip('\n')
+
+
+def result_key(work) -> str:
+    """Ключ результата проверки: хэш тестов урока и нормализованного кода"""
+    test_hash = hashlib.sha256(work.lesson.test_content().encode()).hexdigest()
+    code_hash = hashlib.sha256(normalize_code(work.code_answer).encode()).hexdigest()
+    return f'code_check:{work.lesson_id}:{test_hash}:{code_hash}'
+
+
+def get_result(work):
+    """Результат проверки такого же кода для этих тестов, None если проверки не было"""
+    return cache.get(result_key(work))
+
+
+def set_result(work, result: tuple):
+    cache.set(result_key(work), tuple(result), CourseSettings.result_cache_timeout)
+
+
+class LocalRunner:
+    """Проверка кода в отдельном процессе с ограничениями ресурсов, только Linux.
+    Каждая работа запускается во временной папке без доступа к сети, число одновременных процессов ограничено.
+    Под root процесс работает от пользователя sandbox_uid, иначе от пользователя сервера со всеми его правами
+    на файлы. Это не полноценная песочница: для кода посторонних пользователей CODE_RUNNER_BACKEND=local
+    небезопасен, нужен внешний сервис проверки.
+    """
+    slots = threading.BoundedSemaphore(CourseSettings.sandbox_workers)
+
+    def isolate(self):
+        """Выполняется в дочернем процессе перед запуском кода, ошибка прерывает запуск"""
+        if resource is not None:
+            cpu = CourseSettings.sandbox_cpu_time
+            memory = CourseSettings.sandbox_memory
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+            resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+            resource.setrlimit(resource.RLIMIT_FSIZE, (memory, memory))
+            resource.setrlimit(resource.RLIMIT_NOFILE, (64, 64))
+        if os.getuid() == 0:
+            unshare(CLONE_NEWNET)
+            os.setgroups([])
+            os.setgid(CourseSettings.sandbox_gid)
+            os.setuid(CourseSettings.sandbox_uid)
+        else:
+            unshare(CLONE_NEWUSER | CLONE_NEWNET)
+
+    def run(self, content: str) -> subprocess.CompletedProcess:
+        with self.slots, tempfile.TemporaryDirectory(prefix='student_work_') as workdir:
+            path = os.path.join(workdir, 'test_work.py')
+            with open(path, 'w') as testfile:
+                testfile.write(content)
+            if os.getuid() == 0:
+                os.chown(workdir, CourseSettings.sandbox_uid, CourseSettings.sandbox_gid)
+            args = [sys.executable, '-I', path]
+            with subprocess.Popen(
+                args,
+                cwd=workdir,
+                env={'PATH': os.environ.get('PATH', ''), 'HOME': workdir, 'PYTHONDONTWRITEBYTECODE': '1'},
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                start_new_session=True,
+                preexec_fn=self.isolate,
+            ) as process:
+                try:
+                    stdout, stderr = process.communicate(timeout=CourseSettings.check_timeout)
+                except subprocess.TimeoutExpired:
+                    # процессы, запущенные кодом, остаются в группе сессии и переживают kill одного родителя
+                    os.killpg(process.pid, signal.SIGKILL)
+                    process.wait()
+                    raise
+            return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+    def check(self, work) -> tuple:
+        """Результат проверки работы: (пройдены ли тесты, вывод тестов)"""
+        try:
+            process = self.run(work.testfile_content())
+        except subprocess.TimeoutExpired:
+            return False, 'Time limit exceeded'
+        if process.returncode == 0:
+            return True, None
+        output = (process.stderr or process.stdout)[-CourseSettings.sandbox_output_limit:]
+        return False, output or f'Process exited with code {process.returncode}'
+
+
+def get_runner():
+    """Способ проверки кода из настроек: local или внешний сервис"""
+    if settings.CODE_RUNNER_BACKEND == 'local':
+        return LocalRunner()
+    from .services import Service
+    return Service()
@@ -4,7 +4,8 @@ from src.profiles.serializers import GetUserSerializer
 
 from . import models
 from .validators import StudentWorkValidator
-from .services import Service
+from . import services
+from .settings import CourseSettings
 
 
 class CodeQuestionSerializer(serializers.ModelSerializer):
@@ -72,6 +73,17 @@ class LessonDetailSerializer(serializers.ModelSerializer):
         return serialize_work.data
 
 
+class PlayerLessonSerializer(LessonDetailSerializer):
+    """Урок в плеере курса, работа пользователя - последняя отправленная"""
+
+    class Meta(LessonDetailSerializer.Meta):
+        fields = LessonDetailSerializer.Meta.fields + ('hint', 'sorted')
+
+    def get_work(self, instance):
+        works = instance.user_works
+        return StudentWorkSerializer(works[-1] if works else None).data
+
+
 class LessonListSerializer(serializers.ModelSerializer):
     """Список уроков"""
 
@@ -116,6 +128,11 @@ class CourseSerializer(serializers.ModelSerializer):
         )
 
 
+class CoursePlayerSerializer(CourseSerializer):
+    """Курс со всеми уроками и работами текущего пользователя"""
+    lessons = PlayerLessonSerializer(many=True)
+
+
 class ListCourseSerializer(serializers.ModelSerializer):
     """Список курсов"""
     author = GetUserSerializer()
@@ -141,24 +158,29 @@ class ListCourseSerializer(serializers.ModelSerializer):
 class StudentWorkSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.StudentWork
-        fields = ('lesson', 'code_answer', 'quiz_answer', 'completed', 'error')
+        fields = ('id', 'lesson', 'code_answer', 'quiz_answer', 'status', 'completed', 'error')
+        read_only_fields = ('status', 'completed', 'error')
 
     def validate(self, data):
         validate_class = StudentWorkValidator()
         validate_class(data)
+        if services.active_works_count(self.context['request'].user.id) >= CourseSettings.check_max_active:
+            raise serializers.ValidationError({'error': 'Дождитесь проверки отправленных работ'})
         return data
 
     def create(self, validated_data):
-        work = models.StudentWork.objects.create(**validated_data, student=self.context['request'].user)
-        file = work.create_testfile()
-        service = Service()
-        service.request(file, validated_data['lesson'].course.name)
-        if service.status_code == 200:
-            if 'test_django exited with code 0' in service.content['result']['stdout']:
-                work.completed = True
-                return work
-            work.error = service.content['result']['stdout']
-        return work
+        work = models.StudentWork.objects.create(
+            **validated_data, student=self.context['request'].user, status=models.StudentWork.PENDING
+        )
+        return services.submit_work(work)
+
+
+class StudentWorkStatusSerializer(serializers.ModelSerializer):
+    """Статус проверки работы"""
+
+    class Meta:
+        model = models.StudentWork
+        fields = ('id', 'lesson', 'status', 'completed', 'error', 'updated')
 
 
 class HelpUserSerializer(serializers.ModelSerializer):
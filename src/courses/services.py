@@ -1,29 +1,304 @@
+import logging
 import os
-import requests
-import json
+from datetime import timedelta
 
-from rest_framework import serializers
-from github import Github
+import requests
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Prefetch
+from django.utils import timezone
+from github import Github
+
+from src.profiles.models import FatUser
+
+from . import models, runner
+from .settings import CourseSettings
+
+logger = logging.getLogger(__name__)
 
 
 class Service:
-    def request(self, file, course_name):
+    """Клиент сервиса проверки кода"""
+    passed_marker = 'test_django exited with code 0'
+
+    def request(self, content: str, course_name: str):
         headers = {'Authorization': f"Bearer {os.environ.get('FASTAPI_TOKEN')}"}
-        try:
-            request = requests.post(
-                f'http://fast-test_api_1:8008/api/python/test/{course_name}/',
-                headers=headers,
-                files={
-                    'file': open(file, 'rb')
-                }, timeout=120
-            )
-            self.status_code = request.status_code
-            self.content = json.loads(request.content)
-        except requests.exceptions.ConnectionError:
-            raise serializers.ValidationError('server not response')
+        request = requests.post(
+            f"{settings.CODE_RUNNER_URL.rstrip('/')}/api/python/test/{course_name}/",
+            headers=headers,
+            files={'file': (f'{course_name}.py', content.encode())},
+            timeout=CourseSettings.check_timeout
+        )
+        self.status_code = request.status_code
+        self.content = request.json()
         return request
 
+    def check(self, work) -> tuple:
+        """Результат проверки работы: (пройдены ли тесты, вывод тестов)"""
+        self.request(work.testfile_content(), work.lesson.course.name).raise_for_status()
+        stdout = self.content['result']['stdout']
+        if self.passed_marker in stdout:
+            return True, None
+        return False, stdout
+
+
+def player_queryset(user):
+    """Курсы с уроками, вопросами, квизами и работами пользователя, загрузка за фиксированное число запросов"""
+    works = models.StudentWork.objects.filter(student=user).order_by('id')
+    lessons = (
+        models.Lesson.objects.order_by('sorted', 'id')
+        .prefetch_related('code', 'quiz', Prefetch('studentwork_set', queryset=works, to_attr='user_works'))
+    )
+    return (
+        models.Course.objects
+        .select_related('author', 'category', 'mentor')
+        .prefetch_related('tags', Prefetch('lessons', queryset=lessons))
+    )
+
+
+def submit_work(work):
+    """Квиз и уже проверенный код проверяются сразу, остальной код ставится в очередь после коммита"""
+    if work.quiz_answer_id is not None:
+        return save_result(work, work.check_quiz(), None, models.StudentWork.DONE)
+    result = runner.get_result(work)
+    if result is not None:
+        return save_result(work, *result, models.StudentWork.DONE)
+    transaction.on_commit(lambda: enqueue_next(work.student_id))
+    return work
+
+
+def active_works_count(student_id) -> int:
+    return models.StudentWork.objects.filter(
+        student_id=student_id,
+        status__in=(models.StudentWork.PENDING, models.StudentWork.QUEUED, models.StudentWork.RUNNING)
+    ).count()
+
+
+def enqueue_next(student_id):
+    """Отправить на проверку самую старую ожидающую работу студента.
+    У студента проверяется не больше одной работы, поэтому один студент не займет всю очередь.
+    """
+    from .tasks import check_student_work
+
+    with transaction.atomic():
+        FatUser.objects.select_for_update().filter(pk=student_id).first()
+        works = models.StudentWork.objects.filter(student_id=student_id)
+        if works.filter(status__in=(models.StudentWork.QUEUED, models.StudentWork.RUNNING)).exists():
+            return None
+        work_id = (
+            works.filter(status=models.StudentWork.PENDING)
+            .order_by('created', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if work_id is None:
+            return None
+        works.filter(pk=work_id).update(status=models.StudentWork.QUEUED, updated=timezone.now())
+        transaction.on_commit(lambda: check_student_work.delay(work_id))
+    return work_id
+
+
+def save_result(work, completed, error, status):
+    """Сохранить результат проверки и учесть урок в прогрессе курса при первом прохождении"""
+    with transaction.atomic():
+        first = completed and CourseProgressService.is_first_completion(work)
+        work.completed, work.error, work.status = completed, error, status
+        work.save(update_fields=['completed', 'error', 'status', 'updated'])
+        if first:
+            CourseProgressService.lesson_completed(work)
+    return work
+
+
+def check_work(work) -> tuple:
+    """Проверка работы, результат для такого же кода и тестов берется из кэша"""
+    result = runner.get_result(work)
+    if result is None:
+        result = runner.get_runner().check(work)
+        runner.set_result(work, result)
+    return result
+
+
+def run_check(work_id):
+    """Проверить работу, отправленную в очередь, и поставить следующую работу студента.
+    Любая ошибка проверки завершает работу со статусом FAILED, очередь студента не останавливается.
+    """
+    works = models.StudentWork.objects.filter(pk=work_id)
+    if not works.filter(status=models.StudentWork.QUEUED).update(
+            status=models.StudentWork.RUNNING, updated=timezone.now()
+    ):
+        return None
+    work = works.select_related('lesson__course').get()
+    try:
+        completed, error = check_work(work)
+        status = models.StudentWork.DONE
+    except (requests.RequestException, OSError, ValueError, KeyError):
+        completed, error, status = False, 'server not response', models.StudentWork.FAILED
+    except Exception:
+        logger.exception('Student work %s check failed', work.pk)
+        completed, error, status = False, 'check failed', models.StudentWork.FAILED
+    try:
+        save_result(work, completed, error, status)
+    finally:
+        enqueue_next(work.student_id)
+    return status
+
+
+def dispatch_pending():
+    """Вернуть в очередь зависшие работы и отправить ожидающие, возвращает число отправленных"""
+    models.StudentWork.objects.filter(
+        status__in=(models.StudentWork.QUEUED, models.StudentWork.RUNNING),
+        updated__lt=timezone.now() - timedelta(seconds=CourseSettings.check_stale_timeout)
+    ).update(status=models.StudentWork.PENDING, updated=timezone.now())
+    students = list(
+        models.StudentWork.objects.filter(status=models.StudentWork.PENDING)
+        .values_list('student_id', flat=True)
+        .distinct()
+    )
+    return sum(enqueue_next(student_id) is not None for student_id in students)
+
+
+class CourseProgressService:
+    """Прогресс студентов по курсам.
+    Число пройденных уроков хранится в UserCourseThrough и увеличивается при первом
+    прохождении урока, число уроков курса кэшируется.
+    """
+    settings = CourseSettings
+
+    @staticmethod
+    def lessons_count_key(course_id) -> str:
+        return f'course:{course_id}:lessons_count'
+
+    @classmethod
+    def lessons_count(cls, course_id) -> int:
+        key = cls.lessons_count_key(course_id)
+        count = cache.get(key)
+        if count is None:
+            count = models.Lesson.objects.filter(course_id=course_id).count()
+            cache.set(key, count, cls.settings.lessons_count_timeout)
+        return count
+
+    @classmethod
+    def reset_lessons_count(cls, course_id):
+        cache.delete(cls.lessons_count_key(course_id))
+
+    @staticmethod
+    def percent(completed: int, total: int) -> int:
+        return min(completed * 100 // total, 100) if total else 0
+
+    @staticmethod
+    def is_first_completion(work) -> bool:
+        """Урок еще не пройден студентом. Строка прогресса блокируется до конца транзакции,
+        поэтому параллельные проверки одного урока не учтут его дважды.
+        """
+        locked = models.UserCourseThrough.objects.select_for_update().filter(
+            student_id=work.student_id, course_id=work.lesson.course_id
+        ).values_list('pk', flat=True).first()
+        return locked is not None and not models.StudentWork.objects.filter(
+            student_id=work.student_id, lesson_id=work.lesson_id, completed=True
+        ).exclude(pk=work.pk).exists()
+
+    @classmethod
+    def lesson_completed(cls, work):
+        through = models.UserCourseThrough.objects.get(
+            student_id=work.student_id, course_id=work.lesson.course_id
+        )
+        through.completed_lessons += 1
+        through.progress = cls.percent(through.completed_lessons, cls.lessons_count(through.course_id))
+        through.save(update_fields=['completed_lessons', 'progress'])
+        return through
+
+    @staticmethod
+    def completion(student_id, course_id) -> list:
+        """Уроки курса по порядку и пройдены ли они студентом, одним запросом"""
+        completed = models.StudentWork.objects.filter(
+            student_id=student_id, lesson_id=OuterRef('pk'), completed=True
+        )
+        return list(
+            models.Lesson.objects.filter(course_id=course_id)
+            .annotate(completed=Exists(completed))
+            .order_by('sorted', 'id')
+            .values_list('id', 'completed')
+        )
+
+    @classmethod
+    def bitmap(cls, student_id, course_id, completion: list = None) -> str:
+        """Пройденные уроки строкой из 0 и 1 в порядке уроков курса, completion если уже загружен"""
+        if completion is None:
+            completion = cls.completion(student_id, course_id)
+        return ''.join('1' if completed else '0' for _, completed in completion)
+
+    @classmethod
+    def recount_course(cls, course_id) -> int:
+        """Пересчет пройденных уроков и прогресса студентов курса после удаления урока.
+        Возвращает число обновленных записей прогресса.
+        """
+        total = cls.lessons_count(course_id)
+        completed = dict(
+            models.StudentWork.objects.filter(lesson__course_id=course_id, completed=True)
+            .values('student_id')
+            .annotate(total=Count('lesson', distinct=True))
+            .order_by()
+            .values_list('student_id', 'total')
+        )
+        changed = []
+        throughs = models.UserCourseThrough.objects.filter(course_id=course_id).only(
+            'id', 'student_id', 'completed_lessons', 'progress'
+        )
+        for through in throughs:
+            completed_lessons = completed.get(through.student_id, 0)
+            percent = cls.percent(completed_lessons, total)
+            if (through.completed_lessons, through.progress) != (completed_lessons, percent):
+                through.completed_lessons, through.progress = completed_lessons, percent
+                changed.append(through)
+        models.UserCourseThrough.objects.bulk_update(
+            changed, ['completed_lessons', 'progress'], batch_size=cls.settings.progress_batch_size
+        )
+        return len(changed)
+
+    @classmethod
+    def backfill(cls, batch_size: int = None, progress=None) -> int:
+        """Пересчет прогресса всех студентов пачками по первичному ключу.
+        Пройденные уроки и число уроков считаются агрегатами по всей таблице,
+        пачки сохраняются через bulk_update только для изменившихся строк.
+        """
+        batch_size = batch_size or cls.settings.progress_batch_size
+        lessons = dict(
+            models.Course.objects.annotate(total=Count('lessons')).values_list('id', 'total')
+        )
+        completed = {
+            (row['student_id'], row['lesson__course_id']): row['total']
+            for row in models.StudentWork.objects.filter(completed=True)
+            .values('student_id', 'lesson__course_id')
+            .annotate(total=Count('lesson', distinct=True))
+            .order_by()
+        }
+        for course_id, total in lessons.items():
+            cache.set(cls.lessons_count_key(course_id), total, cls.settings.lessons_count_timeout)
+
+        last_pk = 0
+        updated = 0
+        while True:
+            chunk = list(
+                models.UserCourseThrough.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .only('id', 'student_id', 'course_id', 'completed_lessons', 'progress')[:batch_size]
+            )
+            if not chunk:
+                return updated
+            changed = []
+            for through in chunk:
+                completed_lessons = completed.get((through.student_id, through.course_id), 0)
+                percent = cls.percent(completed_lessons, lessons.get(through.course_id, 0))
+                if (through.completed_lessons, through.progress) != (completed_lessons, percent):
+                    through.completed_lessons, through.progress = completed_lessons, percent
+                    changed.append(through)
+            models.UserCourseThrough.objects.bulk_update(changed, ['completed_lessons', 'progress'])
+            updated += len(changed)
+            last_pk = chunk[-1].pk
+            if progress is not None:
+                progress(last_pk, updated)
+
 
 class GitService(object):
     def __init__(self):
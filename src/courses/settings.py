@@ -0,0 +1,15 @@
+class CourseSettings:
+    check_queue = 'code_check'
+    check_timeout = 120
+    check_max_active = 5
+    check_stale_timeout = 60 * 10
+    check_retry_after = 3
+    lessons_count_timeout = 60 * 60
+    progress_batch_size = 1000
+    result_cache_timeout = 60 * 60 * 24 * 7
+    sandbox_workers = 2
+    sandbox_cpu_time = 10
+    sandbox_memory = 256 * 1024 * 1024
+    sandbox_output_limit = 10000
+    sandbox_uid = 65534
+    sandbox_gid = 65534
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Lesson
+from .services import CourseProgressService
+
+
+@receiver(post_save, sender=Lesson)
+def reset_lessons_count(sender, instance, **kwargs):
+    CourseProgressService.reset_lessons_count(instance.course_id)
+
+
+@receiver(post_delete, sender=Lesson)
+def recount_progress(sender, instance, **kwargs):
+    """Работы удаленного урока удалены вместе с ним, пройденные уроки студентов считаются заново"""
+    CourseProgressService.reset_lessons_count(instance.course_id)
+    CourseProgressService.recount_course(instance.course_id)
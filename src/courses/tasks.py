@@ -0,0 +1,16 @@
+from celery import shared_task
+
+from . import services
+from .settings import CourseSettings
+
+
+@shared_task(queue=CourseSettings.check_queue, acks_late=True)
+def check_student_work(work_id):
+    """Проверка кода студента сервисом проверки"""
+    return services.run_check(work_id)
+
+
+@shared_task
+def dispatch_student_works():
+    """Отправка ожидающих и зависших работ на проверку"""
+    return services.dispatch_pending()
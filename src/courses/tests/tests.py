@@ -1,10 +1,29 @@
+import json
+import os
+import stat
+import sys
+import tempfile
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
 
-from src.courses.models import Lesson, Course, Category, Tag
+from src.base.query_budget import QueryCounter
+from src.courses.models import Lesson, Course, Category, Tag, StudentWork, Quiz, UserCourseThrough, CodeQuestion
+from src.courses.services import CourseProgressService
+from src.courses.settings import CourseSettings
+from src.courses.tasks import check_student_work, dispatch_student_works
 from src.profiles.models import FatUser
 from src.courses import serializers
 
@@ -89,3 +108,378 @@ class TestCoursesAPI(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]["name"], "Django")
+
+
+class CodeRunnerStubHandler(BaseHTTPRequestHandler):
+    """Заглушка сервиса проверки кода: тесты проходят, если в ответе есть pass"""
+    requests = []
+    status = 200
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.requests.append(self.path)
+        passed = b'pass' in body
+        stdout = 'test_django exited with code 0' if passed else 'AssertionError'
+        self.send_response(self.status)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps({'result': {'stdout': stdout}}).encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+def sandbox_can_run() -> bool:
+    """Под root код запускается от sandbox_uid, ему нужен доступ к интерпретатору по всему пути"""
+    if os.getuid() != 0:
+        return True
+    path = os.path.realpath(sys.executable)
+    parents = [path]
+    while parents[-1] != os.path.dirname(parents[-1]):
+        parents.append(os.path.dirname(parents[-1]))
+    return all(os.stat(parent).st_mode & stat.S_IXOTH for parent in parents)
+
+
+local_runner = skipUnless(sandbox_can_run(), 'интерпретатор недоступен пользователю песочницы')
+
+
+class StudentWorkCheckTest(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), CodeRunnerStubHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.settings = override_settings(CODE_RUNNER_URL=f'http://127.0.0.1:{cls.server.server_port}')
+        cls.settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        CodeRunnerStubHandler.requests.clear()
+        CodeRunnerStubHandler.status = 200
+        self.user = FatUser.objects.create_user(username='student', password='pwpk3oJ*T7', email='s@mail.ru')
+        self.other = FatUser.objects.create_user(username='other', password='pwpk3oJ*T7', email='o@mail.ru')
+        course = Course.objects.create(
+            name='blog', description='description', slug='blog', author=self.user,
+            category=Category.objects.create(name='category')
+        )
+        self.lesson = Lesson.objects.create(
+            lesson_type='python', name='lesson', slug='lesson', description='description', course=course
+        )
+
+    def submit(self, user, code):
+        self.client.force_authenticate(user)
+        with mock.patch('src.courses.tasks.check_student_work.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('check-work'), {'lesson': self.lesson.id, 'code_answer': code})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id'], [call.args[0] for call in delay.call_args_list]
+
+    def test_submit_is_pending(self):
+        work_id, queued = self.submit(self.user, 'pass')
+        self.assertEqual(queued, [work_id])
+        self.assertEqual(CodeRunnerStubHandler.requests, [])
+        response = self.client.get(reverse('check-work-status', kwargs={'pk': work_id}))
+        self.assertEqual(response.data['status'], StudentWork.QUEUED)
+        self.assertEqual(response['Retry-After'], '3')
+
+        with mock.patch('src.courses.tasks.check_student_work.delay'):
+            self.assertEqual(check_student_work(work_id), StudentWork.DONE)
+        response = self.client.get(reverse('check-work-status', kwargs={'pk': work_id}))
+        self.assertEqual(response.data['status'], StudentWork.DONE)
+        self.assertTrue(response.data['completed'])
+        self.assertFalse(response.has_header('Retry-After'))
+        self.assertEqual(CodeRunnerStubHandler.requests, ['/api/python/test/blog/'])
+
+    def test_failed_tests_saved(self):
+        work_id, queued = self.submit(self.user, 'print(1)')
+        check_student_work(work_id)
+        work = StudentWork.objects.get(pk=work_id)
+        self.assertFalse(work.completed)
+        self.assertEqual(work.error, 'AssertionError')
+
+    def test_runner_error(self):
+        work_id, queued = self.submit(self.user, 'pass')
+        CodeRunnerStubHandler.status = 500
+        self.assertEqual(check_student_work(work_id), StudentWork.FAILED)
+        self.assertEqual(StudentWork.objects.get(pk=work_id).error, 'server not response')
+
+    def test_unexpected_error_failed(self):
+        first, queued = self.submit(self.user, 'pass')
+        second, queued = self.submit(self.user, 'pass')
+        with mock.patch('src.courses.services.check_work', side_effect=RuntimeError), \
+                mock.patch('src.courses.tasks.check_student_work.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True), self.assertLogs('src.courses.services', 'ERROR'):
+                self.assertEqual(check_student_work(first), StudentWork.FAILED)
+        self.assertEqual(StudentWork.objects.get(pk=first).status, StudentWork.FAILED)
+        delay.assert_called_once_with(second)
+
+    def test_one_check_per_student(self):
+        first, queued = self.submit(self.user, 'pass')
+        second, queued_second = self.submit(self.user, 'pass')
+        other, queued_other = self.submit(self.other, 'pass')
+        self.assertEqual(queued_second, [])
+        self.assertEqual(queued_other, [other])
+        self.assertEqual(StudentWork.objects.get(pk=second).status, StudentWork.PENDING)
+
+        with mock.patch('src.courses.tasks.check_student_work.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                check_student_work(first)
+        delay.assert_called_once_with(second)
+        self.assertIsNone(check_student_work(first))
+
+    def test_active_works_limit(self):
+        for _ in range(CourseSettings.check_max_active):
+            self.submit(self.user, 'pass')
+        response = self.client.post(reverse('check-work'), {'lesson': self.lesson.id, 'code_answer': 'pass'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_status_only_own(self):
+        work_id, queued = self.submit(self.user, 'pass')
+        self.client.force_authenticate(self.other)
+        response = self.client.get(reverse('check-work-status', kwargs={'pk': work_id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_dispatch_stale(self):
+        work_id, queued = self.submit(self.user, 'pass')
+        StudentWork.objects.filter(pk=work_id).update(updated=timezone.now() - timedelta(hours=1))
+        with mock.patch('src.courses.tasks.check_student_work.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(dispatch_student_works(), 1)
+        delay.assert_called_once_with(work_id)
+
+    def test_existing_works_not_dispatched(self):
+        work = StudentWork.objects.create(lesson=self.lesson, student=self.user, completed=True)
+        self.assertEqual(work.status, StudentWork.DONE)
+        with mock.patch('src.courses.tasks.check_student_work.delay') as delay:
+            self.assertEqual(dispatch_student_works(), 0)
+        delay.assert_not_called()
+
+    def test_duplicate_submission_cached(self):
+        work_id, queued = self.submit(self.user, 'pass')
+        check_student_work(work_id)
+        duplicate, queued = self.submit(self.other, 'pass  \r\n\n')
+        self.assertEqual(queued, [])
+        work = StudentWork.objects.get(pk=duplicate)
+        self.assertEqual(work.status, StudentWork.DONE)
+        self.assertTrue(work.completed)
+        self.assertEqual(len(CodeRunnerStubHandler.requests), 1)
+
+    def test_runner_error_not_cached(self):
+        work_id, queued = self.submit(self.user, 'pass')
+        CodeRunnerStubHandler.status = 500
+        check_student_work(work_id)
+        CodeRunnerStubHandler.status = 200
+        retry, queued = self.submit(self.other, 'pass')
+        self.assertEqual(queued, [retry])
+
+    @local_runner
+    @override_settings(CODE_RUNNER_BACKEND='local')
+    def test_local_runner(self):
+        passed, queued = self.submit(self.user, 'assert 1 + 1 == 2')
+        failed, queued = self.submit(self.other, 'assert 1 + 1 == 3')
+        self.assertEqual(check_student_work(passed), StudentWork.DONE)
+        self.assertEqual(check_student_work(failed), StudentWork.DONE)
+        self.assertTrue(StudentWork.objects.get(pk=passed).completed)
+        work = StudentWork.objects.get(pk=failed)
+        self.assertFalse(work.completed)
+        self.assertIn('AssertionError', work.error)
+        self.assertEqual(CodeRunnerStubHandler.requests, [])
+
+    @local_runner
+    @override_settings(CODE_RUNNER_BACKEND='local')
+    def test_local_runner_timeout(self):
+        work_id, queued = self.submit(self.user, 'while True: pass')
+        with mock.patch.object(CourseSettings, 'check_timeout', 1):
+            check_student_work(work_id)
+        work = StudentWork.objects.get(pk=work_id)
+        self.assertFalse(work.completed)
+        self.assertEqual(work.error, 'Time limit exceeded')
+
+    @local_runner
+    @override_settings(CODE_RUNNER_BACKEND='local')
+    def test_local_runner_isolated(self):
+        code = (
+            'import os, socket\n'
+            'assert os.getuid() != 0\n'
+            f'socket.create_connection(("127.0.0.1", {self.server.server_port}), 1)'
+        )
+        work_id, queued = self.submit(self.user, code)
+        check_student_work(work_id)
+        work = StudentWork.objects.get(pk=work_id)
+        self.assertFalse(work.completed)
+        self.assertIn('OSError', work.error)
+        self.assertEqual(CodeRunnerStubHandler.requests, [])
+
+    @local_runner
+    @override_settings(CODE_RUNNER_BACKEND='local')
+    def test_local_runner_timeout_kills_children(self):
+        with tempfile.TemporaryDirectory() as shared:
+            os.chmod(shared, 0o777)
+            pidfile = os.path.join(shared, 'pid')
+            code = (
+                'import subprocess, sys\n'
+                'child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])\n'
+                f'open({pidfile!r}, "w").write(str(child.pid))\n'
+                'while True: pass'
+            )
+            work_id, queued = self.submit(self.user, code)
+            with mock.patch.object(CourseSettings, 'check_timeout', 2):
+                check_student_work(work_id)
+            with open(pidfile) as file:
+                pid = int(file.read())
+        try:
+            with open(f'/proc/{pid}/stat') as stat:
+                state = stat.read().rsplit(')', 1)[1].split()[0]
+        except FileNotFoundError:
+            state = None
+        self.assertIn(state, (None, 'Z'))
+
+
+class CourseProgressTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = FatUser.objects.create_user(username='student', password='pwpk3oJ*T7', email='s@mail.ru')
+        self.course = Course.objects.create(
+            name='blog', description='description', slug='blog', author=self.user,
+            category=Category.objects.create(name='category')
+        )
+        self.other_course = Course.objects.create(
+            name='shop', description='description', slug='shop', author=self.user,
+            category=self.course.category
+        )
+        self.lessons = [
+            Lesson.objects.create(
+                lesson_type='quiz', name=f'lesson {i}', slug=f'lesson-{i}', description='description',
+                course=self.course, sorted=i
+            )
+            for i in range(4)
+        ]
+        self.other_lesson = Lesson.objects.create(
+            lesson_type='quiz', name='other', slug='other', description='description', course=self.other_course
+        )
+        self.through = UserCourseThrough.objects.create(student=self.user, course=self.course)
+        self.client.force_authenticate(self.user)
+
+    def answer(self, lesson, right=True):
+        quiz = Quiz.objects.create(text='quiz', right=right, hint='hint', lesson=lesson)
+        response = self.client.post(reverse('check-work'), {'lesson': lesson.id, 'quiz_answer': quiz.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_progress_incremented_once_per_lesson(self):
+        self.answer(self.lessons[0])
+        self.answer(self.lessons[0])
+        self.answer(self.lessons[1], right=False)
+        self.answer(self.other_lesson)
+        self.through.refresh_from_db()
+        self.assertEqual(self.through.completed_lessons, 1)
+        self.assertEqual(self.through.progress, 25)
+
+        self.answer(self.lessons[1])
+        self.through.refresh_from_db()
+        self.assertEqual((self.through.completed_lessons, self.through.progress), (2, 50))
+
+    def test_lessons_count_cached(self):
+        self.assertEqual(CourseProgressService.lessons_count(self.course.id), 4)
+        with self.assertNumQueries(0):
+            CourseProgressService.lessons_count(self.course.id)
+        Lesson.objects.create(
+            lesson_type='quiz', name='new', slug='new', description='description', course=self.course
+        )
+        self.assertEqual(CourseProgressService.lessons_count(self.course.id), 5)
+
+    def test_progress_bitmap(self):
+        self.answer(self.lessons[1])
+        self.answer(self.lessons[3])
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            self.assertEqual(CourseProgressService.bitmap(self.user.id, self.course.id), '0101')
+        self.assertEqual(counter.count, 1)
+        response = self.client.get(reverse('course-progress', kwargs={'pk': self.course.id}))
+        self.assertEqual(response.data['bitmap'], '0101')
+        self.assertEqual(response.data['lessons'], [lesson.id for lesson in self.lessons])
+        self.assertEqual(response.data['progress'], 50)
+        response = self.client.get(reverse('course-progress', kwargs={'pk': self.other_course.id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_lesson_delete_recounts_progress(self):
+        self.answer(self.lessons[1])
+        self.answer(self.lessons[3])
+        self.lessons[3].delete()
+        self.through.refresh_from_db()
+        self.assertEqual((self.through.completed_lessons, self.through.progress), (1, 33))
+        response = self.client.get(reverse('course-progress', kwargs={'pk': self.course.id}))
+        self.assertEqual(response.data['bitmap'], '010')
+
+    def test_backfill(self):
+        for lesson in self.lessons[:3]:
+            quiz = Quiz.objects.create(text='quiz', right=True, hint='hint', lesson=lesson)
+            StudentWork.objects.create(lesson=lesson, student=self.user, quiz_answer=quiz, completed=True)
+        StudentWork.objects.create(lesson=self.lessons[0], student=self.user, completed=True)
+        StudentWork.objects.create(lesson=self.other_lesson, student=self.user, completed=True)
+        untouched = UserCourseThrough.objects.create(student=self.user, course=self.other_course)
+        UserCourseThrough.objects.filter(pk=untouched.pk).update(completed_lessons=1, progress=100)
+
+        call_command('backfill_course_progress', batch_size=1, stdout=open(os.devnull, 'w'))
+        self.through.refresh_from_db()
+        self.assertEqual((self.through.completed_lessons, self.through.progress), (3, 75))
+        self.assertEqual(CourseProgressService.backfill(), 0)
+
+
+class CoursePlayerTest(APITestCase):
+    def setUp(self):
+        self.user = FatUser.objects.create_user(username='student', password='pwpk3oJ*T7', email='s@mail.ru')
+        self.other = FatUser.objects.create_user(username='other', password='pwpk3oJ*T7', email='o@mail.ru')
+        self.course = Course.objects.create(
+            name='blog', description='description', slug='blog', author=self.user,
+            category=Category.objects.create(name='category')
+        )
+        self.course.tags.add(Tag.objects.create(name='django'))
+        self.client.force_authenticate(self.user)
+
+    def add_lessons(self, count):
+        start = Lesson.objects.count()
+        for i in range(start, start + count):
+            lesson = Lesson.objects.create(
+                lesson_type='python', name=f'lesson {i}', slug=f'lesson-{i}', description='description',
+                course=self.course, sorted=i
+            )
+            CodeQuestion.objects.create(code='code', answer='answer', lesson=lesson)
+            Quiz.objects.create(text='quiz', hint='hint', lesson=lesson)
+            StudentWork.objects.create(lesson=lesson, student=self.user, code_answer='first')
+            StudentWork.objects.create(lesson=lesson, student=self.other, code_answer='other')
+
+    def get_player(self):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.client.get(reverse('course-player', kwargs={'pk': self.course.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, counter.count
+
+    def test_player_queries_fixed(self):
+        self.add_lessons(2)
+        response, few = self.get_player()
+        self.add_lessons(20)
+        response, many = self.get_player()
+        self.assertEqual(few, many)
+        self.assertLessEqual(many, 6)
+        self.assertEqual(len(response.data['lessons']), 22)
+
+    def test_player_latest_own_work(self):
+        self.add_lessons(2)
+        lesson = Lesson.objects.get(slug='lesson-0')
+        StudentWork.objects.create(lesson=lesson, student=self.user, code_answer='second', completed=True)
+        response, queries = self.get_player()
+        lessons = response.data['lessons']
+        self.assertEqual([item['slug'] for item in lessons], ['lesson-0', 'lesson-1'])
+        self.assertEqual(lessons[0]['work']['code_answer'], 'second')
+        self.assertTrue(lessons[0]['work']['completed'])
+        self.assertEqual(lessons[1]['work']['code_answer'], 'first')
+        self.assertEqual(len(lessons[0]['code']), 1)
+        self.assertEqual(len(lessons[0]['quiz']), 1)
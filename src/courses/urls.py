@@ -6,12 +6,15 @@ urlpatterns = [
     path('tags/', views.TagView.as_view({'get': 'list'}), name="get-tags"),
     path('categories/', views.CategoryView.as_view({'get': 'list'}), name="get-categories"),
     path('check_work/', views.StudentWorkView.as_view(), name="check-work"),
+    path('check_work/<int:pk>/', views.StudentWorkStatusView.as_view(), name="check-work-status"),
     path('help_mentor/', views.HelpUserView.as_view(), name="help-mentor"),
 
     path('', views.CourseView.as_view({"get": "list", "post": "create"}), name='courses'),
     path('<int:pk>/', views.CourseView.as_view(
         {"get": "retrieve", "delete": "retrieve", "patch": "update"}
     ), name='course'),
+    path('<int:pk>/player/', views.CoursePlayerView.as_view(), name='course-player'),
+    path('<int:pk>/progress/', views.CourseProgressView.as_view(), name='course-progress'),
 
     path('lessons/', views.LessonView.as_view({"get": "list", "post": "create"}), name='lessons'),
     path('lessons/<int:pk>/', views.LessonView.as_view(
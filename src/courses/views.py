@@ -1,31 +1,42 @@
 from django.db.models import Q, OuterRef
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.generics import CreateAPIView
+from django.shortcuts import get_object_or_404
+from rest_framework.generics import CreateAPIView, RetrieveAPIView
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 
 from ..base import classes
 
 from . import serializers, models
+from .services import CourseProgressService, player_queryset
 from .filters import CourseFilter
+from .settings import CourseSettings
 
 
-class CategoryView(ReadOnlyModelViewSet):
+class CategoryView(classes.CachedResponse, ReadOnlyModelViewSet):
     """Представление категорий"""
+    query_budget = {'list': 4}
     serializer_class = serializers.CategoryChildrenSerializer
+    cache_models = (models.Category,)
 
     def get_queryset(self):
         return models.Category.objects.prefetch_related('children').filter(parent__isnull=True)
 
 
-class TagView(ReadOnlyModelViewSet):
+class TagView(classes.CachedResponse, ReadOnlyModelViewSet):
     """Представлениетегов"""
+    query_budget = {'list': 3}
     queryset = models.Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    cache_models = (models.Tag,)
 
 
-class CourseView(classes.MixedPermissionSerializer, ModelViewSet):
+class CourseView(classes.CountedView, classes.MixedPermissionSerializer, ModelViewSet):
     """CRUD курсов"""
+    # retrieve: +1 UPDATE просмотров, если кэш не общий и ViewCounter пишет сразу в базу
+    query_budget = {'list': 5, 'retrieve': 6}
     filter_backends = [DjangoFilterBackend]
     filterset_class = CourseFilter
     serializer_classes_by_action = {
@@ -52,8 +63,20 @@ class CourseView(classes.MixedPermissionSerializer, ModelViewSet):
         )
 
 
-class LessonView(classes.MixedPermissionSerializer, ModelViewSet):
+class CoursePlayerView(RetrieveAPIView):
+    """Плеер курса: курс, уроки с вопросами и квизами и работы текущего пользователя"""
+    # токен, курс, теги, уроки, код, квизы и работы пользователя
+    query_budget = 7
+    permission_classes = (IsAuthenticated, )
+    serializer_class = serializers.CoursePlayerSerializer
+
+    def get_queryset(self):
+        return player_queryset(self.request.user)
+
+
+class LessonView(classes.CountedView, classes.MixedPermissionSerializer, ModelViewSet):
     """CRUD уроков"""
+    query_budget = {'list': 3, 'retrieve': 6}
     queryset = models.Lesson.objects.select_related('course').all()
     serializer_classes_by_action = {
         "create": serializers.LessonDetailSerializer,
@@ -78,6 +101,40 @@ class StudentWorkView(CreateAPIView):
     serializer_class = serializers.StudentWorkSerializer
 
 
+class StudentWorkStatusView(RetrieveAPIView):
+    """Статус проверки своей работы, пока проверка идет Retry-After подсказывает интервал опроса"""
+    query_budget = 2
+    permission_classes = (IsAuthenticated, )
+    serializer_class = serializers.StudentWorkStatusSerializer
+
+    def get_queryset(self):
+        return models.StudentWork.objects.filter(student=self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if response.data['status'] not in (models.StudentWork.DONE, models.StudentWork.FAILED):
+            response['Retry-After'] = CourseSettings.check_retry_after
+        return response
+
+
+class CourseProgressView(APIView):
+    """Прогресс текущего пользователя по курсу и пройденные уроки"""
+    query_budget = 3
+    permission_classes = (IsAuthenticated, )
+
+    def get(self, request, pk):
+        through = get_object_or_404(models.UserCourseThrough, course_id=pk, student=request.user)
+        completion = CourseProgressService.completion(request.user.id, pk)
+        return Response({
+            'course': pk,
+            'progress': through.progress,
+            'completed_lessons': through.completed_lessons,
+            'lessons_count': len(completion),
+            'lessons': [lesson_id for lesson_id, _ in completion],
+            'bitmap': CourseProgressService.bitmap(request.user.id, pk, completion),
+        })
+
+
 class HelpUserView(CreateAPIView):
     """Помощь пользователям"""
     queryset = models.HelpUser
@@ -1,30 +1,32 @@
 from rest_framework import serializers, exceptions
 
 from . import models
+from ..base.service import missing_ids, sync_m2m
 from ..profiles.serializers import GetUserSerializer
 from ..team.models import TeamMember
 
 
 class CardMixin:
 
-    def set_members(self, instance, data_members):
-        for member in data_members:
-            try:
-                TeamMember.objects.get(
-                    user_id=member.get('id'), team=instance.listId.boardId.project.team
-                )
-            except TeamMember.DoesNotExist:
-                raise exceptions.ValidationError(
-                    detail=f"Member {member.get('username')} not found", code=404
-                )
-            instance.members.add(member.get('id'))
-
-    def set_labels(self, instance, data_labels):
-        for label in data_labels:
-            add_label, _ = models.Label.objects.get_or_create(
-                id=label.get('id'), boardId_id=label.get('boardId'), title=label.get('title')
+    def set_members(self, instance, data_members, created=False):
+        members = [member.get('id') for member in data_members]
+        missing = missing_ids(
+            TeamMember.objects.filter(team__project_teams=instance.column.board.project_id), members, 'user_id'
+        )
+        if missing:
+            raise exceptions.ValidationError(
+                detail=f"Members not found: {', '.join(map(str, sorted(missing)))}", code=404
             )
-            instance.labels.add(add_label)
+        sync_m2m(instance, 'members', members, created)
+
+    def set_labels(self, instance, data_labels, created=False):
+        labels = [
+            models.Label.objects.get_or_create(
+                id=label.get('id'), boardId_id=label.get('boardId'), title=label.get('title')
+            )[0]
+            for label in data_labels
+        ]
+        sync_m2m(instance, 'labels', labels, created)
 
 
 class ProfileForCardSerializer(serializers.Serializer):
@@ -86,8 +88,8 @@ class SetCardSerializer(CardMixin, serializers.ModelSerializer):
         data_members = validated_data.pop('members')
         data_labels = validated_data.pop('labels')
         instance = models.Card.objects.create(**validated_data)
-        self.set_members(instance, data_members)
-        self.set_labels(instance, data_labels)
+        self.set_members(instance, data_members, created=True)
+        self.set_labels(instance, data_labels, created=True)
         return instance
 
 
@@ -114,8 +116,6 @@ class UpdateCardSerializer(CardMixin, serializers.ModelSerializer):
         data_members = validated_data.pop('members')
         data_labels = validated_data.pop('labels')
         instance = super().update(instance, validated_data)
-        instance.members.clear()
-        instance.labels.clear()
         self.set_members(instance, data_members)
         self.set_labels(instance, data_labels)
         return instance
@@ -7,6 +7,8 @@ from .permissions import IsAuthorProject, IsMemberProject, IsAuthorBoard, IsMemb
 
 class BoardView(MixedPermissionSerializer, viewsets.ModelViewSet):
     """CR доски"""
+    # представление сейчас падает с ошибкой, бюджет задать после исправления
+    query_budget = None
     permission_classes_by_action = {
         'create': (permissions.IsAuthenticated, IsAuthorProject),
         'retrieve': (permissions.IsAuthenticated, IsMemberProject)
@@ -39,6 +41,7 @@ class BoardView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
 class LabelView(MixedPermission, viewsets.ModelViewSet):
     """CRUD лэйбла"""
+    query_budget = {'list': 3}
     queryset = models.Label.objects.all()
     permission_classes_by_action = {
         'create': (permissions.IsAuthenticated, IsAuthorBoard),
@@ -62,6 +65,8 @@ class ColumnView(MixedSerializer, viewsets.ModelViewSet):
 
 class CardView(MixedSerializer, viewsets.ModelViewSet):
     """CRU карточек"""
+    # представление сейчас падает с ошибкой, бюджет задать после исправления
+    query_budget = None
     queryset = models.Card.objects.select_related('listId__boardId').all()
     permission_classes = (permissions.IsAuthenticated, IsMemberBoard)
     serializer_classes_by_action = {
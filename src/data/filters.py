@@ -4,11 +4,13 @@ from src.courses.models import  HelpUser
 
 
 class UsersFilter(filters.FilterSet):
-    first_login = filters.DateTimeFilter(field_name="first_login", lookup_expr="gte")
+    joined_after = filters.DateTimeFilter(field_name="date_joined", lookup_expr="gte")
+    joined_before = filters.DateTimeFilter(field_name="date_joined", lookup_expr="lt")
+    last_login_after = filters.DateTimeFilter(field_name="last_login", lookup_expr="gte")
 
     class Meta:
         model = FatUser
-        fields = ('first_login', 'coins', 'id')
+        fields = ('joined_after', 'joined_before', 'last_login_after', 'coins', 'id')
 
 
 class HelpUserFilter(filters.FilterSet):
@@ -0,0 +1,56 @@
+import csv
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from src.courses.models import UserCourseThrough
+from src.profiles.models import FatUser
+from src.questions.models import Answer, Question
+from src.repository.models import Project
+from src.team.models import TeamMember
+
+from .settings import DataSettings
+
+
+def user_subquery(queryset, field: str, aggregate=Count, column: str = 'pk'):
+    """Агрегат по строкам пользователя коррелированным подзапросом, 0 если строк нет"""
+    rows = (
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(value=aggregate(column))
+        .values('value')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def user_analytics():
+    """Пользователи со счетчиками курсов, уроков, проектов, команд, вопросов и ответов одним запросом.
+    Каждый счетчик - отдельный подзапрос, поэтому соединения не размножают строки.
+    """
+    courses = UserCourseThrough.objects.all()
+    return FatUser.objects.annotate(
+        courses_count=user_subquery(courses, 'student'),
+        started_courses_count=user_subquery(courses.filter(progress=0), 'student'),
+        finished_courses_count=user_subquery(courses.filter(progress__gte=100), 'student'),
+        completed_lessons_count=user_subquery(courses, 'student', Sum, 'completed_lessons'),
+        projects_count=user_subquery(Project.objects.all(), 'user'),
+        teams_count=user_subquery(TeamMember.objects.all(), 'user'),
+        questions_count=user_subquery(Question.objects.all(), 'author'),
+        answers_count=user_subquery(Answer.objects.all(), 'author'),
+    )
+
+
+class Echo:
+    """Буфер csv.writer, строка сразу отдается в ответ"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, fields):
+    """Строки CSV по queryset, записи читаются из базы пачками"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in queryset.values_list(*fields).iterator(chunk_size=DataSettings.export_chunk_size):
+        yield writer.writerow(row)
@@ -0,0 +1,18 @@
+class DataSettings:
+    export_chunk_size = 2000
+    user_analytics_fields = (
+        'id',
+        'username',
+        'date_joined',
+        'last_login',
+        'coins',
+        'experience',
+        'courses_count',
+        'started_courses_count',
+        'finished_courses_count',
+        'completed_lessons_count',
+        'projects_count',
+        'teams_count',
+        'questions_count',
+        'answers_count',
+    )
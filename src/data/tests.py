@@ -1,3 +1,80 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from src.base.query_budget import QueryCounter
+from src.courses.models import Category as CourseCategory, Course, UserCourseThrough
+from src.profiles.models import FatUser
+from src.questions.models import Answer, Question
+from src.repository.models import Category, Project
+from src.team.models import Team
+
+
+class UserAnalyticsTest(APITestCase):
+    def setUp(self):
+        self.admin = FatUser.objects.create_superuser(username='admin', password='pwpk3oJ*T7', email='a@mail.ru')
+        self.user = FatUser.objects.create_user(username='student', password='pwpk3oJ*T7', email='s@mail.ru')
+        category = CourseCategory.objects.create(name='category')
+        courses = [
+            Course.objects.create(name=f'course{i}', description='description', author=self.admin, category=category)
+            for i in range(3)
+        ]
+        UserCourseThrough.objects.create(student=self.user, course=courses[0], progress=0)
+        UserCourseThrough.objects.create(student=self.user, course=courses[1], progress=100, completed_lessons=4)
+        UserCourseThrough.objects.create(student=self.user, course=courses[2], progress=50, completed_lessons=2)
+        Project.objects.create(
+            name='project', description='description', user=self.user,
+            category=Category.objects.create(name='category'), repository='repository'
+        )
+        Team.objects.create(name='team', user=self.user)
+        question = Question.objects.create(title='question', text='text', author=self.user)
+        Answer.objects.create(author=self.user, text='first', question=question)
+        Answer.objects.create(author=self.user, text='second', question=question)
+        Answer.objects.create(author=self.admin, text='admin', question=question)
+        self.client.force_authenticate(self.admin)
+
+    def test_user_analytics(self):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.client.get(reverse('data_users'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(counter.count, 1)
+        users = {item['username']: item for item in response.data['results']}
+        self.assertEqual(
+            {key: users['student'][key] for key in (
+                'courses_count', 'started_courses_count', 'finished_courses_count', 'completed_lessons_count',
+                'projects_count', 'teams_count', 'questions_count', 'answers_count'
+            )},
+            {
+                'courses_count': 3, 'started_courses_count': 1, 'finished_courses_count': 1,
+                'completed_lessons_count': 6, 'projects_count': 1, 'teams_count': 1,
+                'questions_count': 1, 'answers_count': 2,
+            }
+        )
+        self.assertEqual(users['admin']['courses_count'], 0)
+        self.assertEqual(users['admin']['answers_count'], 1)
+
+    def test_user_analytics_filter(self):
+        FatUser.objects.filter(pk=self.admin.pk).update(date_joined=timezone.now() - timedelta(days=30))
+        after = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.client.get(reverse('data_users'), {'joined_after': after})
+        self.assertEqual([item['username'] for item in response.data['results']], ['student'])
+
+    def test_user_analytics_admin_only(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(reverse('data_users')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('data_users_export')).status_code, 403)
+
+    def test_user_export_csv(self):
+        response = self.client.get(reverse('data_users_export'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'username', 'date_joined'])
+        self.assertEqual(len(lines), 3)
+        student = dict(zip(lines[0].split(','), lines[2].split(',')))
+        self.assertEqual(student['username'], 'student')
+        self.assertEqual(student['completed_lessons_count'], '6')
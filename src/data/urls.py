@@ -3,7 +3,8 @@ from . import views
 
 
 urlpatterns = [
-    path('users/', views.UserView.as_view()),
+    path('users/', views.UserView.as_view(), name='data_users'),
+    path('users/export/', views.UserExportView.as_view(), name='data_users_export'),
     path('help_mentor/', views.HelpMentorView.as_view()),
     path('team_project_count/', views.TeamProjectCountView.as_view())
 ]
@@ -1,35 +1,63 @@
-from django.db.models import Count
-from rest_framework.generics import ListAPIView
+from django.http import StreamingHttpResponse
+from rest_framework.generics import GenericAPIView, ListAPIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
 
-from src.profiles.models import FatUser
 from src.profiles.serializers import DashboardUserSerializer
 
 from src.courses.serializers import HelpUserSerializer
 from src.courses.models import HelpUser
 
+from . import services
 from .filters import UsersFilter, HelpUserFilter
+from .settings import DataSettings
 
 from src.team.models import Team
 from src.repository.models import Project
 
-from ..base.classes import MixedPermission
+from ..base.classes import KeysetPagination, MixedPermission
 
 
 class UserView(ListAPIView):
-    """Просмотр пользователей"""
-    queryset = FatUser.objects.annotate(Count('courses')).all()
+    """Просмотр пользователей со статистикой"""
+    # токен и страница пользователей с подзапросами статистики
+    query_budget = 2
     permission_classes = (IsAdminUser, )
-    # pagination_class = UserPaginationInfo
-    # filter_backends = (DjangoFilterBackend, )
+    pagination_class = KeysetPagination
+    keyset_ordering = 'id'
+    filter_backends = (DjangoFilterBackend, )
     filterset_class = UsersFilter
     serializer_class = DashboardUserSerializer
 
+    def get_queryset(self):
+        return services.user_analytics()
+
+
+class UserExportView(GenericAPIView):
+    """Выгрузка пользователей со статистикой в CSV потоком.
+    Бюджет запросов не проверяется: строки читаются уже после ответа middleware, счетчик их не видит.
+    """
+    query_budget = None
+    permission_classes = (IsAdminUser, )
+    filter_backends = (DjangoFilterBackend, )
+    filterset_class = UsersFilter
+
+    def get_queryset(self):
+        return services.user_analytics().order_by('id')
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            services.stream_csv(queryset, DataSettings.user_analytics_fields), content_type='text/csv'
+        )
+        response['Content-Disposition'] = 'attachment; filename="users.csv"'
+        return response
+
 
 class HelpMentorView(ListAPIView):
     """Помощь наставника"""
+    query_budget = 3
     queryset = HelpUser.objects.all()
     permission_classes = (IsAdminUser, )
     filter_backends = (DjangoFilterBackend, )
@@ -40,6 +68,7 @@ class HelpMentorView(ListAPIView):
 ##TODO  'TeamProjectCountView' should either include a `serializer_class` attribute, or override the `get_serializer_class()` method.
 class TeamProjectCountView(ListAPIView):
     """Команды проектов"""
+    query_budget = 3
     permission_classes = (IsAdminUser, )
 
     def list(self, request, *args, **kwargs):
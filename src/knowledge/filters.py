@@ -1,6 +1,8 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
 
 from .models import Article
+from .services import search_articles
 
 
 class CharFilterInFilter(filters.BaseInFilter, filters.CharFilter):
@@ -15,3 +17,14 @@ class ArticleFilter(filters.FilterSet):
     class Meta:
         model = Article
         fields = ['category', 'date_creation', 'tag']
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск по заголовку и тексту, параметр search"""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search_articles(queryset, query)
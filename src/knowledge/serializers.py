@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from src.knowledge import models
+from src.search.services import highlight, render_headline
 from ..profiles.serializers import GetUserSerializer
 
 
@@ -31,6 +32,22 @@ class ListArticleSerializer(serializers.ModelSerializer):
         exclude = ('text', 'video_url')
 
 
+class SearchArticleSerializer(serializers.ModelSerializer):
+    """Найденная статья"""
+    author = GetUserSerializer()
+    rank = serializers.FloatField()
+    headline = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.Article
+        fields = ('id', 'title', 'headline', 'rank', 'date_creation', 'author', 'view_count', 'picture')
+
+    def get_headline(self, obj):
+        if hasattr(obj, 'headline'):
+            return render_headline(obj.headline)
+        return highlight(obj.text, self.context['request'].query_params.get('search', ''))
+
+
 class DetailArticleSerializer(serializers.ModelSerializer):
     """Статья детально"""
     author = GetUserSerializer()
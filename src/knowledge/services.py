@@ -1,6 +1,21 @@
+from django.db.models import OuterRef, Subquery
 from rest_framework.pagination import PageNumberPagination
 
+from src.base.service import full_text_supported
+from src.search.services import search
+
 
 class ListArticleViewPagination(PageNumberPagination):
     page_size = 10
     max_page_size = 15
+
+
+def search_articles(queryset, query: str):
+    """Статьи по запросу из общего поискового индекса с рангом rank и фрагментом headline, лучшие первыми.
+    Без PostgreSQL фрагмент строит highlight.
+    """
+    documents = search(query, kinds=['article']).filter(object_id=OuterRef('pk'))
+    annotations = {'rank': Subquery(documents.values('rank')[:1])}
+    if full_text_supported():
+        annotations['headline'] = Subquery(documents.values('snippet')[:1])
+    return queryset.annotate(**annotations).filter(rank__isnull=False).order_by('-rank', '-id')
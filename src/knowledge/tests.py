@@ -67,3 +67,24 @@ class TestKnowledge(APITestCase):
         request = self.client.get(reverse("glossary-letter"))
         self.assertEqual(request.status_code, status.HTTP_200_OK)
         self.assertEqual(request.json().get('results'), [{'id': 1, 'letter': 'f'}])
+
+    def test_article_search(self):
+        request = self.client.get(reverse("article-search"), {'search': 'second'})
+        self.assertEqual(request.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(request.data["results"]), 1)
+        self.assertEqual(request.data["results"][0]['title'], 'second article')
+        self.assertIn('<mark>second</mark>', request.data["results"][0]['headline'])
+
+    def test_article_search_rank(self):
+        models.Article.objects.create(title='note', text='about the first steps', published=True)
+        request = self.client.get(reverse("article-search"), {'search': 'first'})
+        titles = [article['title'] for article in request.data["results"]]
+        self.assertEqual(titles, ['first article', 'note'])
+
+    def test_article_search_required(self):
+        request = self.client.get(reverse("article-search"))
+        self.assertEqual(request.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_article_list_search_text(self):
+        request = self.client.get(reverse("article-list"), {'search': 'text of the first'})
+        self.assertEqual(len(request.data["results"]), 1)
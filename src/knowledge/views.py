@@ -1,27 +1,33 @@
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters
+from rest_framework import status
 from rest_framework.generics import ListAPIView
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from ..base.classes import MixedSerializer
+from ..base.classes import CountedView, MixedSerializer, CachedResponse
 
 from . import models, serializers
-from .filters import ArticleFilter
+from .filters import ArticleFilter, FullTextSearchFilter
 
 
-class CategoryView(ModelViewSet):
+class CategoryView(CachedResponse, ModelViewSet):
     """Представление категорий"""
+    query_budget = {'list': 3}
     queryset = models.Category.objects.all()
     serializer_class = serializers.CategorySerializer
+    cache_models = (models.Category,)
 
 
-class TagListView(ListAPIView):
+class TagListView(CachedResponse, ListAPIView):
     """Представление тегов"""
+    query_budget = 3
     queryset = models.Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    cache_models = (models.Tag,)
 
 
-class ArticleView(MixedSerializer, ModelViewSet):
+class ArticleView(CountedView, MixedSerializer, ModelViewSet):
     """Представление просмотра статей"""
+    query_budget = {'list': 6, 'retrieve': 6, 'search': 6}
     queryset = (
         models.Article.objects
         .filter(published=True)
@@ -31,21 +37,31 @@ class ArticleView(MixedSerializer, ModelViewSet):
     serializer_classes_by_action = {
         'list': serializers.ListArticleSerializer,
         'retrieve': serializers.DetailArticleSerializer,
+        'search': serializers.SearchArticleSerializer,
     }
     # pagination_class = ListArticleViewPagination
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter, )
+    filter_backends = (DjangoFilterBackend, FullTextSearchFilter, )
     filterset_class = ArticleFilter
-    search_fields = ['title']
 
+    def search(self, request, *args, **kwargs):
+        """Найденные статьи по рангу с выделенным фрагментом текста"""
+        if not request.query_params.get(FullTextSearchFilter.search_param, '').strip():
+            return Response({'detail': 'Параметр search обязателен'}, status=status.HTTP_400_BAD_REQUEST)
+        return self.list(request, *args, **kwargs)
 
-class GlossaryLetterListView(ListAPIView):
+
+class GlossaryLetterListView(CachedResponse, ListAPIView):
     """Представление оглавлений"""
+    query_budget = 3
     queryset = models.Glossary.objects.all()
     serializer_class = serializers.GlossaryLetterSerializer
+    cache_models = (models.Glossary,)
 
 
 class GlossaryArticleListView(ListAPIView):
     """Предаставление списка статей"""
+    # представление сейчас падает с ошибкой, бюджет задать после исправления
+    query_budget = None
     serializer_class = serializers.GlossaryArticleSerializer
 
     def get_queryset(self):
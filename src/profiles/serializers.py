@@ -154,9 +154,15 @@ class GetUserForProjectSerializer(serializers.ModelSerializer):
 
 
 class DashboardUserSerializer(serializers.ModelSerializer):
-    """Serializer for dashboard"""
-    started_courses_count = serializers.SerializerMethodField()
-    finished_courses_count = serializers.SerializerMethodField()
+    """Serializer for dashboard, счетчики приходят аннотациями data.services.user_analytics"""
+    courses_count = serializers.IntegerField(read_only=True)
+    started_courses_count = serializers.IntegerField(read_only=True)
+    finished_courses_count = serializers.IntegerField(read_only=True)
+    completed_lessons_count = serializers.IntegerField(read_only=True)
+    projects_count = serializers.IntegerField(read_only=True)
+    teams_count = serializers.IntegerField(read_only=True)
+    questions_count = serializers.IntegerField(read_only=True)
+    answers_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = models.FatUser
@@ -165,16 +171,18 @@ class DashboardUserSerializer(serializers.ModelSerializer):
             'experience',
             'username',
             'id',
+            'date_joined',
+            'last_login',
+            'courses_count',
             'started_courses_count',
-            'finished_courses_count'
+            'finished_courses_count',
+            'completed_lessons_count',
+            'projects_count',
+            'teams_count',
+            'questions_count',
+            'answers_count',
         )
 
-        def get_started_courses_count(self, instance):
-            return instance.courses.filter(progress=0).count()
-
-        def get_finished_courses_count(self, instance):
-            return instance.courses.filter(progress=100).count()
-
 
 class GitHubAddSerializer(serializers.Serializer):
     code = serializers.CharField(max_length=25)
@@ -10,6 +10,7 @@ from src.team.models import TeamMember
 from src.repository.models import ProjectMember
 from src.profiles.models import FatUser, Account, Friend, Application, Invitation
 from ..base import exceptions
+from ..base.service import check_ids, sync_m2m
 from .models import Questionnaire, FatUserSocial
 
 
@@ -27,12 +28,11 @@ class CoinService:
         return self.user.coins
 
     def buy(self, price):
-        balance = self.check_balance()
-        if balance > price:
-            self.user.coins -= price
-            self.user.save()
-            return self.user
-        raise ValueError('Недостаточно средств')
+        debited = FatUser.objects.filter(id=self.user.id, coins__gt=price).update(coins=F('coins') - price)
+        if not debited:
+            raise ValueError('Недостаточно средств')
+        self.user.refresh_from_db(fields=['coins'])
+        return self.user
 
 
 class ReputationService:
@@ -41,11 +41,9 @@ class ReputationService:
 
     def increase_reputation(self, count: int, action: str):
         if action == "inc":
-            self.user.reputation += count
-            self.user.save()
+            FatUser.objects.filter(id=self.user.id).update(reputation=F('reputation') + count)
         elif action == "dcr":
-            self.user.reputation -= count
-            self.user.save()
+            FatUser.objects.filter(id=self.user.id).update(reputation=F('reputation') - count)
 
 
 def check_token_add(code):
@@ -209,59 +207,39 @@ def create_user_and_token(account_id, email, account_name, account_url):
 
 def check_teams(teams, user):
     """Проверка является ли пользователь участником команды"""
-    if teams is not None:
-        for team in teams:
-            if not TeamMember.objects.filter(user=user, team=team).exists():
-                raise exceptions.TeamMemberExists()
-    return teams
+    return check_ids(TeamMember.objects.filter(user=user), teams, exceptions.TeamMemberExists, 'team_id')
 
 
 def check_projects(projects, user):
     """Проверка проектов пользователя"""
-    if projects is not None:
-        for project in projects:
-            cur_project = ProjectMember.objects.filter(user=user, project=project).exists()
-            if not cur_project:
-                raise exceptions.ProjectMemberExists()
-    return projects
+    return check_ids(ProjectMember.objects.filter(user=user), projects, exceptions.ProjectMemberExists, 'project_id')
 
 
 def check_account(accounts, user):
     """Проверка привязанных аккаунтов пользователя"""
-    if accounts is not None:
-        for account in accounts:
-            cur_account = Account.objects.filter(user=user, account_url=account).exists()
-            if not cur_account:
-                raise exceptions.AccountMemberExists()
-    return accounts
+    return check_ids(Account.objects.filter(user=user), accounts, exceptions.AccountMemberExists)
 
 
 def questionnaire_create(user, teams, projects, accounts, toolkits, languages, socials, **validated_data):
     """Создание анкеты пользователя"""
     questionnaire = Questionnaire.objects.create(user=user,**validated_data)
-    for team in teams:
-        questionnaire.teams.add(team)
-    for toolkit in toolkits:
-        questionnaire.toolkits.add(toolkit)
-    for project in projects:
-        questionnaire.projects.add(project)
-    for account in accounts:
-        questionnaire.accounts.add(account)
-    for language in languages:
-        questionnaire.languages.add(language)
-    for social in socials:
-        questionnaire.socials.add(social)
+    set_questionnaire_relations(
+        questionnaire, True,
+        teams=teams, toolkits=toolkits, projects=projects, accounts=accounts, languages=languages, socials=socials
+    )
     return questionnaire
 
 
+def set_questionnaire_relations(questionnaire, created=False, **relations):
+    """Связи анкеты, не переданные (None) связи не меняются"""
+    for name, targets in relations.items():
+        if targets is not None:
+            sync_m2m(questionnaire, name, targets, created)
+
+
 def check_socials(user, socials):
     """Проверка социальных сетей пользователя"""
-    if socials is not None:
-        for social in socials:
-            cur_social = FatUserSocial.objects.filter(user=user, user_url=social).exists()
-            if not cur_social:
-                raise exceptions.SocialUserNotExists()
-    return socials
+    return check_ids(FatUserSocial.objects.filter(user=user), socials, exceptions.SocialUserNotExists)
 
 
 def check_profile(user, teams, projects, accounts, socials):
@@ -274,24 +252,10 @@ def check_profile(user, teams, projects, accounts, socials):
 
 def questionnaire_update(instance, teams, toolkits, projects, accounts, languages, socials):
     """Обновление анкеты пользователя"""
-    instance.teams.clear()
-    instance.toolkits.clear()
-    instance.accounts.clear()
-    instance.projects.clear()
-    instance.languages.clear()
-    instance.socials.clear()
-    for team in teams:
-        instance.teams.add(team)
-    for toolkit in toolkits:
-        instance.toolkits.add(toolkit)
-    for project in projects:
-        instance.projects.add(project)
-    for language in languages:
-        instance.languages.add(language)
-    for account in accounts:
-        instance.accounts.add(account)
-    for social in socials:
-        instance.socials.add(social)
+    set_questionnaire_relations(
+        instance,
+        teams=teams, toolkits=toolkits, projects=projects, accounts=accounts, languages=languages, socials=socials
+    )
     return instance
 
 
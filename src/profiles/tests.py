@@ -746,6 +746,19 @@ class QuestionnaireTest(APITestCase):
         response = self.client.post(reverse('questionnaire'), data=data, format='json')
         self.assertEqual(response.status_code, 400)
 
+    def test_questionnaire_invalid_teams_reported(self):
+        team3 = Team.objects.create(name='team3', user=self.profile2)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.profile1_token.key)
+        data = {
+            'description': 'test1',
+            'user': self.profile1.id,
+            'teams': [self.team1.id, self.team2.id, team3.id],
+        }
+        response = self.client.post(reverse('questionnaire'), data=data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.data['detail'].endswith(f': {self.team2.id}, {team3.id}'))
+        self.assertFalse(Questionnaire.objects.filter(user=self.profile1).exists())
+
     def test_questionnaire_invalid_social(self):
         self.client.credentials(HTTP_AUTHORIZATION="Token " + self.profile1_token.key)
         data = {
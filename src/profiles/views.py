@@ -9,7 +9,7 @@ from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnl
 
 from src.profiles import models, serializers, services, filters, permissions
 from src.base.permissions import IsUser
-from src.base.classes import MixedPermissionSerializer, MixedSerializer
+from src.base.classes import MixedPermissionSerializer, MixedSerializer, CachedResponse
 
 
 def title(request):
@@ -58,6 +58,7 @@ class AddGitHub(generics.GenericAPIView):
 
 class UsersView(MixedPermissionSerializer, ModelViewSet):
     """Представление пользователя"""
+    query_budget = {'list': 3, 'retrieve': 2}
 
     permission_classes_by_action = {
         'list': (IsAuthenticated,),
@@ -110,6 +111,7 @@ class UsersView(MixedPermissionSerializer, ModelViewSet):
 
 class QuestionnaireView(MixedPermissionSerializer, ModelViewSet):
     """CRUD анкеты пользователя"""
+    query_budget = {'list': 10, 'retrieve': 9}
     permission_classes_by_action = {
         'list': (IsAuthenticated,),
         'create': (permissions.IsQuestionnaireNotExists,),
@@ -149,6 +151,8 @@ class QuestionnaireView(MixedPermissionSerializer, ModelViewSet):
 
 class ApplicationView(MixedSerializer, ModelViewSet):
     """CRD заявки"""
+    # представление сейчас падает с ошибкой, бюджет задать после исправления
+    query_budget = None
     serializer_classes_by_action = {
         'list': serializers.ApplicationListSerializer,
         'create': serializers.ApplicationSerializer,
@@ -168,6 +172,8 @@ class ApplicationView(MixedSerializer, ModelViewSet):
 
 class ApplicationUserGetterView(ReadOnlyModelViewSet):
     """Представление заявки пользователя"""
+    # представление сейчас падает с ошибкой, бюджет задать после исправления
+    query_budget = None
     serializer_class = serializers.ApplicationListSerializer
     permissions = (IsAuthenticated, )
 
@@ -177,6 +183,8 @@ class ApplicationUserGetterView(ReadOnlyModelViewSet):
 
 class FriendView(MixedSerializer, ModelViewSet):
     """Друзья пользователя"""
+    # представление сейчас падает с ошибкой, бюджет задать после исправления
+    query_budget = None
     serializer_classes_by_action = {
         'list': serializers.FriendListSerializer,
         'create': serializers.FriendSerializer,
@@ -193,6 +201,7 @@ class FriendView(MixedSerializer, ModelViewSet):
 
 class AvatarProfileView(MixedPermissionSerializer, ModelViewSet):
     """Аватар профиля"""
+    query_budget = {'list': 3}
     parser_classes = (parsers.MultiPartParser,)
     serializer_classes_by_action = serializers.AvatarProfileSerializer
     permission_classes_by_action = {
@@ -209,6 +218,7 @@ class AvatarProfileView(MixedPermissionSerializer, ModelViewSet):
 
 class SocialProfileView(MixedPermissionSerializer, ModelViewSet):
     """Социальные ссылки профиля"""
+    query_budget = {'list': 3, 'retrieve': 2}
     serializer_classes_by_action = {
         'list': serializers.SocialProfileSerializer,
         'retrieve': serializers.SocialProfileSerializer,
@@ -232,6 +242,7 @@ class SocialProfileView(MixedPermissionSerializer, ModelViewSet):
 
 class AvatarQuestionnaireView(MixedPermissionSerializer, ModelViewSet):
     """Аватар анкеты"""
+    query_budget = {'list': 3}
     parser_classes = (parsers.MultiPartParser,)
     serializer_classes_by_action = serializers.AvatarQuestionnaireSerializer
     permission_classes_by_action = {
@@ -246,7 +257,9 @@ class AvatarQuestionnaireView(MixedPermissionSerializer, ModelViewSet):
         serializer.save(questionnaire_id=self.kwargs.get('pk'))
 
 
-class SocialView(generics.ListAPIView):
+class SocialView(CachedResponse, generics.ListAPIView):
     """Представление ссоциальных сетей"""
+    query_budget = 3
     queryset = models.Social.objects.all()
-    serializer_class = serializers.SocialListSerializer
\ No newline at end of file
+    serializer_class = serializers.SocialListSerializer
+    cache_models = (models.Social,)
\ No newline at end of file
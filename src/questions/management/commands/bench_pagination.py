@@ -0,0 +1,69 @@
+import time
+from urllib.parse import parse_qs, urlparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.pagination import Cursor, LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from src.base.classes import KeysetPagination
+from src.profiles.models import FatUser
+from src.questions.models import Question
+
+
+class Command(BaseCommand):
+    help = 'Сравнение LimitOffset и keyset пагинации вопросов на первой и глубокой странице'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=10000)
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        pages, page_size = options['pages'], options['page_size']
+        factory = APIRequestFactory(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        with transaction.atomic():
+            author = FatUser.objects.create(username='bench_pagination', email=None)
+            Question.objects.bulk_create(
+                [Question(title=f'bench {i}', text='text', author=author) for i in range(pages * page_size)],
+                batch_size=5000
+            )
+            queryset = Question.objects.order_by('-id')
+            deep_position = queryset.values_list('id', flat=True)[(pages - 1) * page_size - 1]
+
+            def offset_page(page):
+                params = {'limit': page_size, 'offset': (page - 1) * page_size}
+                request = Request(factory.get('/', params))
+                return LimitOffsetPagination().paginate_queryset(queryset, request)
+
+            def keyset_page(position):
+                paginator = KeysetPagination()
+                params = {'limit': page_size}
+                if position is not None:
+                    paginator.base_url = '/'
+                    url = paginator.encode_cursor(Cursor(offset=0, reverse=False, position=str(position)))
+                    params['cursor'] = parse_qs(urlparse(url).query)['cursor'][0]
+                return paginator.paginate_queryset(queryset, Request(factory.get('/', params)))
+
+            results = {
+                'limit-offset page 1': self._measure(options['repeat'], offset_page, 1),
+                f'limit-offset page {pages}': self._measure(options['repeat'], offset_page, pages),
+                'keyset page 1': self._measure(options['repeat'], keyset_page, None),
+                f'keyset page {pages}': self._measure(options['repeat'], keyset_page, deep_position),
+            }
+            same = [q.id for q in offset_page(pages)] == [q.id for q in keyset_page(deep_position)]
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'questions: {pages * page_size}')
+        for name, elapsed in results.items():
+            self.stdout.write(f'{name}: {elapsed * 1000:.2f}ms')
+        self.stdout.write(f'same deep page: {same}')
+
+    @staticmethod
+    def _measure(repeat, paginate, argument):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            list(paginate(argument))
+        return (time.perf_counter() - start) / repeat
@@ -69,9 +69,12 @@ class Answer(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answers')
 
     def update_rating(self):
-        self.rating += AnswerReview.objects.filter(answer=self, grade=True).count()
-        self.rating -= AnswerReview.objects.filter(answer=self, grade=False).count()
-        return super().save()
+        grades = AnswerReview.objects.filter(answer=self).aggregate(
+            up=models.Count('id', filter=models.Q(grade=True)),
+            down=models.Count('id', filter=models.Q(grade=False)),
+        )
+        self.rating = grades['up'] - grades['down']
+        Answer.objects.filter(id=self.id).update(rating=self.rating)
 
 
 class QuestionReview(models.Model):
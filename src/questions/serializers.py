@@ -2,7 +2,14 @@ from rest_framework import serializers
 from ..profiles.serializers import GetUserSerializer
 
 from . import models
-from .services import QuestionService, AnswerService, create_follow
+from .services import (
+    QuestionService,
+    AnswerService,
+    AnswerTreeService,
+    create_follow,
+    create_question_review,
+    create_answer_review
+)
 from .validators import QuestionValidator
 from ..profiles.services import ReputationService
 
@@ -20,18 +27,33 @@ class CreateAnswerSerializer(serializers.ModelSerializer):
         fields = ("text", "parent", "question")
 
 
-class RecursiveSerializer(serializers.Serializer):
-    def to_representation(self, value):
-        serializer = self.parent.parent.__class__(value)
-        return serializer.data
-
-
 class RetrieveAnswerSerializer(serializers.ModelSerializer):
-    children = RecursiveSerializer(many=True)
+    """Ответ с деревом дочерних ответов, глубина и число детей задаются depth, offset и limit"""
+    children = serializers.ListField(read_only=True)
+    children_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = models.Answer
-        fields = ("id", "text", "children", "question")
+        fields = ("id", "text", "children", "children_count", "question")
+
+    def query_param(self, name, default, maximum=None):
+        request = self.context.get('request')
+        value = request.query_params.get(name) if request is not None else None
+        if value is None:
+            return default
+        try:
+            value = max(int(value), 0)
+        except ValueError:
+            raise serializers.ValidationError({name: 'Ожидается целое число'})
+        return min(value, maximum) if maximum is not None else value
+
+    def to_representation(self, instance):
+        settings = AnswerTreeService.settings
+        return AnswerTreeService(instance).build(
+            depth=self.query_param('depth', settings.answer_tree_depth, settings.answer_tree_max_depth),
+            offset=self.query_param('offset', 0),
+            limit=self.query_param('limit', settings.answer_children_limit, settings.answer_children_limit),
+        )
 
 
 class AnswerSerializer(serializers.ModelSerializer):
@@ -53,6 +75,8 @@ class AnswerSerializer(serializers.ModelSerializer):
         )
 
     def get_children_count(self, instance):
+        if hasattr(instance, 'children_count'):
+            return instance.children_count
         return instance.children.count()
 
 
@@ -89,8 +113,8 @@ class RetrieveQuestionSerializer(serializers.ModelSerializer):
 
 class ListQuestionSerializer(serializers.ModelSerializer):
     author = GetUserSerializer()
-    correct_answers = serializers.SerializerMethodField()
-    answer_count = serializers.SerializerMethodField()
+    correct_answers = serializers.IntegerField(read_only=True)
+    answer_count = serializers.IntegerField(read_only=True)
     tags = TagsSerializer(many=True, read_only=True)
 
     class Meta:
@@ -106,12 +130,6 @@ class ListQuestionSerializer(serializers.ModelSerializer):
             "tags",
         )
 
-    def get_correct_answers(self, instance):
-        return QuestionService(instance).correct_answers_count()
-
-    def get_answer_count(self, instance):
-        return QuestionService(instance).answers_count()
-
 
 class QuestionReviewSerializer(serializers.ModelSerializer):
     class Meta:
@@ -124,9 +142,7 @@ class QuestionReviewSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        review = self.Meta.model.objects.create(**validated_data)
-        QuestionService(validated_data["question"]).update_rating(validated_data['grade'])
-        return review
+        return create_question_review(**validated_data)
 
 
 class AnswerReviewSerializer(serializers.ModelSerializer):
@@ -140,9 +156,7 @@ class AnswerReviewSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        review = self.Meta.model.objects.create(**validated_data)
-        AnswerService(validated_data["answer"]).update_rating(validated_data['grade'])
-        return review
+        return create_answer_review(**validated_data)
 
 
 class UpdateQuestionSerializer(serializers.ModelSerializer):
@@ -172,8 +186,7 @@ class UpdateAcceptAnswerSerializer(serializers.ModelSerializer):
         fields = ("accepted",)
 
     def update(self, instance, validated_data):
-        AnswerService(instance).update_accept()
-        return super(UpdateAcceptAnswerSerializer, self).update(instance, validated_data)
+        return AnswerService(instance).update_accept()
 
 
 class FollowerQuestionSerializer(serializers.ModelSerializer):
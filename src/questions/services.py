@@ -1,9 +1,18 @@
-from django.db.models import Q, Count
+from collections import defaultdict, deque
+
+from django.db import transaction
+from django.db.models import Q, Count, OuterRef, Subquery, F, Sum, Case, When, Value
+from django.db.models.functions import Coalesce
 
 from . import models
+from .settings import QuestionSettings
 from ..profiles.services import ReputationService
 
 
+def vote(grade: bool) -> int:
+    return 1 if grade else -1
+
+
 class QuestionService:
 
     def __init__(self, question: models.Question):
@@ -16,13 +25,9 @@ class QuestionService:
         return self.question.answers.filter(accepted=True).count()
 
     def update_rating(self, grade):
-        if grade:
-            self.question.rating += 1
-            ReputationService(self.question.author).increase_reputation(15, 'inc')
-        else:
-            self.question.rating -= 1
-            ReputationService(self.question.author).increase_reputation(15, 'dcr')
-        return self.question.save()
+        with transaction.atomic():
+            models.Question.objects.filter(id=self.question.id).update(rating=F('rating') + vote(grade))
+            ReputationService(self.question.author).increase_reputation(15, 'inc' if grade else 'dcr')
 
     def update_tags(self, tags):
         for tag_data in tags:
@@ -43,19 +48,127 @@ class AnswerService:
         self.answer = answer
 
     def update_rating(self, grade):
-        if grade:
-            self.answer.rating += 1
-            ReputationService(self.answer.author).increase_reputation(15, 'inc')
-        else:
-            self.answer.rating -= 1
-            ReputationService(self.answer.author).increase_reputation(15, 'dcr')
-        return self.answer.save()
+        with transaction.atomic():
+            models.Answer.objects.filter(id=self.answer.id).update(rating=F('rating') + vote(grade))
+            ReputationService(self.answer.author).increase_reputation(15, 'inc' if grade else 'dcr')
 
     def update_accept(self):
-        self.answer.accepted = not self.answer.accepted
-        ReputationService(self.answer.author).increase_reputation(20, 'inc')
-        return self.answer.save()
+        """Принять ответ или снять принятие, репутация автора меняется в сторону переключения.
+        Если параллельный запрос уже переключил ответ, репутация не меняется, а ответ перечитывается из базы.
+        """
+        accepted = not self.answer.accepted
+        with transaction.atomic():
+            switched = models.Answer.objects.filter(id=self.answer.id, accepted=not accepted).update(accepted=accepted)
+            if switched:
+                ReputationService(self.answer.author).increase_reputation(20, 'inc' if accepted else 'dcr')
+        if switched:
+            self.answer.accepted = accepted
+        else:
+            self.answer.refresh_from_db(fields=['accepted'])
+        return self.answer
+
+
+def annotate_answers_count(queryset):
+    """Количество ответов и принятых ответов вопросов в том же запросе"""
+    answers = models.Answer.objects.filter(question=OuterRef('pk')).order_by().values('question')
+    return queryset.annotate(
+        answer_count=Coalesce(Subquery(answers.annotate(count=Count('id')).values('count')), 0),
+        correct_answers=Coalesce(
+            Subquery(answers.filter(accepted=True).annotate(count=Count('id')).values('count')), 0
+        ),
+    )
+
+
+class AnswerTreeService:
+    """Дерево ответов: связи всей ветки одним запросом, сборка в памяти без рекурсии"""
+    settings = QuestionSettings
+
+    def __init__(self, answer: models.Answer):
+        self.answer = answer
+
+    def _children(self):
+        children = defaultdict(list)
+        links = (
+            models.Answer.objects.filter(question_id=self.answer.question_id)
+            .order_by('id')
+            .values_list('id', 'parent_id')
+        )
+        for answer_id, parent_id in links:
+            children[parent_id].append(answer_id)
+        return children
+
+    def build(self, depth: int = None, offset: int = 0, limit: int = None):
+        """Ответ с детьми до глубины depth, по limit детей на ответ, дети корня начиная с offset.
+        Нераскрытые ветки можно загрузить отдельным запросом по id ответа, children_count подскажет их размер.
+        """
+        depth = self.settings.answer_tree_depth if depth is None else depth
+        limit = self.settings.answer_children_limit if limit is None else limit
+        children = self._children()
+
+        order = [self.answer.id]
+        parents = {}
+        queue = deque([(self.answer.id, 0)])
+        while queue and len(order) < self.settings.answer_tree_max_nodes:
+            answer_id, level = queue.popleft()
+            if level >= depth:
+                continue
+            start = offset if answer_id == self.answer.id else 0
+            for child_id in children[answer_id][start:start + limit]:
+                if len(order) >= self.settings.answer_tree_max_nodes:
+                    break
+                order.append(child_id)
+                parents[child_id] = answer_id
+                queue.append((child_id, level + 1))
+
+        answers = models.Answer.objects.only('id', 'text', 'question_id').in_bulk(order[1:])
+        answers[self.answer.id] = self.answer
+        nodes = {}
+        for answer_id in order:
+            answer = answers[answer_id]
+            nodes[answer_id] = {
+                'id': answer.id,
+                'text': answer.text,
+                'children': [],
+                'children_count': len(children[answer_id]),
+                'question': answer.question_id,
+            }
+            if answer_id in parents:
+                nodes[parents[answer_id]]['children'].append(nodes[answer_id])
+        return nodes[self.answer.id]
 
 
 def create_follow(question, follower):
     models.QuestionFollowers.objects.create(question=question, follower=follower)
+
+
+def create_question_review(**validated_data):
+    """Отзыв на вопрос и изменение рейтинга в одной транзакции"""
+    with transaction.atomic():
+        review = models.QuestionReview.objects.create(**validated_data)
+        QuestionService(review.question).update_rating(review.grade)
+    return review
+
+
+def create_answer_review(**validated_data):
+    """Отзыв на ответ и изменение рейтинга в одной транзакции"""
+    with transaction.atomic():
+        review = models.AnswerReview.objects.create(**validated_data)
+        AnswerService(review.answer).update_rating(review.grade)
+    return review
+
+
+def reviews_rating(reviews, field: str):
+    """Рейтинг как сумма голосов отзывов, подзапрос по OuterRef('pk')"""
+    votes = Case(When(grade=True, then=Value(1)), default=Value(-1))
+    rating = reviews.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(rating=Sum(votes))
+    return Coalesce(Subquery(rating.values('rating')), 0)
+
+
+def reconcile_ratings():
+    """Пересчет рейтингов вопросов и ответов по отзывам, исправляет расхождения"""
+    question_rating = reviews_rating(models.QuestionReview.objects, 'question')
+    answer_rating = reviews_rating(models.AnswerReview.objects, 'answer')
+    return {
+        'questions': models.Question.objects.exclude(rating=question_rating).update(rating=question_rating),
+        'answers': models.Answer.objects.exclude(rating=answer_rating).update(rating=answer_rating),
+    }
@@ -0,0 +1,5 @@
+class QuestionSettings:
+    answer_tree_depth = 5
+    answer_tree_max_depth = 20
+    answer_children_limit = 20
+    answer_tree_max_nodes = 500
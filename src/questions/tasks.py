@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .services import reconcile_ratings
+
+
+@shared_task
+def reconcile_questions_rating():
+    return reconcile_ratings()
@@ -1,3 +1,6 @@
+from django.db import connection
+from django.test import modify_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -6,7 +9,9 @@ from rest_framework.authtoken.models import Token
 
 from src.profiles.models import FatUser
 
-from .models import Question, QuestionReview, Answer
+from .models import Question, QuestionReview, Answer, AnswerReview
+from .services import AnswerService
+from .tasks import reconcile_questions_rating
 from . import serializers
 
 
@@ -51,6 +56,40 @@ class QuestionApiViewTestCase(APITestCase):
         response = self.client.get(reverse("questions"))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    @modify_settings(MIDDLEWARE={'remove': 'silk.middleware.SilkyMiddleware'})
+    def test_get_question_list_queries(self):
+        for i in range(12):
+            question = Question.objects.create(title=f'title{i}', author=self.user, text='text')
+            for accepted in (True, False, False):
+                Answer.objects.create(author=self.user, text='text', question=question, accepted=accepted)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("questions"))
+        queries = [query for query in context.captured_queries if not query['sql'].startswith('EXPLAIN')]
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(response.data['results'][0]['answer_count'], 3)
+        self.assertEqual(response.data['results'][0]['correct_answers'], 1)
+        response = self.client.get(response.data['next'])
+        question = next(item for item in response.data['results'] if item['id'] == self.question.id)
+        self.assertEqual(question['answer_count'], 2)
+        self.assertEqual(question['correct_answers'], 0)
+
+    @modify_settings(MIDDLEWARE={'remove': 'silk.middleware.SilkyMiddleware'})
+    def test_get_question_list_keyset(self):
+        for i in range(12):
+            Question.objects.create(title=f'title{i}', author=self.user, text='text')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("questions"), {'limit': 5})
+        self.assertIsNone(response.data['count'])
+        self.assertFalse([query for query in context.captured_queries if query['sql'].startswith('SELECT COUNT(*)')])
+        ids = [item['id'] for item in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ids += [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(set(ids)), 10)
+        response = self.client.get(reverse("questions"), {'count': 'true'})
+        self.assertEqual(response.data['count'], 13)
+
     def test_create_answer(self):
         data = {
             'question': self.question.id,
@@ -66,6 +105,29 @@ class QuestionApiViewTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json().get("text"), serialize.data.get("text"))
 
+    def test_get_answer_tree(self):
+        grandchild = Answer.objects.create(
+            author=self.user, text='grandchild', question=self.question, parent=self.answer_2
+        )
+        for i in range(3):
+            Answer.objects.create(author=self.user, text=f'child{i}', question=self.question, parent=self.answer)
+        url = reverse("answer", kwargs={"pk": self.answer.id})
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        queries = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and 'questions_answer' in query['sql']
+        ]
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(response.json()['children_count'], 4)
+        self.assertEqual(response.json()['children'][0]['children'][0]['id'], grandchild.id)
+
+        response = self.client.get(url, {'depth': 1, 'offset': 1, 'limit': 2})
+        children = response.json()['children']
+        self.assertEqual([child['text'] for child in children], ['child0', 'child1'])
+        self.assertEqual(self.client.get(url, {'depth': 1}).json()['children'][0]['children'], [])
+
     def test_get_detail_question(self):
         url = reverse("question", kwargs={"pk": self.question.id})
         response = self.client.get(url)
@@ -120,6 +182,56 @@ class QuestionApiViewTestCase(APITestCase):
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_question_review_rating(self):
+        url = reverse("question-review")
+        self.client.post(url, {'grade': True, 'question': self.question.id})
+        self.question.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(self.question.rating, 1)
+        self.assertEqual(self.user.reputation, 15)
+
+    def test_accept_answer(self):
+        url = f'/api/v1/questions/answer/{self.answer.id}/accept'
+        Answer.objects.filter(id=self.answer.id).update(rating=3)
+        response = self.client.patch(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['accepted'])
+        self.answer.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertTrue(self.answer.accepted)
+        self.assertEqual(self.answer.rating, 3)
+        self.assertEqual(self.user.reputation, 20)
+
+        self.client.patch(url)
+        self.answer.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertFalse(self.answer.accepted)
+        self.assertEqual(self.user.reputation, 0)
+
+    def test_accept_answer_stale(self):
+        stale = Answer.objects.get(id=self.answer.id)
+        AnswerService(Answer.objects.get(id=self.answer.id)).update_accept()
+        # второй запрос прочитал ответ до принятия первым
+        answer = AnswerService(stale).update_accept()
+        self.user.refresh_from_db()
+        self.assertTrue(answer.accepted)
+        self.assertEqual(self.user.reputation, 20)
+
+    def test_reconcile_rating(self):
+        other = FatUser.objects.create_user(username='user3', password='password3', email='other@mail.ru')
+        QuestionReview.objects.create(question=self.question, user=self.user, grade=True)
+        QuestionReview.objects.create(question=self.question, user=other, grade=True)
+        AnswerReview.objects.create(answer=self.answer, user=self.user, grade=False)
+        Question.objects.filter(id=self.question.id).update(rating=7)
+
+        self.assertEqual(reconcile_questions_rating(), {'questions': 1, 'answers': 1})
+        self.question.refresh_from_db()
+        self.answer.refresh_from_db()
+        self.answer_2.refresh_from_db()
+        self.assertEqual(self.question.rating, 2)
+        self.assertEqual(self.answer.rating, -1)
+        self.assertEqual(self.answer_2.rating, 0)
+
     def test_repeat_question_review(self):
         QuestionReview.objects.create(
             question=self.question,
@@ -1,16 +1,21 @@
-from django.db.models import Prefetch
+from django.db.models import Prefetch, Count
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated, AllowAny
 
 from .permissions import IsNotFollower
 from ..base.permissions import IsAuthor
-from ..base.classes import MixedPermissionSerializer, MixedPermission
+from ..base.classes import CountedView, KeysetPagination, MixedPermissionSerializer, MixedPermission
 from .models import Question, Answer, QuestionReview, AnswerReview, QuestionFollowers
 from . import serializers
+from .services import annotate_answers_count
 
 
-class QuestionView(MixedPermissionSerializer, ModelViewSet):
+class QuestionView(CountedView, MixedPermissionSerializer, ModelViewSet):
     """CRUD вопроса"""
+    pagination_class = KeysetPagination
+    # list: токен, страница, теги и COUNT при ?count=true
+    # retrieve: +1 UPDATE просмотров, если кэш не общий и ViewCounter пишет сразу в базу
+    query_budget = {'list': 4, 'retrieve': 5}
     serializer_classes_by_action = {
         "list": serializers.ListQuestionSerializer,
         "retrieve": serializers.RetrieveQuestionSerializer,
@@ -29,12 +34,11 @@ class QuestionView(MixedPermissionSerializer, ModelViewSet):
     }
 
     def get_queryset(self):
-        answers = Answer.objects.select_related('author')
-        queryset = Question.objects.select_related('author').prefetch_related(
-            Prefetch('answers', queryset=answers),
-            'tags'
-        ).all()
-        return queryset
+        queryset = Question.objects.select_related('author').prefetch_related('tags')
+        if self.action == 'list':
+            return annotate_answers_count(queryset)
+        answers = Answer.objects.select_related('author').annotate(children_count=Count('children'))
+        return queryset.prefetch_related(Prefetch('answers', queryset=answers))
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -42,6 +46,8 @@ class QuestionView(MixedPermissionSerializer, ModelViewSet):
 
 class AnswerView(MixedPermissionSerializer, ModelViewSet):
     """CRUD ответа"""
+    # токен, ответ, автор, связи всей ветки одним запросом и ответы дерева одним in_bulk при любой глубине
+    query_budget = {'retrieve': 5}
     queryset = Answer.objects.all()
     permission_classes = (IsAuthor,)
     permission_classes_by_action = {
@@ -82,6 +88,7 @@ class UpdateAnswerAccept(ModelViewSet):
 
 class QuestionFollower(MixedPermission, ModelViewSet):
     """Представление подписчиков на вопрос"""
+    query_budget = {'list': 3}
     serializer_class = serializers.FollowerQuestionSerializer
     permission_classes = (IsAuthenticated,)
     permission_classes_by_action = {
@@ -0,0 +1,107 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.cache import cache
+
+
+class RateLimitExceeded(Exception):
+    """Исчерпан лимит запросов GitHub API"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f'GitHub rate limit exceeded, retry after {retry_after}s')
+        self.retry_after = retry_after
+
+
+class GitHubResponse(NamedTuple):
+    data: object
+    links: dict
+
+
+class GitHubClient:
+    """Клиент GitHub API с общим пулом соединений и условными запросами по ETag"""
+    timeout = 10
+    max_workers = 4
+    etag_timeout = 60 * 60 * 24
+    rate_limit_retry = 60
+    _session = None
+
+    def __init__(self, base_url: str = None):
+        self._base_url = base_url
+        self.rate_limit_remaining = None
+        self.rate_limit_reset = None
+
+    @property
+    def base_url(self):
+        return (self._base_url or settings.GITHUB_API_URL).rstrip('/')
+
+    @classmethod
+    def get_session(cls):
+        """Общая для процесса сессия, соединения переиспользуются между запросами"""
+        if cls._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=cls.max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['Accept'] = 'application/vnd.github+json'
+            cls._session = session
+        return cls._session
+
+    def retry_after(self):
+        """Секунды до сброса лимита запросов"""
+        if self.rate_limit_reset is None:
+            return self.rate_limit_retry
+        return max(int(self.rate_limit_reset - time.time()), 1)
+
+    def rate_limit_exhausted(self, reserve: int = 0) -> bool:
+        """Осталось не больше reserve запросов и лимит еще не сброшен.
+        После времени сброса сохраненный остаток устарел и забывается.
+        """
+        if self.rate_limit_remaining is None:
+            return False
+        if self.rate_limit_reset is not None and time.time() >= self.rate_limit_reset:
+            self.rate_limit_remaining = None
+            return False
+        return self.rate_limit_remaining <= reserve
+
+    def _update_rate_limit(self, response):
+        if 'X-RateLimit-Remaining' in response.headers:
+            self.rate_limit_remaining = int(response.headers['X-RateLimit-Remaining'])
+        if 'X-RateLimit-Reset' in response.headers:
+            self.rate_limit_reset = int(response.headers['X-RateLimit-Reset'])
+        if response.status_code in (403, 429) and (
+                self.rate_limit_remaining == 0 or 'Retry-After' in response.headers
+        ):
+            retry_after = response.headers.get('Retry-After')
+            raise RateLimitExceeded(int(retry_after) if retry_after else self.retry_after())
+
+    def fetch(self, path: str) -> GitHubResponse:
+        """GET запрос с разбором Link, при неизменном ETag ответ берется из кэша"""
+        url = f'{self.base_url}{path}'
+        cache_key = f'github:{url}'
+        cached = cache.get(cache_key)
+        headers = {'If-None-Match': cached[0]} if cached is not None else {}
+        response = self.get_session().get(url, headers=headers, timeout=self.timeout)
+        self._update_rate_limit(response)
+        if response.status_code == 304 and cached is not None:
+            return cached[1]
+        result = GitHubResponse(response.json(), response.links)
+        if response.ok and response.headers.get('ETag'):
+            cache.set(cache_key, (response.headers['ETag'], result), self.etag_timeout)
+        return result
+
+    def get(self, path: str):
+        """GET запрос, возвращает тело ответа"""
+        return self.fetch(path).data
+
+    def fetch_many(self, *paths: str):
+        """Параллельные GET запросы, результаты в порядке путей"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self.fetch, paths))
+
+    def get_many(self, *paths: str):
+        """Параллельные GET запросы, тела ответов в порядке путей"""
+        return [response.data for response in self.fetch_many(*paths)]
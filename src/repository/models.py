@@ -62,6 +62,7 @@ class Project(models.Model):
     fork = models.PositiveIntegerField(blank=True, null=True)
     commit = models.PositiveIntegerField(blank=True, null=True)
     last_commit = models.DateTimeField(blank=True, null=True)
+    stats_updated = models.DateTimeField(blank=True, null=True, db_index=True)
 
     def __str__(self):
         return self.name
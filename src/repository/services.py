@@ -1,15 +1,20 @@
-import requests
+import logging
+from urllib.parse import parse_qs, urlparse
 
-from github import Github
+from django.db.models import F, Q
+from django.utils import timezone
 
-from . import utils
+from .client import GitHubClient, RateLimitExceeded
 from .interfaces import Repository
 from ..team.models import Team
 from . import models
 from ..base import exceptions
+from ..base.service import check_ids, found_ids, ids_error, missing_ids, sync_m2m
+from .settings import RepositorySettings
 
 
-github = Github()
+logger = logging.getLogger(__name__)
+client = GitHubClient()
 
 
 def get_github_account_id(user):
@@ -20,111 +25,102 @@ def get_github_account_id(user):
         raise exceptions.BadAccount()
 
 
-def get_my_repository(repository, account_id):
-    """Поиск репозитория пользователя"""
-    nik = get_nik(repository, account_id)
-    user_repos = get_user_repos(nik)
-    cur_repo = repository.split('/')[-1]
-    if cur_repo in user_repos:
-        return cur_repo, nik
-    else:
-        raise exceptions.BadAccountAuthor()
-
-
-def get_nik(repository, account_id):
-    """Поиск id github пользователя"""
-    cur_nik = repository.split('/')[-2]
-    user_info = requests.get(f'https://api.github.com/users/{cur_nik}/repos').json()
-    cur_id = user_info[0]['owner']['id']
-    if str(cur_id) == account_id:
-        return cur_nik
-    raise exceptions.BadAccountId()
-
-
-def get_user_repos(nik):
-    """Поиск всех репозиториев пользователя"""
-    user_info = requests.get(f'https://api.github.com/users/{nik}/repos')
-    repos = user_info.json()
-    user_repos = []
-    for repo in repos:
-        user_repos.append(repo.get('name'))
-    return user_repos
-
-
-def get_stars_count(nik, repo):
-    """Получение колличества звезд репозитория"""
-    repo_info = requests.get('https://api.github.com/repos/' + nik + '/' + repo)
-    return repo_info.json()['stargazers_count']
-
-
-def get_forks_count(nik, repo):
-    """Получение колличества форков репозитория"""
-    repo_info = requests.get('https://api.github.com/repos/' + nik + '/' + repo)
-    return repo_info.json()['forks_count']
-
-
-def get_last_commit(nik, repo):
-    """Получение даты последнего комментария репозитория"""
-    repo_info = requests.get(f'https://api.github.com/repos/{nik}/{repo}/commits')
-    return repo_info.json()[0]['commit']['author']['date']
-
-
-def get_commits_count(nik, repo):
-    """Получение даты последнего комментария репозитория"""
-    repo_info = requests.get(f'https://api.github.com/repos/{nik}/{repo}/commits')
-    commits_count = 0
-    commits = repo_info.json()
-    for commit in commits:
-        commits_count += 1
-    return commits_count
-
-
-def get_repository(repository):
-    """Получение провайдера github"""
-    return github.get_repo(f'{"/".join(repository.split("/")[-2:])}')
+def check_my_repository(user_repos, repo, account_id):
+    """Проверка, что репозиторий принадлежит аккаунту github пользователя"""
+    if not isinstance(user_repos, list) or not user_repos or str(user_repos[0]['owner']['id']) != account_id:
+        raise exceptions.BadAccountId()
+    for user_repo in user_repos:
+        if user_repo.get('name') == repo:
+            return user_repo
+    raise exceptions.BadAccountAuthor()
+
+
+def last_commit_date(commits):
+    """Дата автора последнего коммита, None если коммитов нет"""
+    return commits[0]['commit']['author']['date'] if commits else None
+
+
+def get_repository_stats(nik, repo):
+    """Звезды, форки, количество коммитов и дата последнего коммита репозитория"""
+    repo_info, commits = client.fetch_many(f'/repos/{nik}/{repo}', f'/repos/{nik}/{repo}/commits?per_page=1')
+    if 'stargazers_count' not in repo_info.data or not isinstance(commits.data, list):
+        return None
+    commits_count = len(commits.data)
+    if 'last' in commits.links:
+        commits_count = int(parse_qs(urlparse(commits.links['last']['url']).query)['page'][0])
+    return Repository(
+        repo_info.data['stargazers_count'], repo_info.data['forks_count'], commits_count,
+        last_commit_date(commits.data)
+    )
 
 
 def get_projects_stats(projects):
-    """Получение звезд проектов"""
-    for project in projects:
-        repository = get_repository(project.repository)
-        utils.repository_stats(project, repository)
+    """Обновление статистики github проектов одним bulk_update"""
+    refreshed = []
+    try:
+        for project in projects:
+            if client.rate_limit_exhausted(RepositorySettings.rate_limit_reserve):
+                raise RateLimitExceeded(client.retry_after())
+            try:
+                repo_info = get_repository_stats(*project.repository.split('/')[-2:])
+            except RateLimitExceeded:
+                raise
+            except Exception:
+                # Ошибка одного проекта не должна останавливать очередь: время обновления
+                # все равно ставится, и проект уходит в конец очереди до следующего устаревания
+                logger.exception('Не удалось обновить статистику проекта %s', project.pk)
+                repo_info = None
+            if repo_info is not None:
+                project.star = repo_info.stars_count
+                project.fork = repo_info.forks_count
+                project.commit = repo_info.commits_count
+                project.last_commit = repo_info.last_commit
+            project.stats_updated = timezone.now()
+            refreshed.append(project)
+    finally:
+        models.Project.objects.bulk_update(refreshed, ['star', 'fork', 'commit', 'last_commit', 'stats_updated'])
     return projects
 
 
-def get_project_stats(project):
-    """Получение звезд проекта"""
-    repository = get_repository(project.repository)
-    utils.repository_stats(project, repository)
-    return project
+def refresh_stale_projects():
+    """Обновление устаревшей статистики проектов пачками, сначала давно не обновлявшиеся и популярные"""
+    refreshed = 0
+    while True:
+        stale_date = timezone.now() - RepositorySettings.stats_stale_after
+        projects = list(
+            models.Project.objects
+            .filter(Q(stats_updated__isnull=True) | Q(stats_updated__lt=stale_date))
+            .order_by(F('stats_updated').asc(nulls_first=True), F('star').desc(nulls_last=True), 'id')
+            .only('id', 'repository', 'star', 'fork', 'commit', 'last_commit', 'stats_updated')
+            [:RepositorySettings.stats_batch_size]
+        )
+        if not projects:
+            return refreshed
+        get_projects_stats(projects)
+        refreshed += len(projects)
 
 
 def get_repo(repository, account_id) -> Repository:
     """Получение звезд, форков, комментариев, последнего комментария проекта"""
-    repo, nik = get_my_repository(repository, account_id)
-    stars_count = get_stars_count(nik, repo)
-    forks_count = get_forks_count(nik, repo)
-    commits_count = get_commits_count(nik, repo)
-    last_commit = get_last_commit(nik, repo)
-    return Repository(stars_count, forks_count, commits_count, last_commit)
+    nik, repo = repository.split('/')[-2:]
+    user_repos, commits = client.get_many(f'/users/{nik}/repos', f'/repos/{nik}/{repo}/commits')
+    cur_repo = check_my_repository(user_repos, repo, account_id)
+    if not isinstance(commits, list):
+        commits = []
+    return Repository(cur_repo['stargazers_count'], cur_repo['forks_count'], len(commits), last_commit_date(commits))
 
 
 def check_teams(teams):
     """Проверка, есть ли у комманды уже проект"""
-    for team in teams:
-        cur_team = models.Project.objects.filter(teams=team).exists()
-        if cur_team:
-            raise exceptions.TeamExists()
+    with_project = found_ids(models.Project.teams.through.objects.all(), teams, 'team_id')
+    if with_project:
+        raise ids_error(exceptions.TeamExists, with_project)
     return teams
 
 
 def check_my_teams(teams, user):
     """Проверка автора команд"""
-    for team in teams:
-        team = Team.objects.filter(user=user, id=team.id).exists()
-        if not team:
-            raise exceptions.TeamAuthor()
-    return teams
+    return check_ids(Team.objects.filter(user=user), teams, exceptions.TeamAuthor)
 
 
 def check_repo(repo):
@@ -149,10 +145,8 @@ def check_instance_repo(pk, repository):
 
 def check_instance_teams(teams, pk):
     """Проверка команды для обновления"""
-    for team in teams:
-        team = models.Project.objects.filter(id=pk, teams=team).exists()
-        if not team:
-            return False
+    if missing_ids(models.Project.teams.through.objects.filter(project_id=pk), teams, 'team_id'):
+        return False
     return teams
 
 
@@ -184,21 +178,15 @@ def project_create(repo_info, user, repository, teams, toolkit, **validated_data
         repository=repository,
         **validated_data
     )
-    for team in teams:
-        project.teams.add(team)
-    for toolkit in toolkit:
-        project.toolkit.add(toolkit)
+    sync_m2m(project, 'teams', teams, created=True)
+    sync_m2m(project, 'toolkit', toolkit, created=True)
     return project
 
 
 def project_update(instance, repo_info, teams, toolkits):
     """Обновление проекта"""
-    instance.teams.clear()
-    instance.toolkit.clear()
-    for team in teams:
-        instance.teams.add(team)
-    for toolkit in toolkits:
-        instance.toolkit.add(toolkit)
+    sync_m2m(instance, 'teams', teams)
+    sync_m2m(instance, 'toolkit', toolkits)
     instance.stars_count = repo_info.stars_count
     instance.forks_count = repo_info.forks_count
     instance.commits_count = repo_info.commits_count
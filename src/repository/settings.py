@@ -0,0 +1,7 @@
+from datetime import timedelta
+
+
+class RepositorySettings:
+    stats_batch_size = 50
+    stats_stale_after = timedelta(hours=12)
+    rate_limit_reserve = 10
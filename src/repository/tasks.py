@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from .client import RateLimitExceeded
+from .services import refresh_stale_projects
+
+
+@shared_task(bind=True, max_retries=None)
+def refresh_projects_stats(self):
+    """Обновление статистики github проектов, при исчерпании лимита откладывается до его сброса"""
+    try:
+        return refresh_stale_projects()
+    except RateLimitExceeded as exc:
+        raise self.retry(exc=exc, countdown=exc.retry_after)
@@ -1,15 +1,26 @@
 import io
+import json
+import threading
+import time
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
 from PIL import Image
 
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
 
 
+from src.base import exceptions
 from src.profiles.models import FatUser, Account
-from src.repository import models
+from src.repository import models, services
+from src.repository.client import GitHubClient, RateLimitExceeded
+from src.repository.tasks import refresh_projects_stats
 from src.team.models import Team, TeamMember
 
 
@@ -449,3 +460,169 @@ class ProjectTest(APITestCase):
                                             kwargs={'pk': self.project1.id}), data=data, format='multipart')
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.status_code, 400)
+
+
+class GitHubStubHandler(BaseHTTPRequestHandler):
+    """Заглушка GitHub API"""
+    routes = {
+        '/users/octocat/repos': [
+            {'name': 'hello', 'owner': {'id': 42}, 'stargazers_count': 7, 'forks_count': 3},
+        ],
+        '/repos/octocat/hello/commits': [
+            {'commit': {'author': {'date': '2022-11-01T10:00:00Z'}, 'committer': {'date': '2022-11-02T10:00:00Z'}}},
+            {'commit': {'author': {'date': '2022-10-01T10:00:00Z'}, 'committer': {'date': '2022-10-01T10:00:00Z'}}},
+        ],
+        '/repos/octocat/hello': {'stargazers_count': 7, 'forks_count': 3},
+        '/repos/octocat/hello/commits?per_page=1': [
+            {'commit': {'author': {'date': '2022-11-01T10:00:00Z'}, 'committer': {'date': '2022-11-02T10:00:00Z'}}},
+        ],
+    }
+    route_headers = {
+        '/repos/octocat/hello/commits?per_page=1': {
+            'Link': '<http://github/repos/octocat/hello/commits?per_page=1&page=2>; rel="next", '
+                    '<http://github/repos/octocat/hello/commits?per_page=1&page=25>; rel="last"',
+        },
+    }
+    rate_limit_remaining = 5000
+    rate_limit_reset = 0
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        etag = f'"{self.path}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(self.routes.get(self.path, {'message': 'Not Found'})).encode()
+        self.send_response(200 if self.path in self.routes else 404)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', etag)
+        self.send_header('X-RateLimit-Remaining', str(self.rate_limit_remaining))
+        self.send_header('X-RateLimit-Reset', str(self.rate_limit_reset))
+        for header, value in self.route_headers.get(self.path, {}).items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GitHubClientTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), GitHubStubHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.settings = override_settings(GITHUB_API_URL=f'http://127.0.0.1:{cls.server.server_port}')
+        cls.settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        GitHubStubHandler.requests.clear()
+        GitHubStubHandler.rate_limit_remaining = 5000
+        GitHubStubHandler.rate_limit_reset = 0
+        services.client.rate_limit_remaining = None
+        services.client.rate_limit_reset = None
+
+    def test_get_repo(self):
+        repo_info = services.get_repo('https://github.com/octocat/hello', '42')
+        self.assertEqual(repo_info.stars_count, 7)
+        self.assertEqual(repo_info.forks_count, 3)
+        self.assertEqual(repo_info.commits_count, 2)
+        self.assertEqual(repo_info.last_commit, '2022-11-01T10:00:00Z')
+        self.assertEqual(len(GitHubStubHandler.requests), 2)
+
+    def test_get_repo_bad_account(self):
+        with self.assertRaises(exceptions.BadAccountId):
+            services.get_repo('https://github.com/octocat/hello', '1')
+
+    def test_get_repo_not_author(self):
+        with self.assertRaises(exceptions.BadAccountAuthor):
+            services.get_repo('https://github.com/octocat/world', '42')
+
+    def test_etag(self):
+        client = GitHubClient()
+        first = client.get('/users/octocat/repos')
+        second = client.get('/users/octocat/repos')
+        self.assertEqual(first, second)
+        self.assertEqual(len(GitHubStubHandler.requests), 2)
+
+    def create_project(self, name, repository):
+        user = FatUser.objects.create(username=name, email=f'{name}@mail.ru', password='test')
+        category = models.Category.objects.get_or_create(id=1, defaults={'name': 'category'})[0]
+        return models.Project.objects.create(
+            name=name,
+            description='test',
+            user=user,
+            category=category,
+            repository=repository
+        )
+
+    def test_refresh_projects_stats(self):
+        project = self.create_project('hello', 'https://github.com/octocat/hello')
+        missing = self.create_project('missing', 'https://github.com/octocat/missing')
+
+        self.assertEqual(refresh_projects_stats(), 2)
+
+        project.refresh_from_db()
+        missing.refresh_from_db()
+        self.assertEqual((project.star, project.fork, project.commit), (7, 3, 25))
+        self.assertEqual(project.last_commit.isoformat(), '2022-11-01T10:00:00+00:00')
+        self.assertIsNotNone(project.stats_updated)
+        self.assertIsNone(missing.star)
+        self.assertIsNotNone(missing.stats_updated)
+        self.assertEqual(refresh_projects_stats(), 0)
+
+    def test_refresh_projects_stats_rate_limit(self):
+        project = self.create_project('hello', 'https://github.com/octocat/hello')
+        other = self.create_project('other', 'https://github.com/octocat/hello')
+        GitHubStubHandler.rate_limit_remaining = 1
+        GitHubStubHandler.rate_limit_reset = int(time.time()) + 3600
+
+        with self.assertRaises(RateLimitExceeded):
+            services.refresh_stale_projects()
+
+        project.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(project.star, 7)
+        self.assertIsNone(other.stats_updated)
+
+    def test_refresh_projects_stats_after_reset(self):
+        project = self.create_project('hello', 'https://github.com/octocat/hello')
+        services.client.rate_limit_remaining = 0
+        services.client.rate_limit_reset = time.time() - 1
+
+        self.assertEqual(services.refresh_stale_projects(), 1)
+
+        project.refresh_from_db()
+        self.assertEqual(project.star, 7)
+        self.assertEqual(services.client.rate_limit_remaining, 5000)
+
+    def test_refresh_projects_stats_error_skipped(self):
+        broken = self.create_project('broken', 'https://github.com/octocat/broken')
+        project = self.create_project('hello', 'https://github.com/octocat/hello')
+        get_stats = services.get_repository_stats
+
+        def get_repository_stats(nik, repo):
+            if repo == 'broken':
+                raise requests.ConnectionError('connection reset')
+            return get_stats(nik, repo)
+
+        with mock.patch.object(services, 'get_repository_stats', get_repository_stats), \
+                self.assertLogs('src.repository.services', 'ERROR'):
+            self.assertEqual(services.refresh_stale_projects(), 2)
+
+        broken.refresh_from_db()
+        project.refresh_from_db()
+        self.assertIsNotNone(broken.stats_updated)
+        self.assertEqual(project.star, 7)
+        self.assertEqual(services.refresh_stale_projects(), 0)
@@ -6,27 +6,33 @@ from rest_framework import parsers
 from . import serializers, models
 from .filters import ProjectFilter
 from .permissions import IsMemberTeam
-from ..base.classes import MixedPermissionSerializer, MixedSerializer
+from ..base.classes import KeysetPagination, MixedPermissionSerializer, MixedSerializer, CachedResponse
 from ..base.permissions import IsUser
 from ..team.models import Team
 from ..dashboard.models import Board
 from .permissions import IsAuthorProject
 
 
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(CachedResponse, generics.ListAPIView):
     """Представление категорий"""
-    queryset = models.Category.objects.prefetch_related('projects').all()
+    query_budget = 3
+    queryset = models.Category.objects.all()
     serializer_class = serializers.CategorySerializer
+    cache_models = (models.Category,)
 
 
-class ToolkitListView(generics.ListAPIView):
+class ToolkitListView(CachedResponse, generics.ListAPIView):
     """Представление инструментов"""
-    queryset = models.Toolkit.objects.prefetch_related('projects').all()
+    query_budget = 3
+    queryset = models.Toolkit.objects.all()
     serializer_class = serializers.ToolkitSerializer
+    cache_models = (models.Toolkit,)
 
 
 class ProjectsView(MixedPermissionSerializer, viewsets.ModelViewSet):
     """CRUD проекта"""
+    query_budget = {'list': 4, 'retrieve': 4}
+    pagination_class = KeysetPagination
     permission_classes_by_action = {
         'list': (permissions.IsAuthenticated,),
         'retrieve': (permissions.IsAuthenticated,),
@@ -60,6 +66,7 @@ class ProjectsView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
 class UserProjectsView(MixedPermissionSerializer, viewsets.ModelViewSet):
     """Список проектов пользователя"""
+    query_budget = {'list': 5}
     permission_classes_by_action = {
         'list': (permissions.IsAuthenticated,)
     }
@@ -74,6 +81,7 @@ class UserProjectsView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
 class MemberProjectTeamsView(MixedPermissionSerializer, viewsets.ModelViewSet):
     """Список команд проекта, если ты участник команды"""
+    query_budget = {'list': 4}
     permission_classes_by_action = {
         'list': (IsMemberTeam,)
     }
@@ -87,6 +95,8 @@ class MemberProjectTeamsView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
 class MemberProjectBoardView(MixedPermissionSerializer, viewsets.ModelViewSet):
     """Доска задач проекта, если ты участник команды"""
+    # представление сейчас падает с ошибкой, бюджет задать после исправления
+    query_budget = None
     permission_classes_by_action = {
         'list': (IsMemberTeam,)
     }
@@ -100,6 +110,7 @@ class MemberProjectBoardView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
 class AvatarView(MixedPermissionSerializer, viewsets.ModelViewSet):
     """Аватар проекта"""
+    query_budget = {'list': 3}
     parser_classes = (parsers.MultiPartParser,)
     serializer_classes_by_action = serializers.AvatarProjectSerializer
     permission_classes_by_action = {
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import SearchDocument
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'object_id', 'title', 'updated')
+    list_filter = ('kind',)
+    search_fields = ('title',)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from src.search.services import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Построение поискового индекса заново'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        total = rebuild_index(options['batch_size'])
+        self.stdout.write(f'Проиндексировано документов: {total}')
@@ -0,0 +1,39 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+
+
+class VectorIndex(GinIndex):
+    """GIN индекс поискового вектора, в других базах обычный индекс для запуска тестов"""
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return models.Index.create_sql(self, model, schema_editor, using=using, **kwargs)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
+class SearchDocument(models.Model):
+    """Документ общего поискового индекса"""
+    KINDS = (
+        ('course', 'Курс'),
+        ('lesson', 'Урок'),
+        ('article', 'Статья'),
+        ('question', 'Вопрос'),
+        ('project', 'Проект'),
+        ('team', 'Команда'),
+    )
+    kind = models.CharField(max_length=20, choices=KINDS)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=500)
+    body = models.TextField(blank=True)
+    updated = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_document_unique'),
+        ]
+        indexes = [VectorIndex(fields=['search_vector'], name='search_document_vector_gin')]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
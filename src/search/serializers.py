@@ -0,0 +1,21 @@
+from rest_framework import serializers
+
+from . import models
+from .services import highlight, render_headline
+
+
+class SearchDocumentSerializer(serializers.ModelSerializer):
+    """Найденный объект"""
+    type = serializers.CharField(source='kind')
+    id = serializers.IntegerField(source='object_id')
+    rank = serializers.FloatField()
+    snippet = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.SearchDocument
+        fields = ('type', 'id', 'title', 'snippet', 'rank')
+
+    def get_snippet(self, obj):
+        if hasattr(obj, 'snippet'):
+            return render_headline(obj.snippet)
+        return highlight(obj.body, self.context['request'].query_params.get('q', ''))
@@ -0,0 +1,155 @@
+import re
+from typing import NamedTuple
+
+from django.apps import apps
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.utils.html import escape
+
+from src.base.service import full_text_supported
+
+from .models import SearchDocument
+from .settings import SearchSettings
+
+
+# Границы совпадений в фрагменте из базы, заменяются на теги после экранирования текста
+HEADLINE_START = '\x02'
+HEADLINE_STOP = '\x03'
+
+
+class Source(NamedTuple):
+    kind: str
+    title: str
+    body: tuple
+    filters: dict
+
+
+sources = {
+    'courses.course': Source('course', 'name', ('description',), {}),
+    'courses.lesson': Source('lesson', 'name', ('description', 'hint'), {}),
+    'knowledge.article': Source('article', 'title', ('text',), {'published': True}),
+    'questions.question': Source('question', 'title', ('text',), {}),
+    'repository.project': Source('project', 'name', ('description',), {}),
+    'team.team': Source('team', 'name', ('tagline',), {}),
+}
+
+
+def get_source(model):
+    return sources.get(model._meta.label_lower)
+
+
+def document_vector():
+    """Вектор документа: заголовок весомее текста"""
+    config = SearchSettings.search_config
+    return SearchVector('title', weight='A', config=config) + SearchVector('body', weight='B', config=config)
+
+
+def update_vectors(queryset):
+    """Пересчитать сохраненные векторы одним UPDATE"""
+    if full_text_supported():
+        queryset.update(search_vector=document_vector())
+
+
+def make_document(source: Source, instance) -> SearchDocument:
+    return SearchDocument(
+        kind=source.kind,
+        object_id=instance.pk,
+        title=getattr(instance, source.title),
+        body='\n'.join(getattr(instance, field) or '' for field in source.body),
+    )
+
+
+def index_object(instance):
+    """Добавить или обновить документ объекта, скрытые объекты убираются из индекса"""
+    source = get_source(type(instance))
+    if any(getattr(instance, field) != value for field, value in source.filters.items()):
+        remove_object(instance)
+        return
+    document = make_document(source, instance)
+    with transaction.atomic():
+        document, _ = SearchDocument.objects.update_or_create(
+            kind=document.kind,
+            object_id=document.object_id,
+            defaults={'title': document.title, 'body': document.body},
+        )
+        update_vectors(SearchDocument.objects.filter(pk=document.pk))
+
+
+def remove_object(instance):
+    source = get_source(type(instance))
+    SearchDocument.objects.filter(kind=source.kind, object_id=instance.pk).delete()
+
+
+def rebuild_index(batch_size: int = None) -> int:
+    """Построить индекс заново пачками по batch_size, возвращает число документов"""
+    batch_size = batch_size or SearchSettings.rebuild_batch_size
+    total = 0
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for label, source in sources.items():
+            queryset = (
+                apps.get_model(label).objects.filter(**source.filters)
+                .only('pk', source.title, *source.body)
+                .order_by('pk')
+            )
+            last_pk = 0
+            while True:
+                batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                SearchDocument.objects.bulk_create([make_document(source, instance) for instance in batch])
+                total += len(batch)
+                last_pk = batch[-1].pk
+        update_vectors(SearchDocument.objects.all())
+    return total
+
+
+def search(query: str, kinds=None):
+    """Документы по запросу с рангом rank и фрагментом snippet, лучшие первыми.
+    Фрагмент не экранирован и выводится через render_headline.
+    Без PostgreSQL поиск идет по вхождению подстроки, фрагмент строит сериализатор.
+    """
+    queryset = SearchDocument.objects.all()
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    if not full_text_supported():
+        return queryset.filter(Q(title__icontains=query) | Q(body__icontains=query)).annotate(
+            rank=Case(When(title__icontains=query, then=Value(1.0)), default=Value(0.5), output_field=FloatField())
+        ).order_by('-rank', '-updated', '-id')
+    search_query = SearchQuery(query, config=SearchSettings.search_config, search_type='websearch')
+    return queryset.filter(search_vector=search_query).annotate(
+        rank=SearchRank(F('search_vector'), search_query),
+        snippet=SearchHeadline(
+            'body',
+            search_query,
+            config=SearchSettings.search_config,
+            start_sel=HEADLINE_START,
+            stop_sel=HEADLINE_STOP,
+            max_words=SearchSettings.headline_words,
+        ),
+    ).filter(rank__gte=SearchSettings.search_min_rank).order_by('-rank', '-updated', '-id')
+
+
+def render_headline(headline: str) -> str:
+    """Фрагмент из базы в HTML: текст экранируется, совпадения выделяются тегами headline_start/stop"""
+    return escape(headline or '').replace(HEADLINE_START, SearchSettings.headline_start).replace(
+        HEADLINE_STOP, SearchSettings.headline_stop
+    )
+
+
+def highlight(text: str, query: str) -> str:
+    """Фрагмент текста в HTML вокруг первого совпадения с выделенными словами запроса, текст экранируется"""
+    text = text or ''
+    words = [re.escape(word) for word in query.split() if word]
+    if not words:
+        return escape(text[:SearchSettings.headline_chars])
+    pattern = re.compile(f"({'|'.join(words)})", re.IGNORECASE)
+    match = pattern.search(text)
+    start = max(match.start() - SearchSettings.headline_chars // 2, 0) if match else 0
+    # split с группой чередует текст между совпадениями и сами совпадения
+    pieces = pattern.split(text[start:start + SearchSettings.headline_chars])
+    return ''.join(
+        f'{SearchSettings.headline_start}{escape(piece)}{SearchSettings.headline_stop}' if index % 2 else escape(piece)
+        for index, piece in enumerate(pieces)
+    )
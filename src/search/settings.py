@@ -0,0 +1,8 @@
+class SearchSettings:
+    search_config = 'russian'
+    search_min_rank = 0.001
+    headline_words = 35
+    headline_chars = 200
+    headline_start = '<mark>'
+    headline_stop = '</mark>'
+    rebuild_batch_size = 1000
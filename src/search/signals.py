@@ -0,0 +1,20 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .services import index_object, remove_object, sources
+
+
+def update_document(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(instance)
+
+
+def delete_document(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+# Обработчики только у индексируемых моделей: post_delete без sender отключает быстрое удаление во всем проекте
+for label in sources:
+    model = apps.get_model(label)
+    post_save.connect(update_document, sender=model, dispatch_uid=f'search_index_object:{label}')
+    post_delete.connect(delete_document, sender=model, dispatch_uid=f'search_remove_object:{label}')
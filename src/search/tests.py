@@ -0,0 +1,117 @@
+import io
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.deletion import Collector
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from src.courses.models import Category as CourseCategory, Course, Lesson
+from src.knowledge.models import Article
+from src.profiles.models import FatUser
+from src.questions.models import Question
+from src.repository.models import Category as ProjectCategory, Project
+from src.search import services
+from src.search.models import SearchDocument
+from src.team.models import Invitation, Team
+
+
+class SearchTest(APITestCase):
+    def setUp(self):
+        self.user = FatUser.objects.create(username='user', password='V97tn7M4rU', email='user@example.com')
+        category = CourseCategory.objects.create(name='python')
+        self.course = Course.objects.create(
+            name='Django course', description='Web on django', author=self.user, category=category
+        )
+        Lesson.objects.create(
+            name='Models', description='Django models', lesson_type='python', course=self.course, slug='models'
+        )
+        self.article = Article.objects.create(title='Django ORM', text='Queries in django', published=True)
+        Question.objects.create(title='How to start?', text='Django or flask', author=self.user)
+        Project.objects.create(
+            name='Blog', description='Blog on django', user=self.user,
+            category=ProjectCategory.objects.create(name='web'), repository='blog'
+        )
+        Team.objects.create(name='Django team', tagline='We love python', user=self.user)
+
+    def test_search_all_kinds(self):
+        response = self.client.get(reverse('search'), {'q': 'django'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        kinds = {result['type'] for result in response.data['results']}
+        self.assertEqual(kinds, {'course', 'lesson', 'article', 'question', 'project', 'team'})
+        self.assertEqual(response.data['results'][0]['rank'], 1.0)
+
+    def test_search_type_filter(self):
+        response = self.client.get(reverse('search'), {'q': 'django', 'type': 'article,team'})
+        results = {(result['type'], result['title']) for result in response.data['results']}
+        self.assertEqual(results, {('article', 'Django ORM'), ('team', 'Django team')})
+
+    def test_search_snippet(self):
+        response = self.client.get(reverse('search'), {'q': 'queries', 'type': 'article'})
+        self.assertEqual(response.data['results'][0]['id'], self.article.id)
+        self.assertIn('<mark>Queries</mark>', response.data['results'][0]['snippet'])
+
+    def test_search_index_follows_changes(self):
+        self.article.published = False
+        self.article.save()
+        self.course.delete()
+        response = self.client.get(reverse('search'), {'q': 'django'})
+        kinds = {result['type'] for result in response.data['results']}
+        self.assertEqual(kinds, {'question', 'project', 'team'})
+
+    def test_search_required(self):
+        response = self.client.get(reverse('search'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_index(self):
+        SearchDocument.objects.all().delete()
+        call_command('rebuild_search_index', batch_size=2, stdout=io.StringIO())
+        self.assertEqual(SearchDocument.objects.count(), 6)
+
+    def test_search_snippet_escaped(self):
+        Article.objects.create(title='XSS', text='<script>alert(1)</script> in django', published=True)
+        response = self.client.get(reverse('search'), {'q': 'alert', 'type': 'article'})
+        self.assertEqual(
+            response.data['results'][0]['snippet'],
+            '&lt;script&gt;<mark>alert</mark>(1)&lt;/script&gt; in django'
+        )
+
+    def test_render_headline(self):
+        headline = f'<b>{services.HEADLINE_START}django{services.HEADLINE_STOP}</b>'
+        self.assertEqual(services.render_headline(headline), '&lt;b&gt;<mark>django</mark>&lt;/b&gt;')
+
+    def test_article_indexed_once(self):
+        self.assertFalse(hasattr(Article, 'search_vector'))
+        self.assertEqual(SearchDocument.objects.filter(kind='article', object_id=self.article.id).count(), 1)
+
+    def test_fast_delete_kept(self):
+        collector = Collector(using='default')
+        self.assertTrue(collector.can_fast_delete(Invitation.objects.all()))
+        self.assertFalse(collector.can_fast_delete(Article.objects.all()))
+
+    def test_full_text_query(self):
+        with mock.patch('src.search.services.full_text_supported', return_value=True):
+            sql = str(services.search('django', ['article']).query)
+        self.assertIn('websearch_to_tsquery', sql)
+        self.assertIn('ts_rank', sql)
+        self.assertIn('ts_headline', sql)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'полнотекстовый поиск есть только в PostgreSQL')
+class FullTextSearchTest(APITestCase):
+    def setUp(self):
+        Article.objects.create(title='Миграции', text='Миграции базы данных в django', published=True)
+        Article.objects.create(title='Шаблоны', text='Шаблоны django и миграции', published=True)
+
+    def test_search_rank_and_snippet(self):
+        response = self.client.get(reverse('search'), {'q': 'миграции'})
+        titles = [result['title'] for result in response.data['results']]
+        self.assertEqual(titles, ['Миграции', 'Шаблоны'])
+        self.assertIn('<mark>Миграции</mark>', response.data['results'][0]['snippet'])
+
+    def test_article_search(self):
+        response = self.client.get(reverse('article-search'), {'search': 'миграции'})
+        self.assertEqual([result['title'] for result in response.data['results']], ['Миграции', 'Шаблоны'])
+        self.assertIn('<mark>', response.data['results'][0]['headline'])
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from src.search import views
+
+urlpatterns = [
+    path('', views.SearchView.as_view(), name='search'),
+]
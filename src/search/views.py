@@ -0,0 +1,22 @@
+from rest_framework import status
+from rest_framework.generics import ListAPIView
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from . import serializers, services
+
+
+class SearchView(ListAPIView):
+    """Поиск по курсам, урокам, статьям, вопросам, проектам и командам"""
+    query_budget = 3
+    serializer_class = serializers.SearchDocumentSerializer
+    permission_classes = (AllowAny,)
+
+    def get_queryset(self):
+        kinds = [kind for kind in self.request.query_params.get('type', '').split(',') if kind]
+        return services.search(self.request.query_params.get('q', '').strip(), kinds)
+
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get('q', '').strip():
+            return Response({'detail': 'Параметр q обязателен'}, status=status.HTTP_400_BAD_REQUEST)
+        return super().list(request, *args, **kwargs)
@@ -2,6 +2,8 @@ import io
 from PIL import Image
 
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -9,6 +11,7 @@ from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
 
 from . import models
+from src.base import cache
 from src.profiles.models import FatUser
 
 
@@ -42,6 +45,19 @@ class SupportTests(APITestCase):
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]["name"], "Ошибка в проверке задания")
 
+    def test_get_categories_cache(self):
+        stats = cache.get_stats('src.support.views.CategoryView')
+        self.client.get(reverse("categories"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("categories"))
+        self.assertFalse([query for query in queries.captured_queries if 'support_category' in query['sql']])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(cache.get_stats('src.support.views.CategoryView')['hit'], stats['hit'] + 1)
+
+        models.Category.objects.create(name="Другое")
+        response = self.client.get(reverse("categories"))
+        self.assertEqual(len(response.data['results']), 2)
+
     def test_get_reports_list(self):
         self.client.credentials(HTTP_AUTHORIZATION="Token " + self.user_test1_token.key)
         response = self.client.get(reverse("reports"))
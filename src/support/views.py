@@ -1,21 +1,24 @@
 from rest_framework import parsers
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
-from ..base.classes import MixedSerializer
+from ..base.classes import MixedSerializer, CachedResponse
 from ..base.permissions import IsUser
 
 from . import serializers
 from .models import Report, Category
 
 
-class CategoryView(ReadOnlyModelViewSet):
+class CategoryView(CachedResponse, ReadOnlyModelViewSet):
     """Категории"""
+    query_budget = {'list': 3}
     queryset = Category.objects.all()
     serializer_class = serializers.CategorySerializer
+    cache_models = (Category,)
 
 
 class ReportView(MixedSerializer, ModelViewSet):
     """CR отчета"""
+    query_budget = {'list': 3, 'retrieve': 3}
     parser_classes = (parsers.MultiPartParser,)
     permission_classes = (IsUser,)
     serializer_classes_by_action = {
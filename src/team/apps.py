@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TeamConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'src.team'
+
+    def ready(self):
+        import src.team.signals
@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from src.profiles.models import FatUser
+from src.team.models import Invitation, Team
+from src.team.services import check_create_invitations
+
+
+class Command(BaseCommand):
+    help = 'Удаление просроченных заявок в команды на синтетической таблице'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--expired', type=float, default=0.5, help='Доля просроченных заявок')
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            user = FatUser.objects.create(username='bench_invitation_expiry', email=None)
+            team = Team.objects.create(name='bench_invitation_expiry', user=user)
+            start = time.perf_counter()
+            Invitation.objects.bulk_create(
+                (Invitation(team=team, user=user) for _ in range(rows)), batch_size=10000
+            )
+            invitations = Invitation.objects.filter(team=team)
+            first_pk = invitations.order_by('pk').values_list('pk', flat=True).first()
+            invitations.filter(pk__lt=first_pk + int(rows * options['expired'])).update(
+                create_date=timezone.now() - timedelta(days=365)
+            )
+            fill_time = time.perf_counter() - start
+
+            result = check_create_invitations(batch_size=options['batch_size'])
+            remaining = invitations.count()
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'invitations: {rows}, fill: {fill_time:.2f}s')
+        self.stdout.write(
+            f"expired: {result['expired']} in {result['batches']} batches, {result['seconds']:.2f}s"
+        )
+        self.stdout.write(f'remaining: {remaining}')
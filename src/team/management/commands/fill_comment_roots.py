@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from src.team.services import fill_comment_roots
+
+
+class Command(BaseCommand):
+    help = 'Заполнение корня ветки у старых ответов на комментарии'
+
+    def handle(self, *args, **options):
+        total = fill_comment_roots()
+        self.stdout.write(f'Обновлено ответов: {total}')
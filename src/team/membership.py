@@ -0,0 +1,82 @@
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db.models import IntegerField, Value
+
+from src.dashboard.models import Board
+from src.repository.models import Project
+from src.team.models import Team, TeamMember
+from src.team.settings import TeamSettings
+
+MEMBER, TEAM_AUTHOR, PROJECT_AUTHOR, PROJECT_MEMBER, BOARD_AUTHOR = range(5)
+
+
+class Membership(NamedTuple):
+    """Команды и проекты пользователя для проверки прав"""
+    teams: frozenset = frozenset()
+    authored_teams: frozenset = frozenset()
+    authored_projects: frozenset = frozenset()
+    projects: frozenset = frozenset()
+    authored_boards: frozenset = frozenset()
+
+
+def cache_key(user_id) -> str:
+    return f'membership:{user_id}'
+
+
+def load_membership(user_id) -> Membership:
+    """Все связи пользователя с командами, проектами и досками одним запросом"""
+    def kind(queryset, value, field='id'):
+        return queryset.annotate(kind=Value(value, output_field=IntegerField())).values_list(field, 'kind')
+
+    rows = kind(TeamMember.objects.filter(user_id=user_id), MEMBER, 'team_id').union(
+        kind(Team.objects.filter(user_id=user_id), TEAM_AUTHOR),
+        kind(Project.objects.filter(user_id=user_id), PROJECT_AUTHOR),
+        kind(Project.objects.filter(teams__members__user_id=user_id), PROJECT_MEMBER),
+        kind(Board.objects.filter(user_id=user_id), BOARD_AUTHOR),
+    )
+    groups = [set() for _ in Membership._fields]
+    for pk, group in rows:
+        groups[group].add(pk)
+    return Membership(*map(frozenset, groups))
+
+
+def get_membership(request) -> Membership:
+    """Связи текущего пользователя: сначала из запроса, затем из кэша, затем из базы.
+    Сигналы сбрасывают кэш в том процессе, где изменились данные, поэтому отзыв прав сразу
+    во всех процессах работает только с общим кэшем (Redis). С кэшем в памяти процесса
+    другие процессы видят старые права до membership_cache_timeout секунд.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return Membership()
+    scoped = getattr(request, '_membership', None)
+    if scoped is not None and scoped[0] == user.id:
+        return scoped[1]
+    membership = cache.get(cache_key(user.id))
+    if membership is None:
+        membership = load_membership(user.id)
+        cache.set(cache_key(user.id), tuple(membership), TeamSettings.membership_cache_timeout)
+    else:
+        membership = Membership(*membership)
+    request._membership = (user.id, membership)
+    return membership
+
+
+def invalidate(*user_ids):
+    cache.delete_many([cache_key(user_id) for user_id in user_ids])
+
+
+def team_user_ids(team_ids) -> set:
+    """Авторы и участники команд, их связи с проектами зависят от этих команд"""
+    members = TeamMember.objects.filter(team_id__in=team_ids).values_list('user_id', flat=True)
+    authors = Team.objects.filter(id__in=team_ids).values_list('user_id', flat=True)
+    return set(members) | set(authors)
+
+
+def url_pk(view, name: str = 'pk'):
+    """Первичный ключ из адреса запроса, None если его нет или он не число"""
+    try:
+        return int(view.kwargs.get(name))
+    except (TypeError, ValueError):
+        return None
@@ -50,6 +50,11 @@ class Invitation(models.Model):
     order_status = models.CharField(max_length=100, choices=STATUS, default='Waiting')
     create_date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['create_date'], name='team_invitation_create_idx'),
+        ]
+
     def __str__(self):
         return f'User {self.user} - team {self.team}'
 
@@ -84,6 +89,18 @@ class Comment(models.Model):
         blank=True,
         related_name='children'
     )
+    root = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='thread_comments'
+    )
+
+    def save(self, *args, **kwargs):
+        if self.parent_id and not self.root_id:
+            self.root_id = self.parent.root_id or self.parent_id
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f'{self.id}'
@@ -1,6 +1,6 @@
 from rest_framework import permissions
 
-from src.team.models import Team, TeamMember
+from src.team.membership import get_membership, url_pk
 
 
 class IsAuthor(permissions.BasePermission):
@@ -20,19 +20,17 @@ class IsAuthorTeamOrRead(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return Team.objects.filter(user=request.user, id=view.kwargs.get('pk')).exists()
+        return url_pk(view) in get_membership(request).authored_teams
 
 
 class IsAuthorTeam(permissions.BasePermission):
     """Только для автора команды"""
     def has_permission(self, request, view):
-        return Team.objects.select_related('user').filter(user=request.user, id=view.kwargs.get('pk')).exists()
+        return url_pk(view) in get_membership(request).authored_teams
 
 
 class IsMemberTeam(permissions.BasePermission):
     """Только для автора или участника"""
 
     def has_permission(self, request, view):
-        return TeamMember.objects.select_related('user', 'team').filter(
-            user=request.user, team__id=view.kwargs.get('pk')
-        ).exists()
+        return url_pk(view) in get_membership(request).teams
@@ -161,6 +161,18 @@ class CommentChildrenSerializer(serializers.Serializer):
         return serializer.data
 
 
+class CommentThreadSerializer(CommentListSerializer):
+    """ Ветка комментариев, собранная в памяти CommentThreadService """
+    children = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.Comment
+        fields = ("id", "user", "text", "create_date", "comments_count", "children")
+
+    def get_children(self, obj):
+        return CommentThreadSerializer(obj.thread_children, many=True, context=self.context).data
+
+
 class PostSerializer(serializers.ModelSerializer):
     """ Список постов команды """
     user = GetUserSerializer()
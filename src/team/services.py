@@ -1,24 +1,36 @@
-from datetime import date
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
 
 from ..base import exceptions
 
 from src.team import models
+from src.team.settings import TeamSettings
+
 
+def check_create_invitations(ttl_days: int = None, batch_size: int = None) -> dict:
+    """Удаление заявок старше ttl_days дней.
 
-def check_create_invitations():
-    """Проверка истечения даты подачи заявки"""
-    month = date.today().month
-    day = date.today().day
-    invitations = models.Invitation.objects.all()
-    for invitation in invitations:
-        create_month = invitation.create_date.date().month
-        create_day = invitation.create_date.date().day
-        if month > create_month and day > create_day:
-            invitation.delete()
-        elif month > (create_month + 1):
-            invitation.delete()
-        else:
-            pass
+    Заявки удаляются пачками по batch_size, каждая пачка - отдельный короткий DELETE
+    по индексу create_date, поэтому таблица не блокируется надолго. От заявок ничего
+    не зависит и обработчиков удаления у них нет, поэтому Django удаляет пачку без загрузки строк.
+    Возвращает число удаленных заявок, число пачек и время в секундах.
+    """
+    ttl_days = TeamSettings.invitation_ttl_days if ttl_days is None else ttl_days
+    batch_size = batch_size or TeamSettings.invitation_batch_size
+    expired = models.Invitation.objects.filter(create_date__lt=timezone.now() - timedelta(days=ttl_days))
+    start = time.perf_counter()
+    deleted = batches = 0
+    while True:
+        chunk = list(expired.order_by().values_list('pk', flat=True)[:batch_size])
+        if not chunk:
+            break
+        deleted += models.Invitation.objects.filter(pk__in=chunk).delete()[0]
+        batches += 1
+    return {'expired': deleted, 'batches': batches, 'seconds': round(time.perf_counter() - start, 3)}
 
 
 def check_and_create_invitation(team, cur_user):
@@ -52,4 +64,49 @@ def check_post(post_id, **validated_data):
         return parent
 
 
+class CommentThreadService:
+    """Ветки комментариев поста: ответы всех корней страницы загружаются одним запросом по root_id"""
+
+    def __init__(self, post_id: int):
+        self.post_id = post_id
+
+    def get_roots(self):
+        """Корневые комментарии поста без удаленных"""
+        return models.Comment.objects.select_related('user').filter(
+            post_id=self.post_id, parent__isnull=True, is_delete=False
+        )
+
+    def build(self, roots):
+        """Проставить корням и ответам thread_children и comments_count.
+        Дерево собирается в памяти по parent_id, число запросов не зависит от глубины веток.
+        Удаленные комментарии не загружаются, их ветки в дерево не попадают.
+        """
+        children = defaultdict(list)
+        replies = models.Comment.objects.select_related('user').filter(
+            root_id__in=[comment.id for comment in roots], is_delete=False
+        ).order_by('create_date', 'id')
+        for comment in replies:
+            children[comment.parent_id].append(comment)
+        level = list(roots)
+        while level:
+            for comment in level:
+                comment.thread_children = children[comment.id]
+                comment.comments_count = len(comment.thread_children)
+            level = [child for comment in level for child in comment.thread_children]
+        return roots
+
 
+def fill_comment_roots() -> int:
+    """Проставить root ответам, созданным до появления поля, возвращает число обновленных.
+    Ответы корней получают root по parent_id, каждый следующий уровень - root своего родителя.
+    """
+    total = models.Comment.objects.filter(
+        root__isnull=True, parent__isnull=False, parent__parent__isnull=True
+    ).update(root_id=F('parent_id'))
+    while True:
+        updated = models.Comment.objects.filter(root__isnull=True, parent__root__isnull=False).update(
+            root_id=Subquery(models.Comment.objects.filter(pk=OuterRef('parent_id')).values('root_id'))
+        )
+        if not updated:
+            return total
+        total += updated
@@ -0,0 +1,4 @@
+class TeamSettings:
+    invitation_ttl_days = 30
+    invitation_batch_size = 5000
+    membership_cache_timeout = 60
@@ -0,0 +1,49 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from src.dashboard.models import Board
+from src.repository.models import Project
+
+from . import membership
+from .models import Team, TeamMember
+
+
+@receiver(post_save, sender=TeamMember)
+@receiver(post_delete, sender=TeamMember)
+def member_changed(sender, instance, **kwargs):
+    membership.invalidate(instance.user_id)
+
+
+@receiver(pre_save, sender=Team)
+@receiver(pre_save, sender=Project)
+@receiver(pre_save, sender=Board)
+def owner_saving(sender, instance, update_fields=None, **kwargs):
+    """Запомнить прежнего автора, при передаче объекта его права тоже меняются"""
+    if instance._state.adding or (update_fields is not None and 'user' not in update_fields):
+        return
+    instance._old_user_id = sender.objects.filter(pk=instance.pk).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Board)
+@receiver(post_delete, sender=Board)
+def owner_changed(sender, instance, **kwargs):
+    old_user_id = instance.__dict__.pop('_old_user_id', None)
+    membership.invalidate(*{instance.user_id, old_user_id} - {None})
+
+
+@receiver(m2m_changed, sender=Project.teams.through)
+def project_teams_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Смена команд проекта меняет доступ к проекту у их участников"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        team_ids = [instance.pk]
+    elif action == 'pre_clear':
+        team_ids = list(instance.teams.values_list('id', flat=True))
+    else:
+        team_ids = pk_set
+    membership.invalidate(*membership.team_user_ids(team_ids))
@@ -4,4 +4,5 @@ from src.team.services import check_create_invitations
 
 @app.task
 def check_invitations():
-    check_create_invitations()
+    """Удаление просроченных заявок в команды"""
+    return check_create_invitations()
@@ -1,14 +1,28 @@
 import io
+from datetime import timedelta
+from unittest import mock
 from PIL import Image
 
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
 
+from src.base.query_budget import QueryCounter
+from src.base.service import ViewCounter
+from src.base.tasks import flush_views
 from src.profiles.models import FatUser
+from src.repository.models import Category, Project
 from src.team import models
+from src.team.membership import get_membership
+from src.team.services import check_create_invitations
+from src.team.tasks import check_invitations
 
 
 def temporary_image():
@@ -273,6 +287,31 @@ class TeamTest(APITestCase):
         self.assertEqual(response.status_code, 404)
         self.assertEqual(models.Invitation.objects.filter(id=self.invitation.id).exists(), True)
 
+    def test_expire_invitations(self):
+        now = timezone.now()
+        ages = (0, 29, 31, 45, 365, 400)
+        invitations = [
+            models.Invitation.objects.create(user=self.profile4, team=self.team1) for _ in ages
+        ]
+        for invitation, age in zip(invitations, ages):
+            models.Invitation.objects.filter(pk=invitation.pk).update(create_date=now - timedelta(days=age))
+
+        self.assertEqual(check_invitations(), {'expired': 4, 'batches': 1, 'seconds': mock.ANY})
+        self.assertEqual(
+            set(models.Invitation.objects.values_list('pk', flat=True)),
+            {self.invitation.pk, invitations[0].pk, invitations[1].pk}
+        )
+
+    def test_expire_invitations_batches(self):
+        models.Invitation.objects.update(create_date=timezone.now() - timedelta(days=10))
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            result = check_create_invitations(ttl_days=7, batch_size=1)
+        self.assertEqual((result['expired'], result['batches']), (1, 1))
+        # выборка pk пачки, DELETE и пустая выборка, строки заявок не загружаются
+        self.assertEqual(counter.count, 3)
+        self.assertFalse(models.Invitation.objects.exists())
+
     def test_invitation_list(self):
         self.client.credentials(HTTP_AUTHORIZATION="Token " + self.profile1_token.key)
         response = self.client.get(reverse('invitation_list'))
@@ -868,4 +907,143 @@ class TeamTest(APITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.status_code, 400)
 
+    def test_comment_thread(self):
+        reply = models.Comment.objects.create(
+            user=self.profile3, post=self.post1, text='reply', parent=self.comment1
+        )
+        models.Comment.objects.create(user=self.profile1, post=self.post1, text='nested', parent=reply)
+        deleted = models.Comment.objects.create(
+            user=self.profile3, post=self.post1, text='deleted', parent=self.comment1, is_delete=True
+        )
+        models.Comment.objects.create(user=self.profile1, post=self.post1, text='hidden', parent=deleted)
+        models.Comment.objects.create(user=self.profile1, post=self.post1, text='deleted root', is_delete=True)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.profile3_token.key)
+        url = reverse('comment_thread', kwargs={'pk': self.team1.id, 'post_pk': self.post1.id})
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        comment_queries = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and 'team_comment' in query['sql']
+        ]
+        # корни и все ответы страницы
+        self.assertEqual(len(comment_queries), 2)
+        self.assertEqual(len(response.data['results']), 1)
+        root = response.data['results'][0]
+        self.assertEqual(root['comments_count'], 1)
+        self.assertEqual(root['children'][0]['text'], 'reply')
+        self.assertEqual(root['children'][0]['children'][0]['text'], 'nested')
+        self.assertEqual(root['children'][0]['children'][0]['children'], [])
+
+    def test_fill_comment_roots(self):
+        reply = models.Comment.objects.create(user=self.profile3, post=self.post1, text='reply', parent=self.comment1)
+        nested = models.Comment.objects.create(user=self.profile1, post=self.post1, text='nested', parent=reply)
+        self.assertEqual((reply.root_id, nested.root_id), (self.comment1.id, self.comment1.id))
+        models.Comment.objects.update(root=None)
+        replies = models.Comment.objects.filter(parent__isnull=False).count()
+        out = io.StringIO()
+        call_command('fill_comment_roots', stdout=out)
+        self.assertEqual(out.getvalue().strip(), f'Обновлено ответов: {replies}')
+        reply.refresh_from_db()
+        nested.refresh_from_db()
+        self.assertEqual((reply.root_id, nested.root_id), (self.comment1.id, self.comment1.id))
+
+    def test_comment_thread_cursor(self):
+        for number in range(12):
+            models.Comment.objects.create(user=self.profile1, post=self.post1, text=f'root{number}')
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.profile1_token.key)
+        response = self.client.get(reverse('comment_thread', kwargs={'pk': self.team1.id, 'post_pk': self.post1.id}))
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNotNone(response.data['next'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNone(response.data['next'])
+
+    def test_comment_thread_invalid(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.profile2_token.key)
+        response = self.client.get(reverse('comment_thread', kwargs={'pk': self.team1.id, 'post_pk': self.post1.id}))
+        self.assertEqual(response.status_code, 403)
 
+    def test_membership_cached(self):
+        cache.clear()
+        url = reverse('post', kwargs={'pk': self.team1.id})
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.profile3_token.key)
+        for expected in (1, 0):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            membership_queries = [
+                query for query in context.captured_queries
+                if query['sql'].startswith('SELECT') and 'team_teammember' in query['sql']
+            ]
+            self.assertEqual(len(membership_queries), expected)
+
+    def test_membership_invalidated(self):
+        cache.clear()
+        url = reverse('post', kwargs={'pk': self.team1.id})
+        self.client.force_authenticate(self.profile4)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        member = models.TeamMember.objects.create(team=self.team1, user=self.profile4)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        member.delete()
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_membership_project_teams(self):
+        cache.clear()
+        project = Project.objects.create(
+            name='project', description='description', user=self.profile1,
+            category=Category.objects.create(name='category'), repository='repository'
+        )
+        request = mock.Mock(user=self.profile3, _membership=None)
+        self.assertNotIn(project.id, get_membership(request).projects)
+        project.teams.add(self.team1)
+        request._membership = None
+        self.assertIn(project.id, get_membership(request).projects)
+        self.assertEqual(get_membership(request).teams, {self.team1.id})
+        project.teams.clear()
+        request._membership = None
+        self.assertNotIn(project.id, get_membership(request).projects)
+        self.assertIn(project.id, get_membership(mock.Mock(user=self.profile1, _membership=None)).authored_projects)
+
+    def test_membership_owner_reassigned(self):
+        cache.clear()
+        self.assertIn(self.team1.id, get_membership(mock.Mock(user=self.profile1, _membership=None)).authored_teams)
+        team = models.Team.objects.get(pk=self.team1.id)
+        team.user = self.profile4
+        team.save()
+        self.assertNotIn(self.team1.id, get_membership(mock.Mock(user=self.profile1, _membership=None)).authored_teams)
+        self.assertIn(self.team1.id, get_membership(mock.Mock(user=self.profile4, _membership=None)).authored_teams)
+
+    @mock.patch.object(ViewCounter, 'buffered', return_value=True)
+    def test_post_views_buffered(self, buffered):
+        cache.clear()
+        url = reverse('update_or_delete_post', kwargs={'pk': self.team1.id, 'post_pk': self.post1.id})
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.profile1_token.key)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.data['view_count'], '1')
+        self.assertFalse([query for query in context.captured_queries if query['sql'].startswith('UPDATE "team_post"')])
+        self.client.get(url)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.profile3_token.key)
+        self.client.get(url)
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.view_count, 0)
+
+        self.assertEqual(flush_views(), 0)
+        later = ViewCounter.bucket() * ViewCounter.flush_interval + 2 * ViewCounter.flush_interval
+        with mock.patch('src.base.service.time.time', return_value=later):
+            self.assertEqual(flush_views(), 2)
+            self.assertEqual(flush_views(), 0)
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.view_count, 2)
+
+    def test_post_views_local_cache(self):
+        cache.clear()
+        url = reverse('update_or_delete_post', kwargs={'pk': self.team1.id, 'post_pk': self.post1.id})
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.profile1_token.key)
+        self.assertFalse(ViewCounter.buffered())
+        self.assertEqual(self.client.get(url).data['view_count'], '1')
+        self.client.get(url)
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.view_count, 1)
+        self.assertEqual(flush_views(), 0)
@@ -38,6 +38,10 @@ comment = views.CommentsView.as_view({
     'post': 'create'
 })
 
+comment_thread = views.CommentsView.as_view({
+    'get': 'thread'
+})
+
 comment_detail = views.CommentsView.as_view({
     'get': 'retrieve',
     'put': 'update',
@@ -102,6 +106,7 @@ urlpatterns = ([
     path('<int:pk>/post/', post, name='post'),
     path('<int:pk>/post/<int:post_pk>/', update_or_delete_post, name='update_or_delete_post'),
     path('<int:pk>/post/<int:post_pk>/comment/', comment, name='comment'),
+    path('<int:pk>/post/<int:post_pk>/comment/thread/', comment_thread, name='comment_thread'),
     path('<int:pk>/post/<int:post_pk>/comment/<int:comment_pk>', comment_detail, name='comment_detail'),
     path('<int:pk>/avatar/', avatar_team, name='avatar_team'),
     path('<int:pk>/', detail_teams, name='detail_teams'),
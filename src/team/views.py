@@ -3,17 +3,16 @@ from django_filters import rest_framework as filter
 from rest_framework import viewsets, status
 from rest_framework.exceptions import APIException
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
-from rest_framework.response import Response
 from rest_framework import parsers
 
-from src.base.classes import MixedPermissionSerializer, MixedSerializer
-from src.base.service import post_view_count
+from src.base.classes import CountedView, KeysetPagination, MixedPermissionSerializer, MixedSerializer
 from src.base.permissions import IsUser
-from src.team import serializers, permissions, filters, models
+from src.team import serializers, permissions, filters, models, services
 
 
 class TeamView(MixedPermissionSerializer, viewsets.ModelViewSet):
     """ CRUD команды """
+    query_budget = {'list': 4, 'retrieve': 4}
     filterset_class = filters.TeamFilter
     filter_backends = (filter.DjangoFilterBackend,)
     queryset = models.Team.objects.prefetch_related('project_teams').select_related('user').all()
@@ -44,6 +43,7 @@ class TeamView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
 class SocialLinkView(MixedPermissionSerializer, viewsets.ModelViewSet):
     """CRUD социальной ссылке к команде"""
+    query_budget = {'list': 3, 'retrieve': 2}
     permission_classes_by_action = {
         'list': (IsAuthenticatedOrReadOnly,),
         'create': (permissions.IsAuthorTeam,),
@@ -75,6 +75,7 @@ class SocialLinkView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
 class OwnTeamListView(MixedPermissionSerializer, viewsets.ModelViewSet):
     """Просмотр команды как создатель"""
+    query_budget = {'list': 4}
     permission_classes_by_action = {
         'list': (IsAuthenticated,)
     }
@@ -89,6 +90,7 @@ class OwnTeamListView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
 class MemberTeamListView(MixedPermissionSerializer, viewsets.ModelViewSet):
     """Просмотр команд как участник"""
+    query_budget = {'list': 4}
     permission_classes_by_action = {
         'list': (IsAuthenticated,),
     }
@@ -102,6 +104,7 @@ class MemberTeamListView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
 class MemberList(MixedPermissionSerializer, viewsets.ModelViewSet):
     """ Просмотр участников команды"""
+    query_budget = {'list': 5, 'retrieve': 4}
     permission_classes_by_action = {
         'list': (permissions.IsMemberTeam,),
         'retrieve': (permissions.IsMemberTeam,),
@@ -122,8 +125,10 @@ class MemberList(MixedPermissionSerializer, viewsets.ModelViewSet):
         instance.delete()
 
 
-class PostView(MixedPermissionSerializer, viewsets.ModelViewSet):
+class PostView(CountedView, MixedPermissionSerializer, viewsets.ModelViewSet):
     """ CRUD поста если автор или дали такое право """
+    query_budget = {'list': 3, 'retrieve': 4}
+    pagination_class = KeysetPagination
     serializer_classes_by_action = {
         'list': serializers.PostSerializer,
         'retrieve': serializers.PostSerializer,
@@ -145,12 +150,6 @@ class PostView(MixedPermissionSerializer, viewsets.ModelViewSet):
             comments_count=Count("post_comments", filter=Q(post_comments__is_delete=False), distinct=True)
         )
 
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        instance = post_view_count(instance)
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
-
     def perform_create(self, serializer):
         serializer.save(user=self.request.user, team_id=self.kwargs.get('pk'))
 
@@ -163,8 +162,13 @@ class PostView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
 class CommentsView(MixedPermissionSerializer, viewsets.ModelViewSet):
     """CRUD комментариев к постам"""
+    # thread: все ответы страницы грузятся одним запросом по root_id при любой глубине веток
+    query_budget = {'list': 3, 'thread': 4, 'retrieve': 3}
+    pagination_class = KeysetPagination
+    keyset_ordering = 'id'
     permission_classes_by_action = {
         'list': (permissions.IsMemberTeam,),
+        'thread': (permissions.IsMemberTeam,),
         'create': (permissions.IsMemberTeam,),
         'update': (IsUser,),
         'retrieve': (permissions.IsMemberTeam,),
@@ -172,6 +176,7 @@ class CommentsView(MixedPermissionSerializer, viewsets.ModelViewSet):
     }
     serializer_classes_by_action = {
         'list': serializers.CommentListSerializer,
+        'thread': serializers.CommentThreadSerializer,
         'create': serializers.CommentCreateSerializer,
         'retrieve': serializers.CommentListSerializer,
         'update': serializers.TeamCommentUpdateSerializer,
@@ -181,11 +186,18 @@ class CommentsView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
     def get_queryset(self):
         return models.Comment.objects.select_related('user', 'parent').filter(
-            parent__isnull=True, post_id=self.kwargs.get('post_pk')
+            parent__isnull=True, post_id=self.kwargs.get('post_pk'), is_delete=False
         ).annotate(
-            comments_count=Count("children")
+            comments_count=Count("children", filter=Q(children__is_delete=False))
         )
 
+    def thread(self, request, *args, **kwargs):
+        """Корневые комментарии поста с вложенными ответами"""
+        service = services.CommentThreadService(self.kwargs.get('post_pk'))
+        roots = self.paginate_queryset(service.get_roots())
+        serializer = self.get_serializer(service.build(roots), many=True)
+        return self.get_paginated_response(serializer.data)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user, post_id=self.kwargs.get('post_pk'))
 
@@ -198,6 +210,7 @@ class CommentsView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
 class InvitationView(MixedPermissionSerializer, viewsets.ModelViewSet):
     """CD заявки в команду"""
+    query_budget = {'list': 3, 'retrieve': 2}
     permission_classes_by_action = {
         'list': (IsAuthenticated,),
         'retrieve': (IsUser,),
@@ -223,6 +236,7 @@ class InvitationView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
 class InvitationDetailView(MixedPermissionSerializer, viewsets.ModelViewSet):
     """ Принять/отклонить заявки в команду"""
+    query_budget = {'list': 3, 'retrieve': 3}
     permission_classes_by_action = {
         'list': (IsAuthenticated,),
         'retrieve': (permissions.IsAuthorTeamForInvitation,),
@@ -246,6 +260,7 @@ class InvitationDetailView(MixedPermissionSerializer, viewsets.ModelViewSet):
 
 class AvatarTeam(MixedPermissionSerializer, viewsets.ModelViewSet):
     """Аватар команды"""
+    query_budget = {'list': 3}
     parser_classes = (parsers.MultiPartParser,)
     serializer_classes_by_action = serializers.AvatarSerializer
     permission_classes_by_action = {